@@ -142,6 +142,13 @@ if 'loc_cache' not in CACHES:
         'LOCATION': 'edx_location_mem_cache',
     }
 
+COURSE_STRUCTURE_CACHE_LOCAL_SIZE = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_CACHE_LOCAL_SIZE', COURSE_STRUCTURE_CACHE_LOCAL_SIZE
+)
+STATIC_CONTENT_DISK_CACHE_DIR = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE_DIR', STATIC_CONTENT_DISK_CACHE_DIR)
+STATIC_CONTENT_DISK_CACHE_SIZE = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE_SIZE', STATIC_CONTENT_DISK_CACHE_SIZE)
+ACCESS_DECISION_CACHE_TIMEOUT = ENV_TOKENS.get('ACCESS_DECISION_CACHE_TIMEOUT', ACCESS_DECISION_CACHE_TIMEOUT)
+
 SESSION_COOKIE_DOMAIN = ENV_TOKENS.get('SESSION_COOKIE_DOMAIN')
 SESSION_COOKIE_HTTPONLY = ENV_TOKENS.get('SESSION_COOKIE_HTTPONLY', True)
 SESSION_ENGINE = ENV_TOKENS.get('SESSION_ENGINE', SESSION_ENGINE)
@@ -340,3 +347,6 @@ if FEATURES['ENABLE_COURSEWARE_INDEX'] or FEATURES['ENABLE_LIBRARY_INDEX']:
 
 XBLOCK_SETTINGS = ENV_TOKENS.get('XBLOCK_SETTINGS', {})
 XBLOCK_SETTINGS.setdefault("VideoDescriptor", {})["licensing_enabled"] = FEATURES.get("LICENSING", False)
+
+MODULESTORE_QUERY_BUDGET = ENV_TOKENS.get('MODULESTORE_QUERY_BUDGET', MODULESTORE_QUERY_BUDGET)
+MODULESTORE_QUERY_RECORD_SIZES = ENV_TOKENS.get('MODULESTORE_QUERY_RECORD_SIZES', MODULESTORE_QUERY_RECORD_SIZES)
@@ -173,6 +173,10 @@ FEATURES = {
     # How many seconds to show the bumper again, default is 7 days:
     'SHOW_BUMPER_PERIODICITY': 7 * 24 * 3600,
 
+    # Report the Mongo operations made by the modulestores and the contentstore
+    # while handling each request to datadog, see MODULESTORE_QUERY_BUDGET.
+    'ENABLE_MODULESTORE_INSTRUMENTATION': False,
+
 }
 
 ENABLE_JASMINE = False
@@ -279,6 +283,7 @@ TEMPLATE_LOADERS = (
 
 MIDDLEWARE_CLASSES = (
     'request_cache.middleware.RequestCache',
+    'monitoring.middleware.ModulestoreQueryMiddleware',
     'django.middleware.cache.UpdateCacheMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -359,6 +364,9 @@ MODULESTORE = {
                         'default_class': 'xmodule.hidden_module.HiddenDescriptor',
                         'fs_root': DATA_DIR,
                         'render_template': 'edxmako.shortcuts.render_to_string',
+                        # Whether lazily loading the definition of a block loads the
+                        # definitions of all its siblings in the same query
+                        'prefetch_sibling_definitions': False,
                     }
                 },
                 {
@@ -369,6 +377,9 @@ MODULESTORE = {
                         'default_class': 'xmodule.hidden_module.HiddenDescriptor',
                         'fs_root': DATA_DIR,
                         'render_template': 'edxmako.shortcuts.render_to_string',
+                        # Whether updating an item only patches the part of the cached
+                        # metadata inheritance tree below it
+                        'incremental_inheritance_updates': False,
                     }
                 }
             ]
@@ -376,6 +387,28 @@ MODULESTORE = {
     }
 }
 
+# Requests making more Mongo operations than this are logged, when the
+# ENABLE_MODULESTORE_INSTRUMENTATION feature is on. None disables the logging.
+MODULESTORE_QUERY_BUDGET = None
+
+# Also measure the size of the documents returned by the Mongo operations, which
+# costs a BSON encoding of each document.
+MODULESTORE_QUERY_RECORD_SIZES = False
+
+# Number of split structures kept in each process's in-memory LRU, in front of the
+# 'course_structure_cache' django cache. 0 disables the in-process tier.
+COURSE_STRUCTURE_CACHE_LOCAL_SIZE = 64
+
+# Directory of the on-disk LRU of the assets too large for the django cache, served
+# by the StaticContentServer. None disables the disk cache.
+STATIC_CONTENT_DISK_CACHE_DIR = None
+# Number of bytes of assets kept in the disk cache
+STATIC_CONTENT_DISK_CACHE_SIZE = 1024 * 1024 * 1024
+
+# Set like the LMS setting, so that the access decisions it caches are invalidated
+# when Studio saves users, their course roles or their enrollments.
+ACCESS_DECISION_CACHE_TIMEOUT = 0
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -741,6 +774,7 @@ INSTALLED_APPS = (
     'edx_jsme',    # Molecular Structure
 
     'openedx.core.djangoapps.content.course_structures',
+    'openedx.core.djangoapps.content.course_summaries',
 
     # Credit courses
     'openedx.core.djangoapps.credit',
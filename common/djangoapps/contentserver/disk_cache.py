@@ -0,0 +1,189 @@
+"""
+On-disk LRU of the assets too large for the django cache.
+
+The files are named after the md5 digest of their content, so an asset that is
+uploaded again is stored under a new name, and the stale file ages out of the
+cache. The access time of a file is its modification time, which is bumped on
+each hit; the least recently used files are deleted when the cache grows over
+its size.
+
+An asset is copied into the cache while it's streamed to the client which
+missed it, by a single process at a time. The copy is written to a temporary
+file renamed once complete, so readers never see a partial file.
+"""
+import errno
+import logging
+import os
+import re
+import time
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+# The GridFS md5 of an asset
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Seconds after which the temporary file of a copy that isn't written to anymore is deleted
+STALE_COPY_SECONDS = 600
+
+
+class DiskAssetCache(object):
+    """
+    Asset files kept in `directory`, up to `max_size` bytes in total.
+    """
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+
+    def _path(self, content_digest):
+        """
+        Returns the path of the file of the asset whose content has the md5 `content_digest`.
+        """
+        if not DIGEST_PATTERN.match(content_digest):
+            raise ValueError(u"Invalid content digest: {}".format(content_digest))
+        return os.path.join(self.directory, content_digest)
+
+    def open(self, content_digest):
+        """
+        Returns the cached file of the asset whose content has the md5
+        `content_digest`, opened for reading, or None if it's not cached.
+        """
+        path = self._path(content_digest)
+        try:
+            cached_file = open(path, 'rb')
+        except IOError:
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            # The file was evicted meanwhile, it's still readable through cached_file
+            pass
+        return cached_file
+
+    def stream_and_store(self, content):
+        """
+        Yields the chunks of the data of the StaticContent `content`, copying
+        them into the cache as they are read, so that the content is read once.
+
+        Only one process copies an asset at a time: the others (and any content
+        too large for the cache) are just streamed. The copy is kept only if the
+        whole content was read, e.g. not if the client went away.
+        """
+        file_descriptor = None
+        if content.length <= self.max_size:
+            file_descriptor = self._claim(content.content_digest)
+        if file_descriptor is None:
+            for chunk in content.stream_data():
+                yield chunk
+            return
+
+        temp_path = self._temp_path(content.content_digest)
+        temp_file = os.fdopen(file_descriptor, 'wb')
+        stored = False
+        try:
+            size = 0
+            for chunk in content.stream_data():
+                yield chunk
+                if temp_file is not None:
+                    try:
+                        temp_file.write(chunk)
+                    except IOError:
+                        # The data is still streamed, it's just not cached
+                        log.exception(u"Unable to cache %s on disk", unicode(content.location))
+                        temp_file.close()
+                        temp_file = None
+                size += len(chunk)
+
+            if temp_file is not None and size == content.length:
+                temp_file.close()
+                os.rename(temp_path, self._path(content.content_digest))
+                stored = True
+        except OSError:
+            log.exception(u"Unable to cache %s on disk", unicode(content.location))
+        finally:
+            if not stored:
+                if temp_file is not None:
+                    temp_file.close()
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+        if stored:
+            self._evict()
+
+    def _temp_path(self, content_digest):
+        """
+        Returns the path of the file the asset whose content has the md5
+        `content_digest` is copied to, before it's renamed into the cache.
+        """
+        return os.path.join(self.directory, '.' + content_digest)
+
+    def _claim(self, content_digest):
+        """
+        Creates the temporary file of the asset whose content has the md5
+        `content_digest` and returns its descriptor, or None if another process
+        is copying the asset already.
+
+        The temporary file serves as a lock: it's created exclusively, and its
+        writer renames or deletes it once done. The file of a writer which
+        died meanwhile is deleted once it hasn't been written to for
+        STALE_COPY_SECONDS, so that the next request copies the asset again.
+        """
+        temp_path = self._temp_path(content_digest)
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            return os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0644)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                log.exception(u"Unable to cache %s on disk", content_digest)
+                return None
+        try:
+            if os.path.getmtime(temp_path) < time.time() - STALE_COPY_SECONDS:
+                os.remove(temp_path)
+        except OSError:
+            # Renamed or deleted by its writer meanwhile
+            pass
+        return None
+
+    def _evict(self):
+        """
+        Deletes the least recently used files until the cache fits in max_size.
+        """
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.directory):
+            if not DIGEST_PATTERN.match(name):
+                # Temporary files of the stores in progress
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total_size += stat.st_size
+
+        entries.sort()
+        for __, size, name in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                # Evicted by another process
+                pass
+            total_size -= size
+
+
+def get_disk_cache():
+    """
+    Returns the DiskAssetCache configured by the STATIC_CONTENT_DISK_CACHE_DIR
+    and STATIC_CONTENT_DISK_CACHE_SIZE settings, or None if it's disabled.
+    """
+    directory = getattr(settings, 'STATIC_CONTENT_DISK_CACHE_DIR', None)
+    max_size = getattr(settings, 'STATIC_CONTENT_DISK_CACHE_SIZE', 0)
+    if not directory or not max_size:
+        return None
+    return DiskAssetCache(directory, max_size)
@@ -3,6 +3,7 @@ Middleware to serve assets.
 """
 
 import logging
+from uuid import uuid4
 
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
@@ -10,7 +11,7 @@ from django.http import (
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
@@ -18,11 +19,19 @@ from cache_toolbox.core import get_cached_content, set_cached_content
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
+from contentserver.disk_cache import get_disk_cache
+
 # TODO: Soon as we have a reasonable way to serialize/deserialize AssetKeys, we need
 # to change this file so instead of using course_id_partial, we're just using asset keys
 
 log = logging.getLogger(__name__)
 
+# Assets smaller than this are cached in the django cache, larger ones in the disk cache (if it's enabled)
+MAX_CACHED_CONTENT_LENGTH = 1048576
+
+# Range requests of more ranges than this get the full content
+MAX_BYTE_RANGES = 20
+
 
 class StaticContentServer(object):
     def process_request(self, request):
@@ -54,11 +63,10 @@ class StaticContentServer(object):
 
                 # since we fetched it from DB, let's cache it going forward, but only if it's < 1MB
                 # this is because I haven't been able to find a means to stream data out of memcached
-                if content.length is not None:
-                    if content.length < 1048576:
-                        # since we've queried as a stream, let's read in the stream into memory to set in cache
-                        content = content.copy_to_in_mem()
-                        set_cached_content(content)
+                if content.length is not None and content.length < MAX_CACHED_CONTENT_LENGTH:
+                    # since we've queried as a stream, let's read in the stream into memory to set in cache
+                    content = content.copy_to_in_mem()
+                    set_cached_content(content)
             else:
                 # NOP here, but we may wish to add a "cache-hit" counter in the future
                 pass
@@ -81,13 +89,29 @@ class StaticContentServer(object):
             # timestamp, so we can simply compare the strings
             last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
 
+            # content cached before the digests were stored has none
+            content_digest = getattr(content, 'content_digest', None)
+            etag = '"{}"'.format(content_digest) if content_digest else None
+
             # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            # entity tags, or else the timestamps, if they are the same then just
+            # return a 304 (Not Modified)
+            if etag and 'HTTP_IF_NONE_MATCH' in request.META:
+                if etag_matches(request.META['HTTP_IF_NONE_MATCH'], etag):
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
                 if if_modified_since == last_modified_at_str:
                     return HttpResponseNotModified()
 
+            # Larger assets are read from the disk cache if it holds them, or else
+            # streamed from GridFS, and copied to the disk cache by full reads
+            disk_cache = None
+            if isinstance(content, StaticContentStream):
+                content, disk_cache = load_from_disk_cache(content)
+
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
@@ -96,10 +120,6 @@ class StaticContentServer(object):
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -112,43 +132,146 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
+                    elif len(ranges) > MAX_BYTE_RANGES:
+                        # We send back the full content.
                         log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            u"More than %d ranges in Range header: %s for content: %s",
+                            MAX_BYTE_RANGES, header_value, unicode(loc)
                         )
                     else:
-                        first, last = ranges[0]
+                        # The unsatisfiable byte ranges are ignored, unless none is satisfiable
+                        ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
 
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                        elif len(ranges) == 1:
+                            first, last = ranges[0]
+                            response = HttpResponse(
+                                stream_and_close(content, content.stream_data_in_range(first, last))
+                            )
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
+                            response['Content-Type'] = content.content_type
                             response.status_code = 206  # Partial Content
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            # According to Http/1.1 spec content for multiple ranges is sent as a multipart message.
+                            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            response = multipart_byteranges_response(content, ranges)
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                chunks = disk_cache.stream_and_store(content) if disk_cache is not None else content.stream_data()
+                response = HttpResponse(stream_and_close(content, chunks))
                 response['Content-Length'] = content.length
+                response['Content-Type'] = content.content_type
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
             response['Last-Modified'] = last_modified_at_str
+            if etag:
+                # This also keeps the ETag middleware from computing one over the whole content
+                response['ETag'] = etag
 
             return response
 
 
+def load_from_disk_cache(content):
+    """
+    Returns the StaticContentStream `content`, read from the disk cache if it's
+    enabled and holds it, and the DiskAssetCache to copy `content` to while
+    it's streamed, on a miss (or None).
+    """
+    disk_cache = get_disk_cache()
+    content_digest = getattr(content, 'content_digest', None)
+    if disk_cache is None or not content_digest:
+        return content, None
+
+    cached_file = disk_cache.open(content_digest)
+    if cached_file is None:
+        return content, disk_cache
+
+    content.close()
+    return StaticContentStream(
+        content.location, content.name, content.content_type, cached_file,
+        last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+        import_path=content.import_path, length=content.length, locked=content.locked,
+        content_digest=content_digest
+    ), None
+
+
+def stream_and_close(content, chunks):
+    """
+    Yields the `chunks` of the data of `content`, then closes the stream of
+    `content` if it has one (when the response is closed, if it's not consumed).
+    """
+    try:
+        for chunk in chunks:
+            yield chunk
+    finally:
+        if isinstance(content, StaticContentStream):
+            content.close()
+
+
+def multipart_byteranges_response(content, ranges):
+    """
+    Returns a 206 response whose body is the multipart/byteranges message of
+    the `ranges` of `content`, streamed one range after another.
+    """
+    boundary = uuid4().hex
+    part_headers = [
+        (
+            u'--{boundary}\r\nContent-Type: {content_type}\r\nContent-Range: bytes {first}-{last}/{length}\r\n\r\n'
+        ).format(
+            boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+        ).encode('utf-8')
+        for first, last in ranges
+    ]
+    closing = '--{boundary}--\r\n'.format(boundary=boundary)
+
+    def stream_parts():
+        """
+        Yields the parts of the message.
+        """
+        for part_header, (first, last) in zip(part_headers, ranges):
+            yield part_header
+            for chunk in content.stream_data_in_range(first, last):
+                yield chunk
+            yield '\r\n'
+        yield closing
+
+    response = HttpResponse(
+        stream_and_close(content, stream_parts()),
+        content_type='multipart/byteranges; boundary={}'.format(boundary),
+        status=206,  # Partial Content
+    )
+    response['Content-Length'] = str(
+        sum(len(part_header) + last - first + 1 + 2 for part_header, (first, last) in zip(part_headers, ranges)) +
+        len(closing)
+    )
+    return response
+
+
+def etag_matches(header_value, etag):
+    """
+    Returns whether the If-None-Match header value `header_value` matches the entity tag `etag`.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.26
+    """
+    for tag in header_value.split(','):
+        tag = tag.strip()
+        # The weak comparison function is used for GET requests
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == '*' or tag == etag:
+            return True
+    return False
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
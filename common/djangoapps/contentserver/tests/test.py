@@ -4,9 +4,15 @@ Tests for StaticContentServer
 import copy
 import ddt
 import logging
+import os
+import shutil
+import tempfile
+import time
 import unittest
 from uuid import uuid4
 
+from mock import patch
+
 from django.conf import settings
 from django.test.client import Client
 from django.test.utils import override_settings
@@ -17,7 +23,11 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_course_from_xml
 
-from contentserver.middleware import parse_range_header
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.content import StaticContent
+
+from contentserver.disk_cache import STALE_COPY_SECONDS, DiskAssetCache
+from contentserver.middleware import etag_matches, parse_range_header
 from student.models import CourseEnrollment
 
 log = logging.getLogger(__name__)
@@ -146,7 +156,7 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart message of the ranges.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
@@ -154,9 +164,85 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)
         self.assertNotIn('Content-Range', resp)
-        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        self.assertEqual(resp['Content-Length'], str(len(resp.content)))
+
+        boundary = resp['Content-Type'].split('boundary=')[1]
+        data = self.contentstore.find(self.unlocked_asset).data
+        parts = resp.content.split('--' + boundary)
+        self.assertEqual(parts[0], '')
+        self.assertEqual(parts[-1], '--\r\n')
+        self.assertEqual(len(parts), 4)
+        for part, (first, last) in zip(parts[1:3], [(first_byte, last_byte), (self.length_unlocked - 100, None)]):
+            headers, body = part.split('\r\n\r\n', 1)
+            self.assertIn('Content-Range: bytes {first}-{last}/{length}'.format(
+                first=first, last=last or self.length_unlocked - 1, length=self.length_unlocked
+            ), headers)
+            self.assertEqual(body, data[first:last + 1 if last else None] + '\r\n')
+
+    def test_range_request_multiple_ranges_one_satisfiable(self):
+        """
+        Test that the unsatisfiable ranges of a request are ignored.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9, {first}-'.format(
+            first=self.length_unlocked)
+        )
+
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], 'bytes 0-9/{length}'.format(length=self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], '10')
+
+    def test_etag(self):
+        """
+        Test that assets are served with the md5 of their content as ETag, and
+        that requests matching it get a 304 Not Modified.
+        """
+        resp = self.client.get(self.url_unlocked)
+        etag = resp['ETag']
+        self.assertEqual(etag, '"{}"'.format(self.contentstore.get_attr(self.unlocked_asset, 'md5')))
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(resp.status_code, 200)
+
+    @patch('contentserver.middleware.MAX_CACHED_CONTENT_LENGTH', 0)
+    @patch('contentserver.middleware.get_cached_content', lambda loc: None)
+    def test_disk_cache(self):
+        """
+        Test that assets too large for the django cache are copied to the disk
+        cache by full reads, and then served from it.
+        """
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        content_digest = self.contentstore.get_attr(self.unlocked_asset, 'md5')
+        data = self.contentstore.find(self.unlocked_asset).data
+
+        with override_settings(STATIC_CONTENT_DISK_CACHE_DIR=cache_dir, STATIC_CONTENT_DISK_CACHE_SIZE=1024 * 1024):
+            # Range requests and 304s don't fill the cache
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, data[:10])
+            resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"{}"'.format(content_digest))
+            self.assertEqual(resp.status_code, 304)
+            self.assertFalse(os.path.exists(os.path.join(cache_dir, content_digest)))
+
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.content, data)
+            self.assertEqual(os.listdir(cache_dir), [content_digest])
+
+            with patch('contentserver.middleware.AssetManager.find', wraps=AssetManager.find) as mock_find:
+                with patch('contentserver.disk_cache.DiskAssetCache.stream_and_store') as mock_stream_and_store:
+                    resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9')
+            self.assertTrue(mock_find.called)
+            self.assertFalse(mock_stream_and_store.called)
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, data[:10])
 
     @ddt.data(
         'bytes 0-',
@@ -193,6 +279,100 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         self.assertEqual(resp.status_code, 416)
 
 
+class DiskAssetCacheTestCase(unittest.TestCase):
+    """
+    Tests for the DiskAssetCache.
+    """
+
+    def setUp(self):
+        super(DiskAssetCacheTestCase, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.disk_cache = DiskAssetCache(self.cache_dir, 25)
+
+    def _content(self, data):
+        """
+        Returns a StaticContent of `data`, whose digest is made of the first character of `data`.
+        """
+        return StaticContent('loc', 'name', 'type', data, length=len(data), content_digest=data[0] * 32)
+
+    def _store(self, content):
+        """
+        Streams `content` in full through the disk cache, returning the data streamed.
+        """
+        return ''.join(self.disk_cache.stream_and_store(content))
+
+    def test_store_and_open(self):
+        self.assertIsNone(self.disk_cache.open('a' * 32))
+        self.assertEqual(self._store(self._content('a' * 10)), 'a' * 10)
+        self.assertEqual(self.disk_cache.open('a' * 32).read(), 'a' * 10)
+        self.assertEqual(os.listdir(self.cache_dir), ['a' * 32])
+
+    def test_too_large(self):
+        self.assertEqual(self._store(self._content('a' * 26)), 'a' * 26)
+        self.assertIsNone(self.disk_cache.open('a' * 32))
+
+    def test_partial_read_not_stored(self):
+        chunks = self.disk_cache.stream_and_store(self._content('a' * 10))
+        next(chunks)
+        chunks.close()
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_single_writer(self):
+        # Another process is copying the asset
+        open(os.path.join(self.cache_dir, '.' + 'a' * 32), 'wb').close()
+        self.assertEqual(self._store(self._content('a' * 10)), 'a' * 10)
+        self.assertIsNone(self.disk_cache.open('a' * 32))
+
+    def test_stale_copy_deleted(self):
+        temp_path = os.path.join(self.cache_dir, '.' + 'a' * 32)
+        open(temp_path, 'wb').close()
+        past = time.time() - STALE_COPY_SECONDS - 1
+        os.utime(temp_path, (past, past))
+        self._store(self._content('a' * 10))
+        self.assertFalse(os.path.exists(temp_path))
+
+        self._store(self._content('a' * 10))
+        self.assertEqual(self.disk_cache.open('a' * 32).read(), 'a' * 10)
+
+    def test_least_recently_used_evicted(self):
+        self._store(self._content('a' * 10))
+        self._store(self._content('b' * 10))
+        # Make 'a' older than 'b', then use it
+        past = time.time() - 60
+        os.utime(os.path.join(self.cache_dir, 'a' * 32), (past, past))
+        os.utime(os.path.join(self.cache_dir, 'b' * 32), (past + 1, past + 1))
+        self.disk_cache.open('a' * 32)
+
+        self._store(self._content('c' * 10))
+        self.assertIsNotNone(self.disk_cache.open('a' * 32))
+        self.assertIsNone(self.disk_cache.open('b' * 32))
+        self.assertIsNotNone(self.disk_cache.open('c' * 32))
+
+    def test_invalid_digest(self):
+        with self.assertRaises(ValueError):
+            self.disk_cache.open('../secrets')
+
+
+@ddt.ddt
+class EtagMatchesTestCase(unittest.TestCase):
+    """
+    Tests for the etag_matches function.
+    """
+
+    @ddt.data(
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"xyz", "abc"', True),
+        ('*', True),
+        ('"xyz"', False),
+        ('abc', False),
+    )
+    @ddt.unpack
+    def test_etag_matches(self, header_value, expected):
+        self.assertEqual(etag_matches(header_value, '"abc"'), expected)
+
+
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
     """
@@ -0,0 +1,96 @@
+"""
+An index of the discussion modules of each course, kept in the django cache.
+
+Building the forum category map from the modulestore means loading every
+discussion module of the course and walking its ancestors for their group
+access rules, on each forum request. The index holds what the category map and
+the access checks need of each module, so that only the checks which depend on
+the user and the time are left to each request.
+
+The index of a course is dropped from the cache when the course is published,
+which may happen in the CMS, and is rebuilt on its next use.
+"""
+from collections import namedtuple
+import logging
+
+from django.core.cache import cache
+from django.dispatch import receiver
+
+from util.module_utils import restricted_group_access
+from xmodule.modulestore.django import modulestore, SignalHandler
+
+log = logging.getLogger(__name__)
+
+# How long the index of a course is kept, in case its publish isn't seen
+INDEX_TIMEOUT = 24 * 60 * 60
+
+REQUIRED_KEYS = ('discussion_id', 'discussion_category', 'discussion_target')
+
+
+class DiscussionIndexEntry(namedtuple('DiscussionIndexEntry', [
+        'discussion_id', 'location', 'discussion_category', 'discussion_target', 'sort_key', 'start',
+        'days_early_for_beta', 'visible_to_staff_only', 'group_access',
+])):
+    """
+    The settings of a discussion module read by the forum, named like the
+    attributes of the module.
+
+    group_access is None if the module isn't restricted to groups of users,
+    else its merged_group_access without the partitions it isn't restricted by.
+    """
+    __slots__ = ()
+
+
+def _cache_key(course_key):
+    """
+    Returns the django cache key of the index of the course `course_key`.
+    """
+    return u'django_comment_common.discussion_index.{}'.format(course_key)
+
+
+def build_discussion_index(course_key):
+    """
+    Returns the list of the DiscussionIndexEntries of the discussion modules of
+    the course `course_key` which have all their required keys.
+    """
+    index = []
+    for module in modulestore().get_items(course_key, qualifiers={'category': 'discussion'}):
+        missing_keys = [key for key in REQUIRED_KEYS if getattr(module, key, None) is None]
+        if missing_keys:
+            log.warning(
+                "Required key '%s' not in discussion %s, leaving out of category map", missing_keys[0], module.location
+            )
+            continue
+        index.append(DiscussionIndexEntry(
+            discussion_id=module.discussion_id,
+            location=module.location,
+            discussion_category=module.discussion_category,
+            discussion_target=module.discussion_target,
+            sort_key=module.sort_key,
+            start=module.start,
+            days_early_for_beta=module.days_early_for_beta,
+            visible_to_staff_only=module.visible_to_staff_only,
+            group_access=restricted_group_access(module),
+        ))
+    return index
+
+
+def get_discussion_index(course_key):
+    """
+    Returns the list of the DiscussionIndexEntries of the course `course_key`,
+    from the cache if it's there, else from the modulestore.
+    """
+    cache_key = _cache_key(course_key)
+    index = cache.get(cache_key)
+    if index is None:
+        index = build_discussion_index(course_key)
+        cache.set(cache_key, index, INDEX_TIMEOUT)
+    return index
+
+
+@receiver(SignalHandler.course_published)
+def invalidate_discussion_index(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Drops the index of a course when it's published.
+    """
+    cache.delete(_cache_key(course_key))
@@ -105,3 +105,7 @@ class Permission(models.Model):
 
     def __unicode__(self):
         return self.name
+
+
+# The receivers of the discussion index must be registered at startup, in the CMS too.
+import discussion_index  # pylint: disable=unused-import
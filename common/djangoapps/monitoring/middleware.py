@@ -0,0 +1,77 @@
+"""
+Middleware reporting the Mongo operations made by the modulestores and the
+contentstore while handling each request.
+"""
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+import dogstats_wrapper as dog_stats_api
+from xmodule.mongo_instrumentation import QueryRecorder
+
+log = logging.getLogger(__name__)
+
+
+class ModulestoreQueryMiddleware(object):
+    """
+    Records the Mongo operations made during each request, and sends their count
+    and latency (and result size, if settings.MODULESTORE_QUERY_RECORD_SIZES is
+    set) per store and operation type to datadog, tagged with the name of the view.
+
+    Requests making more operations than settings.MODULESTORE_QUERY_BUDGET (if
+    set) are logged with the breakdown of their operations.
+    """
+    def __init__(self):
+        """Disable the middleware if the feature flag is disabled. """
+        if not settings.FEATURES.get('ENABLE_MODULESTORE_INSTRUMENTATION'):
+            raise MiddlewareNotUsed()
+
+    def process_request(self, request):
+        """
+        Start recording.
+        """
+        request.modulestore_query_recorder = QueryRecorder(
+            record_sizes=getattr(settings, 'MODULESTORE_QUERY_RECORD_SIZES', False)
+        )
+        request.modulestore_query_recorder.start()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):  # pylint: disable=unused-argument
+        """
+        Remember the name of the view, for tagging the metrics.
+        """
+        request.modulestore_query_view_name = u'{}.{}'.format(view_func.__module__, view_func.__name__)
+
+    def process_response(self, request, response):
+        """
+        Stop recording, and report the operations made.
+        """
+        recorder = getattr(request, 'modulestore_query_recorder', None)
+        if recorder is None:
+            return response
+        recorder.stop()
+
+        view_name = getattr(request, 'modulestore_query_view_name', u'unknown')
+        for (store, operation), stats in recorder.stats.iteritems():
+            tags = [u'view:{}'.format(view_name), u'store:{}'.format(store), u'operation:{}'.format(operation)]
+            dog_stats_api.histogram('edxapp.modulestore.queries', stats.count, tags=tags)
+            dog_stats_api.histogram('edxapp.modulestore.query_time', stats.duration, tags=tags)
+            if recorder.record_sizes:
+                dog_stats_api.histogram('edxapp.modulestore.query_bytes', stats.size, tags=tags)
+
+        budget = getattr(settings, 'MODULESTORE_QUERY_BUDGET', None)
+        if budget is not None and recorder.total_count > budget:
+            log.warning(
+                u"%s %s (view %s) made %d modulestore queries (budget %d) in %.3fs: %s",
+                request.method,
+                request.path,
+                view_name,
+                recorder.total_count,
+                budget,
+                recorder.total_duration,
+                u', '.join(
+                    u'{}.{}: {} ({:.3f}s, {} bytes)'.format(store, operation, stats.count, stats.duration, stats.size)
+                    for (store, operation), stats in sorted(recorder.stats.iteritems())
+                ),
+            )
+        return response
@@ -0,0 +1,62 @@
+"""
+Tests for the monitoring middleware.
+"""
+from mock import Mock, patch
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from monitoring.middleware import ModulestoreQueryMiddleware
+from xmodule.mongo_instrumentation import active_recorder, instrument
+
+
+@override_settings(FEATURES={'ENABLE_MODULESTORE_INSTRUMENTATION': True})
+class TestModulestoreQueryMiddleware(TestCase):
+    """
+    Tests for ModulestoreQueryMiddleware.
+    """
+    def setUp(self):
+        super(TestModulestoreQueryMiddleware, self).setUp()
+        self.middleware = ModulestoreQueryMiddleware()
+        self.collection = instrument(Mock(), 'mongo')
+        self.request = Mock(method='GET', path='/courses/')
+
+    def make_request(self, num_queries):
+        """
+        Runs a request making `num_queries` operations through the middleware.
+        """
+        def view():  # pylint: disable=missing-docstring
+            pass
+
+        self.middleware.process_request(self.request)
+        self.middleware.process_view(self.request, view, [], {})
+        for _ in range(num_queries):
+            self.collection.find_one({})
+        return self.middleware.process_response(self.request, HttpResponse())
+
+    @override_settings(FEATURES={})
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ModulestoreQueryMiddleware()
+
+    @patch('monitoring.middleware.dog_stats_api')
+    def test_metrics(self, mock_dog_stats):
+        self.make_request(3)
+        self.assertIsNone(active_recorder())
+        mock_dog_stats.histogram.assert_any_call(
+            'edxapp.modulestore.queries', 3,
+            tags=[u'view:monitoring.tests.view', u'store:mongo', u'operation:find_one'],
+        )
+        # Sizes aren't measured unless MODULESTORE_QUERY_RECORD_SIZES is set
+        metrics = [call_args[0][0] for call_args in mock_dog_stats.histogram.call_args_list]
+        self.assertNotIn('edxapp.modulestore.query_bytes', metrics)
+
+    @override_settings(MODULESTORE_QUERY_BUDGET=2)
+    @patch('monitoring.middleware.log')
+    def test_over_budget(self, mock_log):
+        self.make_request(2)
+        self.assertFalse(mock_log.warning.called)
+        self.make_request(3)
+        self.assertTrue(mock_log.warning.called)
@@ -8,6 +8,7 @@ from abc import ABCMeta, abstractmethod
 from django.contrib.auth.models import User
 import logging
 
+from request_cache.middleware import RequestCache
 from student.models import CourseAccessRole
 from xmodule_django.models import CourseKeyField
 
@@ -55,6 +56,106 @@ class RoleCache(object):
         )
 
 
+class CourseRoleSnapshot(object):
+    """
+    The roles of a user in a course and in its org, loaded with a single query
+    (none if the user's RoleCache is already loaded) to answer all the role
+    checks on the course.
+
+    Use `CourseRoleSnapshot.get`, which keeps the snapshots for the duration of
+    the request.
+    """
+    REQUEST_CACHE_KEY = 'student.roles.course_role_snapshots'
+
+    def __init__(self, user, course_key):
+        self._user = user
+        self.course_key = course_key
+        self._course_roles = set()
+        self._org_roles = set()
+
+        if not (user.is_authenticated() and user.is_active):
+            return
+
+        # pylint: disable=protected-access
+        if hasattr(user, '_roles'):
+            access_roles = user._roles._roles
+        else:
+            access_roles = CourseAccessRole.objects.filter(user=user, org=course_key.org)
+        for access_role in access_roles:
+            # Compared here as well, as the database collation may be case insensitive
+            if access_role.org != course_key.org:
+                continue
+            if access_role.course_id is None:
+                self._org_roles.add(access_role.role)
+            elif access_role.course_id == course_key:
+                self._course_roles.add(access_role.role)
+
+    @classmethod
+    def get(cls, user, course_key):
+        """
+        Returns the CourseRoleSnapshot of `user` in the course `course_key`,
+        loaded once per request.
+        """
+        request_cache = RequestCache.get_request_cache()
+        if getattr(request_cache, 'request', None) is None:
+            return cls(user, course_key)
+        snapshots = request_cache.data.setdefault(cls.REQUEST_CACHE_KEY, {})
+        snapshot = snapshots.get((user.id, course_key))
+        if snapshot is None:
+            snapshot = snapshots[(user.id, course_key)] = cls(user, course_key)
+        return snapshot
+
+    @classmethod
+    def invalidate(cls, user):
+        """
+        Discards the snapshots of `user` loaded in the request.
+        """
+        snapshots = getattr(RequestCache.get_request_cache(), 'data', {}).get(cls.REQUEST_CACHE_KEY, {})
+        for key in [key for key in snapshots if key[0] == user.id]:
+            del snapshots[key]
+
+    @property
+    def is_global_staff(self):
+        """
+        Whether the user is global staff (see GlobalStaff).
+        """
+        return GlobalStaff().has_user(self._user)
+
+    @property
+    def is_staff(self):
+        """
+        Whether the user has the staff role in the course or in its org.
+        """
+        return 'staff' in self._course_roles or 'staff' in self._org_roles
+
+    @property
+    def is_instructor(self):
+        """
+        Whether the user has the instructor role in the course or in its org.
+        """
+        return 'instructor' in self._course_roles or 'instructor' in self._org_roles
+
+    @property
+    def is_beta_tester(self):
+        """
+        Whether the user is a beta tester of the course (see CourseBetaTesterRole).
+        """
+        return self.has_course_role(CourseBetaTesterRole.ROLE)
+
+    def has_course_role(self, role):
+        """
+        Returns whether the user has the role named `role` in the course (e.g.
+        CourseFinanceAdminRole.ROLE).
+        """
+        return role in self._course_roles
+
+    def has_org_role(self, role):
+        """
+        Returns whether the user has the role named `role` in the org of the course.
+        """
+        return role in self._org_roles
+
+
 class AccessRole(object):
     """
     Object representing a role with particular access to a resource
@@ -102,12 +203,14 @@ class GlobalStaff(AccessRole):
             if (user.is_authenticated() and user.is_active):
                 user.is_staff = True
                 user.save()
+                CourseRoleSnapshot.invalidate(user)
 
     def remove_users(self, *users):
         for user in users:
             # don't check is_authenticated nor is_active on purpose
             user.is_staff = False
             user.save()
+            CourseRoleSnapshot.invalidate(user)
 
     def users_with_role(self):
         raise Exception("This operation is un-indexed, and shouldn't be used")
@@ -158,6 +261,7 @@ class RoleBase(AccessRole):
                 entry.save()
                 if hasattr(user, '_roles'):
                     del user._roles
+                CourseRoleSnapshot.invalidate(user)
 
     def remove_users(self, *users):
         """
@@ -170,6 +274,7 @@ class RoleBase(AccessRole):
         for user in users:
             if hasattr(user, '_roles'):
                 del user._roles
+            CourseRoleSnapshot.invalidate(user)
 
     def users_with_role(self):
         """
@@ -15,6 +15,7 @@ from xmodule.error_module import ErrorDescriptor
 from django.test.client import Client
 from student.models import CourseEnrollment
 from student.views import get_course_enrollment_pairs
+from openedx.core.djangoapps.content.course_summaries.models import CourseSummary
 from util.milestones_helpers import (
     get_pre_requisite_courses_not_completed,
     set_prerequisite_courses,
@@ -82,6 +83,26 @@ class TestCourseListing(ModuleStoreTestCase):
         courses_list = list(get_course_enrollment_pairs(self.student, None, []))
         self.assertEqual(len(courses_list), 0)
 
+    @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+    @mock.patch.dict("django.conf.settings.FEATURES", {'ENABLE_COURSE_SUMMARIES': True})
+    def test_get_course_list_from_summaries(self):
+        """
+        Test getting the summaries of the courses, including those without a summary yet
+        """
+        summarized_location = self.store.make_course_key('Org1', 'Course1', 'Run1')
+        summarized_course = self._create_course_with_access_groups(summarized_location)
+        CourseSummary.update_from_course(summarized_course)
+        course_location = self.store.make_course_key('Org1', 'Course2', 'Run1')
+        self._create_course_with_access_groups(course_location)
+        CourseSummary.objects.filter(course_id=course_location).delete()
+
+        courses_list = list(get_course_enrollment_pairs(self.student, None, []))
+        self.assertEqual(len(courses_list), 2)
+        self.assertTrue(all(isinstance(course, CourseSummary) for course, __ in courses_list))
+        self.assertEqual(
+            set(course.id for course, __ in courses_list), {summarized_course.id, course_location}
+        )
+
     def test_errored_course_regular_access(self):
         """
         Test the course list for regular staff when get_course returns an ErrorDescriptor
@@ -3,13 +3,16 @@ Tests of student.roles
 """
 import ddt
 from django.test import TestCase
+from mock import Mock
 
 from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
 from student.tests.factories import AnonymousUserFactory
 
+from request_cache.middleware import RequestCache
 from student.roles import (
     GlobalStaff, CourseRole, CourseStaffRole, CourseInstructorRole,
-    OrgStaffRole, OrgInstructorRole, RoleCache, CourseBetaTesterRole
+    OrgStaffRole, OrgInstructorRole, RoleCache, CourseBetaTesterRole,
+    CourseFinanceAdminRole, CourseRoleSnapshot
 )
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
@@ -193,3 +196,59 @@ class RoleCacheTestCase(TestCase):
     def test_empty_cache(self, role, target):
         cache = RoleCache(self.user)
         self.assertFalse(cache.has_role(*target))
+
+
+class CourseRoleSnapshotTestCase(TestCase):
+    """
+    Tests of CourseRoleSnapshot
+    """
+
+    COURSE_KEY = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+    OTHER_COURSE_KEY = SlashSeparatedCourseKey('edX', 'toy', '2013_Fall')
+
+    def setUp(self):
+        super(CourseRoleSnapshotTestCase, self).setUp()
+        self.user = UserFactory()
+
+    def test_roles(self):
+        CourseStaffRole(self.COURSE_KEY).add_users(self.user)
+        OrgInstructorRole(self.COURSE_KEY.org).add_users(self.user)
+        CourseBetaTesterRole(self.OTHER_COURSE_KEY).add_users(self.user)
+        CourseFinanceAdminRole(self.COURSE_KEY).add_users(self.user)
+        # add_users discards the RoleCache of the user, so the roles are loaded with a query
+        with self.assertNumQueries(1):
+            snapshot = CourseRoleSnapshot(self.user, self.COURSE_KEY)
+            self.assertFalse(snapshot.is_global_staff)
+            self.assertTrue(snapshot.is_staff)
+            self.assertTrue(snapshot.is_instructor)
+            self.assertFalse(snapshot.is_beta_tester)
+            self.assertTrue(snapshot.has_course_role(CourseFinanceAdminRole.ROLE))
+            self.assertTrue(snapshot.has_org_role('instructor'))
+            self.assertFalse(snapshot.has_org_role('staff'))
+
+        snapshot = CourseRoleSnapshot(self.user, self.OTHER_COURSE_KEY)
+        self.assertFalse(snapshot.is_staff)
+        self.assertTrue(snapshot.is_instructor)
+        self.assertTrue(snapshot.is_beta_tester)
+
+    def test_global_staff(self):
+        self.assertFalse(CourseRoleSnapshot(self.user, self.COURSE_KEY).is_global_staff)
+        self.assertTrue(CourseRoleSnapshot(UserFactory(is_staff=True), self.COURSE_KEY).is_global_staff)
+
+    def test_anonymous_user(self):
+        with self.assertNumQueries(0):
+            snapshot = CourseRoleSnapshot(AnonymousUserFactory(), self.COURSE_KEY)
+            self.assertFalse(snapshot.is_global_staff)
+            self.assertFalse(snapshot.is_staff)
+
+    def test_loaded_once_per_request(self):
+        RequestCache().process_request(Mock())
+        self.addCleanup(RequestCache().clear_request_cache)
+
+        snapshot = CourseRoleSnapshot.get(self.user, self.COURSE_KEY)
+        self.assertIs(CourseRoleSnapshot.get(self.user, self.COURSE_KEY), snapshot)
+        self.assertIsNot(CourseRoleSnapshot.get(self.user, self.OTHER_COURSE_KEY), snapshot)
+
+        # Changing the user's roles discards its snapshots
+        CourseStaffRole(self.COURSE_KEY).add_users(self.user)
+        self.assertTrue(CourseRoleSnapshot.get(self.user, self.COURSE_KEY).is_staff)
@@ -123,6 +123,7 @@ from eventtracking import tracker
 from notification_prefs.views import enable_notifications
 
 # Note that this lives in openedx, so this dependency should be refactored.
+from openedx.core.djangoapps.content.course_summaries.models import CourseSummary
 from openedx.core.djangoapps.user_api.preferences import api as preferences_api
 
 
@@ -231,30 +232,47 @@ def get_course_enrollment_pairs(user, course_org_filter, org_filter_out_set):
     """
     Get the relevant set of (Course, CourseEnrollment) pairs to be displayed on
     a student's dashboard.
+
+    If FEATURES['ENABLE_COURSE_SUMMARIES'] is on, the courses are CourseSummary
+    objects loaded at once, instead of CourseDescriptors loaded one at a time.
     """
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
-        store = modulestore()
-        with store.bulk_operations(enrollment.course_id):
-            course = store.get_course(enrollment.course_id)
-            if course and not isinstance(course, ErrorDescriptor):
-
-                # if we are in a Microsite, then filter out anything that is not
-                # attributed (by ORG) to that Microsite
-                if course_org_filter and course_org_filter != course.location.org:
-                    continue
-                # Conversely, if we are not in a Microsite, then let's filter out any enrollments
-                # with courses attributed (by ORG) to Microsites
-                elif course.location.org in org_filter_out_set:
-                    continue
-
-                yield (course, enrollment)
-            else:
-                log.error(
-                    u"User %s enrolled in %s course %s",
-                    user.username,
-                    "broken" if course else "non-existent",
-                    enrollment.course_id
-                )
+    enrollments = list(CourseEnrollment.enrollments_for_user(user))
+    if settings.FEATURES.get('ENABLE_COURSE_SUMMARIES'):
+        summaries = CourseSummary.get_summaries([enrollment.course_id for enrollment in enrollments])
+        get_course = summaries.get
+    else:
+        get_course = _get_dashboard_course
+
+    for enrollment in enrollments:
+        course = get_course(enrollment.course_id)
+        if course and not isinstance(course, ErrorDescriptor):
+
+            # if we are in a Microsite, then filter out anything that is not
+            # attributed (by ORG) to that Microsite
+            if course_org_filter and course_org_filter != course.location.org:
+                continue
+            # Conversely, if we are not in a Microsite, then let's filter out any enrollments
+            # with courses attributed (by ORG) to Microsites
+            elif course.location.org in org_filter_out_set:
+                continue
+
+            yield (course, enrollment)
+        else:
+            log.error(
+                u"User %s enrolled in %s course %s",
+                user.username,
+                "broken" if course else "non-existent",
+                enrollment.course_id
+            )
+
+
+def _get_dashboard_course(course_key):
+    """
+    Loads the course `course_key` from the modulestore, for the dashboard.
+    """
+    store = modulestore()
+    with store.bulk_operations(course_key):
+        return store.get_course(course_key)
 
 
 def _cert_info(user, course, cert_status, course_mode):
@@ -0,0 +1,154 @@
+"""Event tracker backend that sends events to another backend in batches.
+
+Events are queued in-process and sent from a background thread, either
+when `max_batch_size` events are queued, or `flush_interval` seconds
+after the first event of a batch, so that requests don't wait for the
+backend. For example::
+
+  TRACKING_BACKENDS = {
+      'logger': {
+          'ENGINE': 'track.backends.buffered.BufferedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.logger.LoggerBackend',
+                  'OPTIONS': {
+                      'name': 'tracking'
+                  }
+              },
+              'max_batch_size': 100,
+              'flush_interval': 1,
+              'max_queue_size': 10000,
+          }
+      }
+  }
+
+At most `max_queue_size` events are queued: the events sent while the
+queue is full are dropped. The queued events are flushed when the
+process exits, but those of a killed process are lost.
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import copy
+import logging
+import os
+import Queue
+import threading
+import time
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger(__name__)
+
+
+class BufferedBackend(BaseBackend):
+    """Event tracker backend that queues events and sends them in batches"""
+
+    def __init__(self, backend, max_batch_size=100, flush_interval=1.0, max_queue_size=10000, **kwargs):
+        """Event tracker backend that queues events and sends them in batches.
+
+        :Parameters:
+
+          - `backend`: configuration of the backend the events are sent
+            to, with an 'ENGINE' and optional 'OPTIONS' like the entries
+            of TRACKING_BACKENDS
+          - `max_batch_size`: maximum number of events sent at once
+          - `flush_interval`: maximum number of seconds an event waits
+            for its batch to fill up
+          - `max_queue_size`: maximum number of events queued
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+
+        # Import here to avoid circular import.
+        from track.tracker import _instantiate_backend_from_name
+
+        self.backend = _instantiate_backend_from_name(backend['ENGINE'], backend.get('OPTIONS', {}))
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+        atexit.register(self.flush)
+
+    def _ensure_worker(self):
+        """Start the queue and the thread sending its events, once per process.
+
+        Threads don't survive forks, e.g. of the workers of the web
+        server, so this is done by the first event sent by each process.
+
+        """
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = Queue.Queue(self.max_queue_size)
+                worker = threading.Thread(target=self._run, args=(self._queue,), name='track.backends.buffered')
+                worker.daemon = True
+                worker.start()
+                self._pid = os.getpid()
+
+    def send(self, event):
+        """Queue a copy of the event, or drop it if the queue is full"""
+        self._ensure_worker()
+        try:
+            # The event is sent later from another thread: copy it so that
+            # changes made by the caller after this returns aren't sent.
+            self._queue.put_nowait(copy.deepcopy(event))
+        except Queue.Full:
+            dog_stats_api.increment('track.buffered.dropped')
+
+    def _run(self, queue):
+        """Send the events of the queue in batches, forever"""
+        while True:
+            batch = [queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(queue.get(timeout=timeout))
+                except Queue.Empty:
+                    break
+
+            dog_stats_api.gauge('track.buffered.queue_size', queue.qsize())
+            self._send_batch(batch)
+
+    def _send_batch(self, batch):
+        """Send the events of the batch to the backend"""
+        try:
+            with dog_stats_api.timer('track.buffered.send_batch'):
+                self.backend.send_batch(batch)
+        except Exception:  # pylint: disable=broad-except
+            # The worker must survive the errors of the backend.
+            log.exception('Error sending a batch of %d events', len(batch))
+            dog_stats_api.increment('track.buffered.dropped', len(batch))
+        else:
+            dog_stats_api.increment('track.buffered.sent', len(batch))
+
+    def flush(self):
+        """Send the queued events now, from the current thread"""
+        if self._pid != os.getpid():
+            return
+
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except Queue.Empty:
+                break
+            if len(batch) == self.max_batch_size:
+                self._send_batch(batch)
+                batch = []
+        if batch:
+            self._send_batch(batch)
@@ -0,0 +1,101 @@
+from __future__ import absolute_import
+
+import threading
+import time
+
+from mock import call, patch
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend
+
+
+class RecordingBackend(BaseBackend):
+    """Backend recording the batches of events sent to it"""
+
+    def __init__(self, **kwargs):
+        super(RecordingBackend, self).__init__(**kwargs)
+        self.batches = []
+        # Cleared to make send_batch wait until it's set
+        self.proceed = threading.Event()
+        self.proceed.set()
+        self.sending = threading.Event()
+
+    def send(self, event):
+        self.send_batch([event])
+
+    def send_batch(self, events):
+        self.sending.set()
+        self.proceed.wait()
+        self.batches.append(events)
+
+
+class TestBufferedBackend(TestCase):
+    def setUp(self):
+        super(TestBufferedBackend, self).setUp()
+        self.buffered_backend = BufferedBackend(
+            backend={'ENGINE': 'track.backends.tests.test_buffered.RecordingBackend'},
+            max_batch_size=3,
+            flush_interval=0.1,
+            max_queue_size=2,
+        )
+        self.backend = self.buffered_backend.backend
+
+        dog_stats_patcher = patch('track.backends.buffered.dog_stats_api')
+        self.mock_dog_stats = dog_stats_patcher.start()
+        self.addCleanup(dog_stats_patcher.stop)
+
+    def wait_for(self, condition):
+        """Wait for the background thread to make condition() true"""
+        deadline = time.time() + 5
+        while not condition():
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+
+    def test_events_sent_in_batches(self):
+        events = [{'test': i} for i in range(5)]
+        for event in events:
+            self.buffered_backend.send(event)
+            # Keep the queue from filling up
+            self.wait_for(lambda: self.buffered_backend._queue.empty())  # pylint: disable=protected-access
+
+        self.wait_for(lambda: sum(len(batch) for batch in self.backend.batches) == len(events))
+        self.assertEqual([event for batch in self.backend.batches for event in batch], events)
+        self.assertTrue(all(len(batch) <= 3 for batch in self.backend.batches))
+        self.assertNotIn(call('track.buffered.dropped'), self.mock_dog_stats.increment.mock_calls)
+
+    def test_events_dropped_when_queue_full(self):
+        self.backend.proceed.clear()
+        self.buffered_backend.send({'test': 0})
+        # The background thread waits in send_batch, while the queue fills up
+        self.wait_for(self.backend.sending.is_set)
+        for i in range(1, 4):
+            self.buffered_backend.send({'test': i})
+        self.mock_dog_stats.increment.assert_called_once_with('track.buffered.dropped')
+
+        self.backend.proceed.set()
+        self.wait_for(lambda: len(self.backend.batches) == 2)
+        self.assertEqual(sorted(self.backend.batches), [[{'test': 0}], [{'test': 1}, {'test': 2}]])
+
+    def test_flush(self):
+        self.buffered_backend.flush()
+        self.assertEqual(self.backend.batches, [])
+
+        # Without the background thread, the queued events are sent by flush
+        with patch('track.backends.buffered.threading.Thread'):
+            self.buffered_backend.send({'test': 0})
+            self.buffered_backend.send({'test': 1})
+        self.assertEqual(self.backend.batches, [])
+
+        self.buffered_backend.flush()
+        self.assertEqual(self.backend.batches, [[{'test': 0}, {'test': 1}]])
+
+    def test_event_copied_when_queued(self):
+        with patch('track.backends.buffered.threading.Thread'):
+            event = {'test': 0, 'context': {'path': '/'}}
+            self.buffered_backend.send(event)
+        event['context']['path'] = '/changed'
+
+        self.buffered_backend.flush()
+        self.assertEqual(self.backend.batches, [[{'test': 0, 'context': {'path': '/'}}]])
@@ -47,6 +47,18 @@ class TestLoggerBackend(TestCase):
         self.assertEqual(saved_events[0], unpacked_event)
         self.assertEqual(saved_events[1], unpacked_event)
 
+    def test_logger_backend_batch(self):
+        self.handler.reset()
+
+        # Each event of a batch is logged as its own record.
+
+        events = [{'test': 1}, {'test': 2}]
+
+        self.backend.send_batch(events)
+
+        saved_events = [json.loads(e) for e in self.handler.messages['info']]
+        self.assertEqual(saved_events, events)
+
 
 class MockLoggingHandler(logging.Handler):
     """
@@ -1,6 +1,7 @@
 """
 Utility library containing operations used/shared by multiple courseware modules
 """
+from xmodule.split_test_module import get_split_user_partitions
 
 
 def yield_dynamic_descriptor_descendents(descriptor, module_creator):  # pylint: disable=invalid-name
@@ -29,3 +30,19 @@ def get_dynamic_descriptor_children(descriptor, module_creator, usage_key_filter
     else:
         module_children = descriptor.get_children(usage_key_filter)
     return module_children
+
+
+def restricted_group_access(descriptor):
+    """
+    Returns the group access rules restricting access to `descriptor`, or None
+    if there are none, like courseware.access._has_group_access checks them.
+    """
+    if len(descriptor.user_partitions) == len(get_split_user_partitions(descriptor.user_partitions)):
+        # split_test partitions are handled by the split_test modules
+        return None
+    group_access = {
+        partition_id: group_ids
+        for partition_id, group_ids in descriptor.merged_group_access.items()
+        if group_ids is not None
+    }
+    return group_access or None
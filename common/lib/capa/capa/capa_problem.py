@@ -13,11 +13,14 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from pytz import UTC
@@ -58,6 +61,80 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# Number of parsed problem trees kept by PROBLEM_TREE_CACHE
+PROBLEM_TREE_CACHE_SIZE = 1000
+
+
+class ProblemTreeCache(object):
+    """
+    A process-wide LRU cache of parsed problem trees, with their includes
+    processed and their IDs assigned: the preprocessing of a problem which
+    depends on neither the seed nor the student.
+
+    Each problem gets its own copy of the cached tree, which it may modify.
+    A size of 0 disables the cache.
+
+    The trees of problems with <include>s aren't cached, since the included
+    files can change (or be missing) independently of the problem's XML.
+    """
+    def __init__(self, size=PROBLEM_TREE_CACHE_SIZE):
+        self.size = size
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_cacheable(problem_text):
+        """
+        Returns whether the tree of the problem with the XML `problem_text` may be cached.
+        """
+        return '<include' not in problem_text
+
+    @staticmethod
+    def make_key(problem_text, problem_id):
+        """
+        Returns the key of the tree of the problem `problem_id` with the XML `problem_text`.
+        """
+        key = hashlib.sha1()
+        for part in (problem_id, problem_text):
+            part = part if isinstance(part, basestring) else str(part)
+            key.update(part.encode('utf-8') if isinstance(part, unicode) else part)
+            key.update('\0')
+        return key.hexdigest()
+
+    def get(self, key):
+        """
+        Returns a copy of the tree cached under `key`, or None.
+        """
+        with self._lock:
+            tree = self._trees.pop(key, None)
+            if tree is None:
+                return None
+            self._trees[key] = tree
+        return deepcopy(tree)
+
+    def set(self, key, tree):
+        """
+        Caches a copy of `tree` under `key`, evicting the least recently used trees.
+        """
+        if not self.size:
+            return
+        tree = deepcopy(tree)
+        with self._lock:
+            self._trees.pop(key, None)
+            self._trees[key] = tree
+            while len(self._trees) > self.size:
+                self._trees.popitem(last=False)
+
+    def clear(self):
+        """
+        Empties the cache.
+        """
+        with self._lock:
+            self._trees.clear()
+
+
+PROBLEM_TREE_CACHE = ProblemTreeCache()
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -159,16 +236,14 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # parse problem XML file into an element tree, handle any <include file="foo"> tags
+        # and assign IDs to the responses and their inputs (or get that tree from the cache)
+        self.tree = self._parse_problem(problem_text)
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
 
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
+        # Pre-parse the XML tree: modifies it to perform some in-place
         # transformations.  This also creates the dict (self.responders) of Response
         # instances for each question in the problem. The dict has keys = xml subtree of
         # Response, values = Response instance
@@ -529,6 +604,27 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _parse_problem(self, problem_text):
+        """
+        Returns the problem tree, with its includes processed and its IDs assigned.
+
+        That part of the preprocessing is the same for every student, so the tree is
+        cached by PROBLEM_TREE_CACHE, unless the problem has includes.
+        """
+        key = None
+        if PROBLEM_TREE_CACHE.is_cacheable(problem_text):
+            key = PROBLEM_TREE_CACHE.make_key(problem_text, self.problem_id)
+            tree = PROBLEM_TREE_CACHE.get(key)
+            if tree is not None:
+                return tree
+
+        self.tree = etree.XML(problem_text)
+        self._process_includes()
+        self._assign_ids(self.tree)
+        if key is not None:
+            PROBLEM_TREE_CACHE.set(key, self.tree)
+        return self.tree
+
     def _process_includes(self):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
@@ -777,19 +873,23 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree):  # private
+    def _response_inputfields(self, tree, response, response_id_str):
+        """
+        Returns the input and solution elements of `response`, whose ID is `response_id_str`.
+        """
+        input_tags = inputtypes.registry.registered_tags()
+        return tree.xpath(
+            "|".join(['//' + response.tag + '[@id=$id]//' + x for x in (input_tags + solution_tags)]),
+            id=response_id_str
+        )
+
+    def _assign_ids(self, tree):  # private
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
         In-place transformation
-
-        Also create capa Response instances for each responsetype and save as self.responders
-
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
         """
         response_id = 1
-        self.responders = {}
         for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
             response_id_str = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
@@ -797,11 +897,7 @@ class LoncapaProblem(object):
             response_id += 1
 
             answer_id = 1
-            input_tags = inputtypes.registry.registered_tags()
-            inputfields = tree.xpath(
-                "|".join(['//' + response.tag + '[@id=$id]//' + x for x in (input_tags + solution_tags)]),
-                id=response_id_str
-            )
+            inputfields = self._response_inputfields(tree, response, response_id_str)
 
             # assign one answer_id for each input type or solution type
             for entry in inputfields:
@@ -810,6 +906,20 @@ class LoncapaProblem(object):
                 entry.attrib['id'] = "%s_%i_%i" % (self.problem_id, response_id, answer_id)
                 answer_id = answer_id + 1
 
+    def _preprocess_problem(self, tree):  # private
+        """
+        Annoted correctness and value
+        In-place transformation
+
+        Create capa Response instances for each responsetype (whose IDs were assigned
+        by _assign_ids) and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        """
+        self.responders = {}
+        for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
+            inputfields = self._response_inputfields(tree, response, response.get('id'))
+
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
             responder = responsetype_cls(response, inputfields, self.context, self.capa_system)
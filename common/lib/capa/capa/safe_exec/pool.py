@@ -0,0 +1,264 @@
+"""
+A pool of persistent sandbox workers, to execute code without starting a new
+sandboxed Python (and importing the sandbox packages) for each execution.
+
+Each worker runs sandbox_worker.py with codejail's sandboxed Python, as the
+sandbox user, and forks a child with codejail's resource limits for each
+execution (see sandbox_worker.py). A worker is replaced after `max_executions`
+executions, as soon as it fails, and after any execution which raises or times
+out.
+
+A worker runs the code of many executions, which may come from different
+students, under the same sandbox user. Unlike codejail's fresh process per
+execution, code which manages to escape the forked child (e.g. by signalling
+or tracing its parent) may affect the later executions of its worker, until
+the worker is replaced.
+
+The pool is disabled (size 0) unless configured with `configure`. Executions
+which need files from the local filesystem (a `python_path` entry which isn't
+one of the `extra_files`) aren't sent to the pool.
+"""
+import base64
+import json
+import logging
+import os
+import os.path
+import select
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+
+log = logging.getLogger(__name__)
+
+# Modules the workers import once, see safe_exec.ASSUMED_IMPORTS
+PRELOADED_MODULES = ["numpy", "math", "scipy", "calc", "eia", "chem.chemcalc", "chem.chemtools", "chem.miller",
+                     "verifiers.draganddrop"]
+
+# Seconds a worker may take over the REALTIME limit to answer before it's killed
+GRACE_TIME = 5
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_worker.py')
+
+
+class SandboxWorkerError(Exception):
+    """
+    The worker failed (rather than the code it executed).
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    A sandboxed Python process running sandbox_worker.py.
+    """
+    def __init__(self, cmdline_start, user=None, limits=None):
+        self.limits = dict(limits or jail_code.LIMITS)
+        self.executions = 0
+        self.user = user
+        self.homedir = tempfile.mkdtemp(prefix='codejail-pool-')
+        try:
+            os.chmod(self.homedir, 0775)
+            tmpdir = os.path.join(self.homedir, 'tmp')
+            os.mkdir(tmpdir)
+            os.chmod(tmpdir, 0777)
+            script = os.path.join(self.homedir, 'sandbox_worker.py')
+            shutil.copy(WORKER_SCRIPT, script)
+            os.chmod(script, 0644)
+
+            cmd = []
+            if user:
+                cmd.extend(['sudo', '-u', user])
+            cmd.extend(cmdline_start)
+            cmd.extend([script, json.dumps(self.limits), ','.join(PRELOADED_MODULES)])
+            self.process = subprocess.Popen(
+                cmd, cwd=self.homedir, env={}, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                preexec_fn=os.setsid,
+            )
+        except Exception:
+            shutil.rmtree(self.homedir, ignore_errors=True)
+            raise
+
+    def execute(self, code, globals_dict, python_path=None, extra_files=None):
+        """
+        Executes `code` with the globals `globals_dict`, and returns the worker's
+        answer: {'globals': {...}} or {'error': ...}.
+
+        Raises SandboxWorkerError if the worker doesn't answer.
+        """
+        self.executions += 1
+        request = {
+            'code': code,
+            'globals': globals_dict,
+            'python_path': python_path or [],
+            'extra_files': [[name, base64.b64encode(contents)] for name, contents in extra_files or ()],
+        }
+        try:
+            self.process.stdin.write(json.dumps(request) + '\n')
+            self.process.stdin.flush()
+        except (IOError, OSError) as err:
+            raise SandboxWorkerError("Couldn't send the code to the sandbox worker: {}".format(err))
+
+        timeout = self.limits['REALTIME'] + GRACE_TIME if self.limits.get('REALTIME') else None
+        readable, __, __ = select.select([self.process.stdout], [], [], timeout)
+        if not readable:
+            raise SandboxWorkerError("The sandbox worker didn't answer in {} seconds".format(timeout))
+        line = self.process.stdout.readline()
+        try:
+            return json.loads(line)
+        except ValueError:
+            raise SandboxWorkerError("The sandbox worker answered {!r}".format(line[:200]))
+
+    def detach(self):
+        """
+        Closes this process's pipes to the worker, without stopping it, e.g.
+        in a process forked from the one which started the worker.
+        """
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except (IOError, OSError):
+                pass
+
+    def close(self):
+        """
+        Stops the worker, and removes its home directory.
+        """
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+            except (IOError, OSError):
+                pass
+            if self.user:
+                # the worker runs as the sandbox user, so it has to be killed as root, like codejail does
+                subprocess.call(['sudo', 'pkill', '-9', '-g', str(self.process.pid)])
+            else:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+        shutil.rmtree(self.homedir, ignore_errors=True)
+
+
+class SandboxPool(object):
+    """
+    Up to `size` SandboxWorkers, started on demand and reused by the executions.
+    """
+    def __init__(self, size, max_executions, cmdline_start=None, user=None, limits=None):
+        self.size = size
+        self.max_executions = max_executions
+        self.cmdline_start = cmdline_start
+        self.user = user
+        self.limits = limits
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._pid = os.getpid()
+
+    def _start_worker(self):
+        """
+        Starts a worker, with codejail's sandboxed Python unless the pool has its own command.
+        """
+        if self.cmdline_start is not None:
+            cmdline_start, user = self.cmdline_start, self.user
+        else:
+            python = jail_code.COMMANDS['python']
+            cmdline_start, user = python['cmdline_start'], python['user']
+        try:
+            return SandboxWorker(cmdline_start, user, self.limits)
+        except (IOError, OSError) as err:
+            raise SandboxWorkerError("Couldn't start a sandbox worker: {}".format(err))
+
+    def _acquire(self):
+        """
+        Returns an idle worker, starting one if there is none.
+
+        Raises SandboxWorkerError if the worker can't be started.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # The workers of the process this one was forked from aren't ours
+                # to use: only close the pipes to them this process inherited.
+                for worker in self._idle:
+                    worker.detach()
+                self._idle = []
+                self._pid = os.getpid()
+            if self._idle:
+                return self._idle.pop()
+        return self._start_worker()
+
+    def _release(self, worker):
+        """
+        Makes `worker` available to the next executions, or replaces it if it is worn out.
+        """
+        if worker.executions >= self.max_executions:
+            worker.close()
+            return
+        with self._lock:
+            self._idle.append(worker)
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Executes `code` in a worker, like codejail.safe_exec.safe_exec: the changes the
+        code makes to the JSON-serializable globals are visible in `globals_dict` when this
+        returns, and SafeExecException is raised if the code fails.
+
+        Raises SandboxWorkerError if the worker failed (and was replaced), or
+        couldn't be started.
+        """
+        with self._slots:
+            worker = self._acquire()
+            try:
+                result = worker.execute(code, json_safe(globals_dict), python_path, extra_files)
+            except SandboxWorkerError:
+                log.warning("Sandbox worker failed executing %s, replacing it", slug, exc_info=True)
+                worker.close()
+                raise
+            if 'error' in result:
+                # The code may have tampered with the worker before failing (or
+                # being killed), so the next executions don't reuse it.
+                worker.close()
+            else:
+                self._release(worker)
+
+        if 'error' in result:
+            raise SafeExecException("Couldn't execute jailed code: {}".format(result['error']))
+        globals_dict.update(result['globals'])
+
+    def close(self):
+        """
+        Stops the idle workers.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+
+_POOL = None
+
+
+def configure(size, max_executions=100):
+    """
+    Configures the pool: at most `size` workers (0 disables the pool), each replaced
+    after `max_executions` executions.
+    """
+    global _POOL  # pylint: disable=global-statement
+    if _POOL is not None:
+        _POOL.close()
+    _POOL = SandboxPool(size, max_executions) if size else None
+
+
+def get_pool(python_path=None, extra_files=None):
+    """
+    Returns the pool, if it is configured and can execute code with `python_path`
+    and `extra_files`, else None.
+    """
+    if _POOL is None or not jail_code.is_configured('python'):
+        return None
+    extra_names = set(name for name, __ in extra_files or ())
+    if any(name not in extra_names for name in python_path or ()):
+        return None
+    return _POOL
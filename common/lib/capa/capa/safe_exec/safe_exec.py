@@ -4,9 +4,13 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from . import pool
 from dogapi import dog_stats_api
 
+from collections import OrderedDict
 import hashlib
+import json
+import threading
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -70,6 +74,99 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def make_cache_key(code, globals_dict, random_seed):
+    """
+    Returns the key of the result of executing `code` with `globals_dict` and `random_seed`.
+
+    The globals are serialized once, with sorted keys, instead of being
+    converted with `json_safe` and hashed piece by piece with `update_hash`.
+    Globals which aren't all JSON-serializable are converted with `json_safe`
+    first, as the sandbox only sees the serializable ones.
+    """
+    try:
+        serialized_globals = json.dumps(globals_dict, sort_keys=True)
+    except (TypeError, ValueError):
+        serialized_globals = json.dumps(json_safe(globals_dict), sort_keys=True)
+    md5er = hashlib.md5()
+    md5er.update(code.encode('utf-8') if isinstance(code, unicode) else code)
+    md5er.update('\0')
+    md5er.update(serialized_globals)
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
+class LocalResultCache(object):
+    """
+    A process-wide LRU cache of execution results, checked before the `cache`
+    passed to `safe_exec`. A size of 0 disables it.
+
+    The results are stored serialized, so that each hit gets its own copy.
+    """
+    def __init__(self, size=0):
+        self.size = size
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the result cached under `key`, or None.
+        """
+        with self._lock:
+            result = self._results.pop(key, None)
+            if result is None:
+                return None
+            self._results[key] = result
+        return json.loads(result)
+
+    def set(self, key, result):
+        """
+        Caches `result` under `key`, evicting the least recently used results.
+        """
+        if not self.size:
+            return
+        result = json.dumps(result)
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = result
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        """
+        Empties the cache.
+        """
+        with self._lock:
+            self._results.clear()
+
+
+LOCAL_CACHE = LocalResultCache()
+
+
+def configure_local_cache(size):
+    """
+    Sets the number of results the process keeps in front of the shared cache (0 disables it).
+    """
+    LOCAL_CACHE.size = size
+    LOCAL_CACHE.clear()
+
+
+def get_cached_result(cache, key):
+    """
+    Returns the cached result under `key`, from the local cache or else from
+    `cache`, or None.
+    """
+    cached = LOCAL_CACHE.get(key)
+    if cached is not None:
+        dog_stats_api.increment('capa.safe_exec.cache', tags=['result:local_hit'])
+        return cached
+    cached = cache.get(key)
+    if cached is not None:
+        dog_stats_api.increment('capa.safe_exec.cache', tags=['result:hit'])
+        LOCAL_CACHE.set(key, cached)
+        return cached
+    dog_stats_api.increment('capa.safe_exec.cache', tags=['result:miss'])
+    return None
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -99,7 +196,7 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    and the random seed.  The results are also kept in `LOCAL_CACHE`, if it is enabled.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -109,12 +206,8 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
-        cached = cache.get(key)
+        key = make_cache_key(code, globals_dict, random_seed)
+        cached = get_cached_result(cache, key)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
@@ -128,17 +221,29 @@ def safe_exec(
     code_prolog = CODE_PROLOG % random_seed
 
     # Decide which code executor to use.
+    sandbox_pool = None
     if unsafely:
         exec_fn = codejail_not_safe_exec
     else:
         exec_fn = codejail_safe_exec
+        sandbox_pool = pool.get_pool(python_path, extra_files)
 
     # Run the code!  Results are side effects in globals_dict.
     try:
-        exec_fn(
-            code_prolog + LAZY_IMPORTS + code, globals_dict,
-            python_path=python_path, extra_files=extra_files, slug=slug,
-        )
+        if sandbox_pool is not None:
+            try:
+                sandbox_pool.safe_exec(
+                    code_prolog + LAZY_IMPORTS + code, globals_dict,
+                    python_path=python_path, extra_files=extra_files, slug=slug,
+                )
+            except pool.SandboxWorkerError:
+                # The worker has been replaced; run this code in its own sandbox instead.
+                sandbox_pool = None
+        if sandbox_pool is None:
+            exec_fn(
+                code_prolog + LAZY_IMPORTS + code, globals_dict,
+                python_path=python_path, extra_files=extra_files, slug=slug,
+            )
     except SafeExecException as e:
         emsg = e.message
     else:
@@ -149,6 +254,7 @@ def safe_exec(
     if cache:
         cleaned_results = json_safe(globals_dict)
         cache.set(key, (emsg, cleaned_results))
+        LOCAL_CACHE.set(key, (emsg, cleaned_results))
 
     # If an exception happened, raise it now.
     if emsg:
@@ -0,0 +1,184 @@
+"""
+A persistent worker for the sandbox pool (see pool.py), run by the sandboxed Python.
+
+This file is copied into the worker's home directory and run as the sandbox user,
+so it only uses the standard library.
+
+The worker imports the sandbox packages once, then reads requests from stdin, one
+JSON object per line:
+
+    {"code": ..., "globals": {...}, "python_path": [...], "extra_files": [[name, base64 contents], ...]}
+
+Each request is executed in a child forked from the worker, so that the imported
+packages are warm but nothing one execution does is seen by the next. The child
+runs with the configured resource limits, in a fresh directory holding the extra
+files, and sends back the JSON-serializable globals. The worker answers each
+request with one JSON line on stdout:
+
+    {"globals": {...}} or {"error": "..."}
+"""
+import base64
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+
+# Modules imported once by the worker, so that the executions don't import them again
+PRELOADED_MODULES = sys.argv[2].split(',') if len(sys.argv) > 2 and sys.argv[2] else []
+
+# Resource limits of each execution, like codejail.jail_code.LIMITS
+LIMITS = json.loads(sys.argv[1]) if len(sys.argv) > 1 else {}
+
+# Where the executions write their files; emptied after each execution
+TMP_DIR = os.path.join(os.getcwd(), 'tmp')
+
+OK_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+BAD_KEYS = ("__builtins__",)
+
+
+def jsonable(value):
+    """
+    Returns whether `value` can be sent back as JSON.
+    """
+    if not isinstance(value, OK_TYPES):
+        return False
+    try:
+        json.dumps(value)
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def set_limits():
+    """
+    Sets the resource limits of the execution: no subprocesses, and the configured
+    CPU time, memory and file size limits.
+    """
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    if LIMITS.get('CPU'):
+        resource.setrlimit(resource.RLIMIT_CPU, (LIMITS['CPU'], LIMITS['CPU']))
+    if LIMITS.get('VMEM'):
+        resource.setrlimit(resource.RLIMIT_AS, (LIMITS['VMEM'], LIMITS['VMEM']))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (LIMITS.get('FSIZE', 0), LIMITS.get('FSIZE', 0)))
+
+
+def execute(request, result_fd):
+    """
+    Executes `request` (in the forked child), and writes the result to `result_fd`.
+    """
+    pid = os.getpid()
+    try:
+        tmpdir = tempfile.mkdtemp(dir=TMP_DIR)
+        for name, contents in request.get('extra_files') or ():
+            with open(os.path.join(tmpdir, name), 'wb') as extra_file:
+                extra_file.write(base64.b64decode(contents))
+        os.chdir(tmpdir)
+        for pydir in request.get('python_path') or ():
+            sys.path.append(os.path.join(tmpdir, pydir))
+
+        # the code must not read the next requests, and what it prints isn't part of the protocol
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for std_fd in (0, 1, 2):
+            os.dup2(devnull, std_fd)
+
+        set_limits()
+
+        g_dict = request['globals']
+        exec request['code'] in g_dict  # pylint: disable=exec-used
+        result = {
+            'globals': dict((key, value) for key, value in g_dict.iteritems()
+                            if key not in BAD_KEYS and jsonable(value))
+        }
+    except BaseException:  # pylint: disable=broad-except
+        result = {'error': traceback.format_exc()}
+
+    if os.getpid() != pid:
+        # a process forked by the code (which the limits should prevent)
+        return
+
+    try:
+        data = json.dumps(result)
+    except Exception:  # pylint: disable=broad-except
+        data = json.dumps({'error': traceback.format_exc()})
+    while data:
+        written = os.write(result_fd, data)
+        data = data[written:]
+
+
+def run_request(request):
+    """
+    Runs `request` in a forked child, and returns its result.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            execute(request, write_fd)
+        finally:
+            os._exit(0)  # pylint: disable=protected-access
+
+    os.close(write_fd)
+    chunks = []
+    deadline = time.time() + LIMITS['REALTIME'] if LIMITS.get('REALTIME') else None
+    timed_out = False
+    while True:
+        timeout = None if deadline is None else max(deadline - time.time(), 0)
+        readable, __, __ = select.select([read_fd], [], [], timeout)
+        if not readable:
+            timed_out = True
+            os.kill(pid, signal.SIGKILL)
+            break
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    __, status = os.waitpid(pid, 0)
+
+    if timed_out:
+        return {'error': 'Execution timed out after {} seconds'.format(LIMITS['REALTIME'])}
+    if not chunks:
+        return {'error': 'Execution was killed (status {})'.format(status)}
+    try:
+        return json.loads(''.join(chunks))
+    except ValueError:
+        return {'error': 'Execution returned an invalid result'}
+
+
+def main():
+    """
+    Preloads the modules, then answers the requests until stdin is closed.
+    """
+    for name in PRELOADED_MODULES:
+        try:
+            __import__(name)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    if not os.path.isdir(TMP_DIR):
+        os.mkdir(TMP_DIR)
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        try:
+            result = run_request(json.loads(line))
+        except Exception:  # pylint: disable=broad-except
+            result = {'error': traceback.format_exc()}
+        # clean up what the execution left in the temporary directory
+        for name in os.listdir(TMP_DIR):
+            shutil.rmtree(os.path.join(TMP_DIR, name), ignore_errors=True)
+        sys.stdout.write(json.dumps(result) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
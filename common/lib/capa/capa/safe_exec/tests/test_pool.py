@@ -0,0 +1,147 @@
+"""Test the pool of sandbox workers."""
+
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from cStringIO import StringIO
+
+from codejail.safe_exec import SafeExecException
+from mock import patch
+
+from capa.safe_exec import pool, safe_exec
+
+
+class TestSandboxPool(unittest.TestCase):
+    """
+    Run the workers with the current (unsandboxed) Python.
+    """
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        self.pool = pool.SandboxPool(
+            1, 3, cmdline_start=[sys.executable], limits={'CPU': 1, 'REALTIME': 3, 'FSIZE': 0}
+        )
+        self.addCleanup(self.pool.close)
+
+    def test_set_values(self):
+        g = {'x': 2}
+        self.pool.safe_exec("y = x * 21", g)
+        self.assertEqual(g, {'x': 2, 'y': 42})
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_workers_reused_then_replaced(self):
+        self.pool.safe_exec("a = 1", {})
+        worker = self.pool._idle[0]  # pylint: disable=protected-access
+        self.pool.safe_exec("a = 1", {})
+        self.assertIs(self.pool._idle[0], worker)  # pylint: disable=protected-access
+
+        # The third execution wears the worker out
+        self.pool.safe_exec("a = 1", {})
+        self.assertEqual(self.pool._idle, [])  # pylint: disable=protected-access
+        self.assertIsNotNone(worker.process.poll())
+
+    def test_executions_are_isolated(self):
+        self.pool.safe_exec("import math\nmath.pi = 3", {})
+        g = {}
+        self.pool.safe_exec("import math\npi = math.pi", g)
+        self.assertEqual(g['pi'], 3.141592653589793)
+
+    def test_cpu_limit(self):
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec("while True: pass", {})
+        g = {}
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_worker_replaced_after_error(self):
+        self.pool.safe_exec("a = 1", {})
+        worker = self.pool._idle[0]  # pylint: disable=protected-access
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec("1/0", {})
+        self.assertEqual(self.pool._idle, [])  # pylint: disable=protected-access
+        self.assertIsNotNone(worker.process.poll())
+
+    def test_extra_files(self):
+        lib = StringIO()
+        with zipfile.ZipFile(lib, 'w') as lib_zip:
+            lib_zip.writestr('constant.py', 'THE_CONST = 23\n')
+        g = {}
+        self.pool.safe_exec(
+            "import constant\na = constant.THE_CONST", g,
+            python_path=['python_lib.zip'], extra_files=[('python_lib.zip', lib.getvalue())],
+        )
+        self.assertEqual(g['a'], 23)
+
+    def test_worker_failure(self):
+        self.pool.safe_exec("a = 1", {})
+        worker = self.pool._idle[0]  # pylint: disable=protected-access
+        worker.process.kill()
+        worker.process.wait()
+        with self.assertRaises(pool.SandboxWorkerError):
+            self.pool.safe_exec("a = 1", {})
+        self.assertEqual(self.pool._idle, [])  # pylint: disable=protected-access
+
+
+    def test_worker_start_failure(self):
+        failing_pool = pool.SandboxPool(1, 3, cmdline_start=['/nonexistent/python'])
+        homedirs = []
+        mkdtemp = tempfile.mkdtemp
+
+        def record_mkdtemp(**kwargs):
+            """Records the home directories of the workers."""
+            homedirs.append(mkdtemp(**kwargs))
+            return homedirs[-1]
+
+        with patch('tempfile.mkdtemp', side_effect=record_mkdtemp):
+            with self.assertRaises(pool.SandboxWorkerError):
+                failing_pool.safe_exec("a = 1", {})
+        # The home directory of the worker is removed
+        self.assertEqual(len(homedirs), 1)
+        self.assertFalse(os.path.exists(homedirs[0]))
+
+    def test_forked_process_detaches_workers(self):
+        self.pool.safe_exec("a = 1", {})
+        worker = self.pool._idle[0]  # pylint: disable=protected-access
+        with patch('os.getpid', return_value=-1):
+            self.pool.safe_exec("a = 1", {})
+        self.assertTrue(worker.process.stdin.closed)
+        self.assertTrue(worker.process.stdout.closed)
+        worker.close()
+
+
+class TestSafeExecWithPool(unittest.TestCase):
+    """
+    Test that safe_exec uses the pool when it can.
+    """
+    def setUp(self):
+        super(TestSafeExecWithPool, self).setUp()
+        self.pool = pool.SandboxPool(1, 10, cmdline_start=[sys.executable], limits={'CPU': 1, 'REALTIME': 3})
+        self.addCleanup(self.pool.close)
+
+    def test_uses_pool(self):
+        g = {}
+        with patch('capa.safe_exec.pool.get_pool', return_value=self.pool):
+            safe_exec("a = 1/2", g)
+        self.assertEqual(g['a'], 0.5)
+        self.assertEqual(self.pool._idle[0].executions, 1)  # pylint: disable=protected-access
+
+    def test_falls_back_when_worker_fails(self):
+        g = {}
+        with patch('capa.safe_exec.pool.get_pool', return_value=self.pool):
+            with patch.object(self.pool, 'safe_exec', side_effect=pool.SandboxWorkerError):
+                safe_exec("a = 17", g)
+        self.assertEqual(g['a'], 17)
+
+    def test_get_pool(self):
+        with patch('capa.safe_exec.pool._POOL', self.pool):
+            with patch('codejail.jail_code.is_configured', return_value=True):
+                self.assertIs(pool.get_pool(['python_lib.zip'], [('python_lib.zip', '')]), self.pool)
+                # Files from the local filesystem aren't sent to the workers
+                self.assertIsNone(pool.get_pool(['/data/course/code'], []))
+            with patch('codejail.jail_code.is_configured', return_value=False):
+                self.assertIsNone(pool.get_pool())
@@ -10,6 +10,7 @@ import unittest
 from nose.plugins.skip import SkipTest
 
 from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec.safe_exec import LOCAL_CACHE, LocalResultCache, configure_local_cache, make_cache_key
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -177,6 +178,91 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecLocalCaching(unittest.TestCase):
+    """Test the process-wide cache in front of the `cache` passed to safe_exec."""
+
+    def setUp(self):
+        super(TestSafeExecLocalCaching, self).setUp()
+        configure_local_cache(10)
+        self.addCleanup(configure_local_cache, 0)
+
+    def test_local_hit(self):
+        cache = {}
+        safe_exec("a = int(math.pi)", {}, cache=DictCache(cache))
+
+        # The local copy is used before the shared cache.
+        cache[cache.keys()[0]] = (None, {'a': 17})
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], 3)
+
+    def test_shared_hit_is_kept_locally(self):
+        cache = {}
+        safe_exec("a = int(math.pi)", {}, cache=DictCache(cache))
+        cache[cache.keys()[0]] = (None, {'a': 17})
+        LOCAL_CACHE.clear()
+
+        for __ in range(2):
+            g = {}
+            safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
+            self.assertEqual(g['a'], 17)
+        cache.clear()
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], 17)
+
+    def test_hits_are_copies(self):
+        cache = {}
+        g = {}
+        safe_exec("a = [1, 2]", g, cache=DictCache(cache))
+        g['a'].append(3)
+        g = {}
+        safe_exec("a = [1, 2]", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], [1, 2])
+
+    def test_lru_eviction(self):
+        local_cache = LocalResultCache(size=2)
+        local_cache.set('a', (None, {'a': 1}))
+        local_cache.set('b', (None, {'b': 2}))
+        self.assertEqual(local_cache.get('a'), [None, {'a': 1}])
+        local_cache.set('c', (None, {'c': 3}))
+        self.assertIsNotNone(local_cache.get('a'))
+        self.assertIsNone(local_cache.get('b'))
+        self.assertIsNotNone(local_cache.get('c'))
+
+    def test_disabled(self):
+        local_cache = LocalResultCache(size=0)
+        local_cache.set('a', (None, {}))
+        self.assertIsNone(local_cache.get('a'))
+
+
+class TestMakeCacheKey(unittest.TestCase):
+    """Test the keys of the cached results."""
+
+    def test_canonical(self):
+        d1 = {k: [1, k] for k in "abcdefghijklmnopqrstuvwxyz"}
+        d2 = dict(d1)
+        for i in xrange(10000):
+            d2[i] = 1
+        for i in xrange(10000):
+            del d2[i]
+        self.assertNotEqual(d1.keys(), d2.keys())
+        self.assertEqual(make_cache_key("a = 1", d1, 1), make_cache_key("a = 1", d2, 1))
+
+    def test_differences(self):
+        key = make_cache_key("a = 1", {'b': 1}, 1)
+        self.assertNotEqual(key, make_cache_key("a = 2", {'b': 1}, 1))
+        self.assertNotEqual(key, make_cache_key("a = 1", {'b': 2}, 1))
+        self.assertNotEqual(key, make_cache_key("a = 1", {'b': 1}, 2))
+
+    def test_unserializable_globals(self):
+        # Only the globals the sandbox sees are part of the key.
+        self.assertEqual(
+            make_cache_key("a = 1", {'b': 1, 'c': object()}, 1),
+            make_cache_key("a = 1", {'b': 1}, 1),
+        )
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
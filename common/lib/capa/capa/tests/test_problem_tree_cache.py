@@ -0,0 +1,89 @@
+"""
+Tests for the cache of parsed problem trees.
+"""
+import textwrap
+import unittest
+
+from lxml import etree
+from mock import patch
+
+from capa.capa_problem import LoncapaProblem, PROBLEM_TREE_CACHE, ProblemTreeCache
+from .response_xml_factory import StringResponseXMLFactory
+from . import new_loncapa_problem
+
+
+class ProblemTreeCacheTest(unittest.TestCase):
+    """
+    Tests of the caching of the parsed trees of LoncapaProblems.
+    """
+    def setUp(self):
+        super(ProblemTreeCacheTest, self).setUp()
+        PROBLEM_TREE_CACHE.clear()
+        self.addCleanup(PROBLEM_TREE_CACHE.clear)
+        self.xml = StringResponseXMLFactory().build_xml(answer="Michigan", hintfn="")
+
+    def test_parsed_once(self):
+        with patch.object(LoncapaProblem, '_process_includes', autospec=True) as process_includes:
+            first = new_loncapa_problem(self.xml)
+            second = new_loncapa_problem(self.xml)
+        self.assertEqual(process_includes.call_count, 1)
+
+        # Each problem has its own tree
+        self.assertIsNot(first.tree, second.tree)
+        self.assertEqual(etree.tostring(first.tree), etree.tostring(second.tree))
+        self.assertEqual(first.get_html(), second.get_html())
+
+    def test_key(self):
+        key = ProblemTreeCache.make_key(self.xml, '1')
+        self.assertEqual(key, ProblemTreeCache.make_key(self.xml, '1'))
+        self.assertNotEqual(key, ProblemTreeCache.make_key(self.xml, '2'))
+        self.assertNotEqual(key, ProblemTreeCache.make_key(self.xml + ' ', '1'))
+
+    def test_includes_not_cached(self):
+        # The included file may change, or be missing in DEBUG mode
+        xml = '<problem><include file="missing.xml"/></problem>'
+        self.assertIsNotNone(new_loncapa_problem(xml).tree.find('.//include'))
+
+        with patch.object(LoncapaProblem, '_process_includes', autospec=True) as process_includes:
+            new_loncapa_problem(xml)
+        self.assertEqual(process_includes.call_count, 1)
+
+    def test_seeds(self):
+        # The tree is shared across seeds, but the shuffling of the choices isn't
+        xml = textwrap.dedent("""
+            <problem>
+            <multiplechoiceresponse>
+              <choicegroup type="MultipleChoice" shuffle="true">
+                <choice correct="false">Apple</choice>
+                <choice correct="false">Banana</choice>
+                <choice correct="false">Chocolate</choice>
+                <choice correct ="true">Donut</choice>
+              </choicegroup>
+            </multiplechoiceresponse>
+            </problem>
+        """)
+        PROBLEM_TREE_CACHE.size = 0
+        try:
+            expected = [new_loncapa_problem(xml, seed=seed).get_html() for seed in range(5)]
+        finally:
+            PROBLEM_TREE_CACHE.size = ProblemTreeCache().size
+        self.assertEqual([new_loncapa_problem(xml, seed=seed).get_html() for seed in range(5)], expected)
+
+    def test_lru_eviction(self):
+        cache = ProblemTreeCache(size=2)
+        trees = [etree.XML('<problem id="{}"/>'.format(index)) for index in range(3)]
+        cache.set('a', trees[0])
+        cache.set('b', trees[1])
+
+        # Touch the first entry so the second one is the least recently used.
+        self.assertEqual(cache.get('a').get('id'), '0')
+        cache.set('c', trees[2])
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_disabled(self):
+        cache = ProblemTreeCache(size=0)
+        cache.set('a', etree.XML('<problem/>'))
+        self.assertIsNone(cache.get('a'))
@@ -83,10 +83,12 @@ class SignalHandler(object):
     """
     course_published = django.dispatch.Signal(providing_args=["course_key"])
     library_updated = django.dispatch.Signal(providing_args=["library_key"])
+    course_deleted = django.dispatch.Signal(providing_args=["course_key"])
 
     _mapping = {
         "course_published": course_published,
-        "library_updated": library_updated
+        "library_updated": library_updated,
+        "course_deleted": course_deleted,
     }
 
     def __init__(self, modulestore_class):
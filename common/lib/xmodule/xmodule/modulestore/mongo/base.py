@@ -17,12 +17,14 @@ import sys
 import logging
 import copy
 import re
+import time
 from uuid import uuid4
 
 from bson.son import SON
 from datetime import datetime
 from fs.osfs import OSFS
 from mongodb_proxy import MongoProxy, autoretry_read
+from xmodule.mongo_instrumentation import instrument
 from path import path
 from pytz import UTC
 from contracts import contract, new_contract
@@ -520,6 +522,100 @@ class ParentLocationCache(dict):
             del self[key]
 
 
+class MetadataInheritanceTreeCache(object):
+    """
+    Stores the metadata inheritance trees of courses in a cache subsystem
+    (e.g. memcached), tagged with a version so that workers updating the tree
+    of a course at the same time don't overwrite each other's changes.
+
+    Every change to a course bumps its version, and a cached tree is only
+    returned if it was stored for the current version: a tree computed from
+    data that another worker changed in the meantime is simply ignored, and
+    recomputed by the next reader. Cache subsystems without atomic `add` and
+    `incr` store the trees unversioned.
+    """
+    def __init__(self, cache):
+        self.cache = cache
+        self.versioned = all(hasattr(cache, method) for method in ('add', 'incr', 'get_many'))
+
+    @staticmethod
+    def _tree_key(course_id):
+        """
+        Returns the cache key of the unversioned tree of `course_id`.
+        """
+        return unicode(course_id)
+
+    @staticmethod
+    def _versioned_tree_key(course_id):
+        """
+        Returns the cache key of the versioned tree of `course_id`. It differs
+        from the key of the unversioned tree, so that processes which still
+        cache the tree itself under that key never read a versioned entry.
+        """
+        return u'{}.inheritance_tree.v2'.format(course_id)
+
+    @staticmethod
+    def _version_key(course_id):
+        """
+        Returns the cache key of the version of `course_id`.
+        """
+        return u'{}.inheritance_version'.format(course_id)
+
+    @staticmethod
+    def _initial_version():
+        """
+        Returns the version to start from when the version of a course isn't
+        cached (or was evicted). Starting from the current time makes sure
+        that trees stored before an eviction don't become valid again.
+        """
+        return int(time.time() * 1000)
+
+    def get(self, course_id):
+        """
+        Returns `(version, tree)`, where `tree` is None if there is no tree
+        cached for the current `version` of the course.
+        """
+        if not self.versioned:
+            return None, self.cache.get(self._tree_key(course_id)) or None
+
+        tree_key, version_key = self._versioned_tree_key(course_id), self._version_key(course_id)
+        cached = self.cache.get_many([tree_key, version_key])
+        version = cached.get(version_key)
+        if version is None:
+            self.cache.add(version_key, self._initial_version())
+            return self.cache.get(version_key), None
+
+        entry = cached.get(tree_key)
+        if not isinstance(entry, dict) or entry.get('version') != version or 'tree' not in entry:
+            return version, None
+        return version, entry['tree']
+
+    def set(self, course_id, version, tree):
+        """
+        Caches `tree` as the tree of `course_id` at `version`.
+        """
+        if not self.versioned:
+            self.cache.set(self._tree_key(course_id), tree)
+        elif version is not None:
+            self.cache.set(self._versioned_tree_key(course_id), {'version': version, 'tree': tree})
+
+    def bump(self, course_id):
+        """
+        Invalidates the cached tree of `course_id`, and returns the new
+        version of the course.
+        """
+        if not self.versioned:
+            return None
+
+        version_key = self._version_key(course_id)
+        try:
+            return self.cache.incr(version_key)
+        except ValueError:
+            # The version isn't cached: start over
+            self.cache.add(version_key, self._initial_version())
+            return self.cache.get(version_key)
+
+
 class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, MongoBulkOpsMixin):
     """
     A Mongodb backed ModuleStore
@@ -539,9 +635,12 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                  user_service=None,
                  signal_handler=None,
                  retry_wait_time=0.1,
+                 incremental_inheritance_updates=False,
                  **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param incremental_inheritance_updates: if True, updating an item only recomputes the part of the
+            cached metadata inheritance tree below it, instead of rescanning the whole course.
         """
 
         super(MongoModuleStore, self).__init__(contentstore=contentstore, **kwargs)
@@ -568,12 +667,12 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 ),
                 wait_time=retry_wait_time
             )
-            self.collection = self.database[collection]
+            self.collection = instrument(self.database[collection], 'mongo')
 
             # Collection which stores asset metadata.
             if asset_collection is None:
                 asset_collection = self.DEFAULT_ASSET_COLLECTION_NAME
-            self.asset_collection = self.database[asset_collection]
+            self.asset_collection = instrument(self.database[asset_collection], 'mongo')
 
             if user is not None and password is not None:
                 self.database.authenticate(user, password)
@@ -598,6 +697,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         self._course_run_cache = {}
         self.signal_handler = signal_handler
+        self.incremental_inheritance_updates = incremental_inheritance_updates
 
     def close_connections(self):
         """
@@ -670,12 +770,11 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         else:
             return ParentLocationCache()
 
-    def _compute_metadata_inheritance_tree(self, course_id):
-        '''
-        Find all inheritable fields from all xblocks in the course which may define inheritable data
-        '''
-        # get all collections in the course, this query should not return any leaf nodes
-        course_id = self.fill_in_run(course_id)
+    def _inheritance_containers_query(self, course_id):
+        """
+        Returns the query for the xblocks of the course which may define
+        inheritable data, i.e. the ones with children.
+        """
         query = SON([
             ('_id.tag', 'i4x'),
             ('_id.org', course_id.org),
@@ -685,6 +784,13 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         # if we're only dealing in the published branch, then only get published containers
         if self.get_branch_setting() == ModuleStoreEnum.Branch.published_only:
             query['_id.revision'] = None
+        return query
+
+    def _find_inheritance_containers(self, course_id, query):
+        """
+        Runs `query` for xblocks with children, and returns a dict mapping their
+        location urls to their ids, children and inheritable metadata.
+        """
         # we just want the Location, children, and inheritable metadata
         record_filter = {'_id': 1, 'definition.children': 1}
 
@@ -699,7 +805,6 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         # it's ok to keep these as deprecated strings b/c the overall cache is indexed by course_key and this
         # is a dictionary relative to that course
         results_by_url = {}
-        root = None
 
         # now go through the results and order them by the location url
         for result in resultset:
@@ -718,80 +823,194 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 results_by_url[location_url].setdefault('definition', {})['children'] = set(total_children)
             else:
                 results_by_url[location_url] = result
-            if location.category == 'course':
-                root = location_url
+        return results_by_url
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
+    def _inherit_metadata_down(self, results_by_url, url, metadata_to_inherit):
+        """
+        Computes the metadata inherited by the descendants of the container at
+        `url` in `results_by_url` into `metadata_to_inherit`. The metadata of
+        `results_by_url[url]` must already include what it inherits itself.
+        """
+        my_metadata = results_by_url[url].get('metadata', {})
 
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
-                # WARNING: 'parent' is not part of inherited metadata, but
-                # we're piggybacking on this recursive traversal to grab
-                # and cache the child's parent, as a performance optimization.
-                # The 'parent' key will be popped out of the dictionary during
-                # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+        # go through all the children and recurse, but only if we have
+        # in the result set. Remember results will not contain leaf nodes
+        for child in results_by_url[url].get('definition', {}).get('children', []):
+            if child in results_by_url:
+                new_child_metadata = copy.deepcopy(my_metadata)
+                new_child_metadata.update(results_by_url[child].get('metadata', {}))
+                results_by_url[child]['metadata'] = new_child_metadata
+                metadata_to_inherit[child] = new_child_metadata
+                self._inherit_metadata_down(results_by_url, child, metadata_to_inherit)
+            else:
+                # this is likely a leaf node, so let's record what metadata we need to inherit
+                metadata_to_inherit[child] = my_metadata.copy()
+            # WARNING: 'parent' is not part of inherited metadata, but
+            # we're piggybacking on this recursive traversal to grab
+            # and cache the child's parent, as a performance optimization.
+            # The 'parent' key will be popped out of the dictionary during
+            # CachingDescriptorSystem.load_item
+            metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
 
+    def _compute_metadata_inheritance_tree(self, course_id):
+        '''
+        Find all inheritable fields from all xblocks in the course which may define inheritable data
+        '''
+        # get all collections in the course, this query should not return any leaf nodes
+        course_id = self.fill_in_run(course_id)
+        results_by_url = self._find_inheritance_containers(course_id, self._inheritance_containers_query(course_id))
+
+        # now traverse the tree and compute down the inherited metadata
+        metadata_to_inherit = {}
+        root = next((url for url in results_by_url if url.split('/')[-2] == 'course'), None)
         if root is not None:
-            _compute_inherited_metadata(root)
+            self._inherit_metadata_down(results_by_url, root, metadata_to_inherit)
 
         return metadata_to_inherit
 
+    def _compute_metadata_inheritance_subtree(self, course_id, location, tree):
+        """
+        Returns a copy of the metadata inheritance `tree` of the course in which
+        the entries for the descendants of the container at `location` are
+        recomputed, or None if that can't be done without computing the whole
+        tree.
+
+        Only the containers below `location` are read, a level at a time.
+        """
+        branch = self.get_branch_setting()
+        url = unicode(as_published(location))
+
+        if location.category == 'course':
+            parent_metadata = {}
+        elif url not in tree:
+            # The container isn't part of the course yet: the tree will be
+            # updated when it is added to its parent.
+            return tree
+        else:
+            parents = tree[url].get('parent', {})
+            parent_url = parents.get(branch, next(iter(parents.values()), None))
+            if parent_url is None:
+                return None
+            if parent_url in tree:
+                parent_metadata = {key: value for key, value in tree[parent_url].iteritems() if key != 'parent'}
+            else:
+                # The only container without an entry in the tree is the course.
+                parent = self._find_containers_by_url(course_id, [parent_url]).get(parent_url)
+                if parent is None:
+                    return None
+                parent_metadata = parent.get('metadata', {})
+
+        # Load the containers of the subtree, a level at a time.
+        results_by_url = {}
+        urls = [url]
+        while urls:
+            results_by_url.update(self._find_containers_by_url(course_id, urls))
+            urls = set(
+                child
+                for container_url in urls if container_url in results_by_url
+                for child in results_by_url[container_url].get('definition', {}).get('children', [])
+                if child not in results_by_url and child.split('/')[-2] in BLOCK_TYPES_WITH_CHILDREN
+            )
+        if url not in results_by_url:
+            return None
+
+        container_metadata = copy.deepcopy(parent_metadata)
+        container_metadata.update(results_by_url[url].get('metadata', {}))
+        results_by_url[url]['metadata'] = container_metadata
+
+        subtree = {}
+        self._inherit_metadata_down(results_by_url, url, subtree)
+
+        # Drop the entries of the xblocks that are no longer part of the subtree.
+        new_tree = dict(tree)
+        removed_parents = set(results_by_url)
+        while removed_parents:
+            removed = [
+                child for child, metadata in new_tree.iteritems()
+                if child not in subtree and set(metadata.get('parent', {}).values()) & removed_parents
+            ]
+            for child in removed:
+                del new_tree[child]
+            removed_parents = set(removed)
+
+        new_tree.update(subtree)
+        if location.category != 'course':
+            container_entry = container_metadata.copy()
+            container_entry['parent'] = tree[url]['parent']
+            new_tree[url] = container_entry
+        return new_tree
+
+    def _find_containers_by_url(self, course_id, urls):
+        """
+        Returns a dict mapping those of the location `urls` of xblocks with
+        children which exist to their ids, children and inheritable metadata.
+        """
+        urls = set(urls)
+        query = self._inheritance_containers_query(course_id)
+        query['_id.name'] = {'$in': list(set(url.split('/')[-1] for url in urls))}
+        return {
+            url: result
+            for url, result in self._find_inheritance_containers(course_id, query).iteritems()
+            if url in urls
+        }
+
+    def _get_metadata_inheritance_tree_cache(self):
+        """
+        Returns the MetadataInheritanceTreeCache of the caching subsystem, if any.
+        """
+        if self.metadata_inheritance_cache_subsystem is None:
+            return None
+        return MetadataInheritanceTreeCache(self.metadata_inheritance_cache_subsystem)
+
+    def _set_request_cached_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Puts `tree` in the request cache, if available.
+        """
+        if self.request_cache is not None:
+            # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
+            # defined
+            if 'metadata_inheritance' not in self.request_cache.data:
+                self.request_cache.data['metadata_inheritance'] = {}
+            self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
+
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         Compute the metadata inheritance for the course.
         '''
         tree = {}
+        version = None
 
         course_id = self.fill_in_run(course_id)
+        tree_cache = self._get_metadata_inheritance_tree_cache()
         if not force_refresh:
             # see if we are first in the request cache (if present)
             if self.request_cache is not None and unicode(course_id) in self.request_cache.data.get('metadata_inheritance', {}):
                 return self.request_cache.data['metadata_inheritance'][unicode(course_id)]
 
             # then look in any caching subsystem (e.g. memcached)
-            if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+            if tree_cache is not None:
+                version, tree = tree_cache.get(course_id)
             else:
                 logging.warning(
                     'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
                     OK in localdev and testing environment. Not OK in production.'
                 )
+        elif tree_cache is not None:
+            # the course has changed, so invalidate what other workers may have cached
+            version = tree_cache.bump(course_id)
 
         if not tree:
             # if not in subsystem, or we are on force refresh, then we have to compute
             tree = self._compute_metadata_inheritance_tree(course_id)
 
             # now write out computed tree to caching subsystem (e.g. memcached), if available
-            if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+            if tree_cache is not None:
+                tree_cache.set(course_id, version, tree)
 
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
         # put into the request_cache
-        if self.request_cache is not None:
-            # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
-            # defined
-            if 'metadata_inheritance' not in self.request_cache.data:
-                self.request_cache.data['metadata_inheritance'] = {}
-            self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
+        self._set_request_cached_metadata_inheritance_tree(course_id, tree)
 
         return tree
 
@@ -810,6 +1029,43 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
+    def update_cached_metadata_inheritance_subtree(self, location, runtime=None):
+        """
+        Update the cached metadata inheritance tree after the xblock at
+        `location` was updated, recomputing only the entries of its
+        descendants. Falls back to refreshing the whole tree if there is no
+        tree cached for the course, or if another worker changed the course
+        at the same time.
+
+        If given a runtime, it replaces the cached_metadata in that runtime.
+        """
+        course_id = self.fill_in_run(location.course_key.for_branch(None))
+        if self._is_in_bulk_operation(course_id):
+            # the whole tree is refreshed at the end of the bulk operation
+            return
+        if location.category not in BLOCK_TYPES_WITH_CHILDREN:
+            # the metadata of xblocks without children isn't inherited by anything
+            return
+
+        tree_cache = self._get_metadata_inheritance_tree_cache()
+        tree = None
+        if tree_cache is not None:
+            version, tree = tree_cache.get(course_id)
+        if tree:
+            tree = self._compute_metadata_inheritance_subtree(course_id, location, tree)
+        if not tree:
+            return self.refresh_cached_metadata_inheritance_tree(course_id, runtime)
+
+        new_version = tree_cache.bump(course_id)
+        if version is not None and new_version != version + 1:
+            # another worker changed the course since we read the tree
+            return self.refresh_cached_metadata_inheritance_tree(course_id, runtime)
+        tree_cache.set(course_id, new_version, tree)
+
+        self._set_request_cached_metadata_inheritance_tree(course_id, tree)
+        if runtime:
+            runtime.cached_metadata = tree
+
     def _clean_item_data(self, item):
         """
         Renames the '_id' field in item to 'location'
@@ -1454,7 +1710,10 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            if self.incremental_inheritance_updates:
+                self.update_cached_metadata_inheritance_subtree(xblock.scope_ids.usage_id, xblock.runtime)
+            else:
+                self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
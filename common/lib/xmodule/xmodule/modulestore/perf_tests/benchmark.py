@@ -0,0 +1,297 @@
+"""
+Benchmarks of the hot paths of the Mongo and split modulestores, run against a
+local mongod.
+
+Each benchmark is timed over several repetitions on a freshly imported course, and
+the results (timings in ms and the number of Mongo operations made) are written as
+JSON, so that two runs (e.g. before and after a change) can be compared:
+
+    python -m xmodule.modulestore.perf_tests.benchmark run --output after.json
+    python -m xmodule.modulestore.perf_tests.benchmark compare before.json after.json
+
+`compare` exits with a non-zero status if any benchmark regressed by more than the
+given threshold.
+"""
+import datetime
+import json
+import sys
+import time
+from uuid import uuid4
+
+from path import path
+from xblock.fields import Scope
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import (
+    DRAFT_MODULESTORE_SETUP,
+    SPLIT_MODULESTORE_SETUP,
+    TEST_DATA_DIR,
+)
+from xmodule.modulestore.xml_importer import import_course_from_xml
+from xmodule.mongo_instrumentation import QueryRecorder
+
+try:
+    import click
+except ImportError:
+    click = None
+
+
+# pylint: disable=invalid-name
+PLATFORM_ROOT = path(__file__).dirname().parent.parent.parent.parent.parent.parent
+TEST_DATA_ROOT = PLATFORM_ROOT / TEST_DATA_DIR
+
+DEFAULT_COURSE = 'manual-testing-complete'
+DEFAULT_REPEAT = 5
+
+# Fraction by which the median time of a benchmark may grow before `compare` reports it
+DEFAULT_THRESHOLD = 0.2
+
+STORE_SETUPS = {
+    'mongo': DRAFT_MODULESTORE_SETUP,
+    'split': SPLIT_MODULESTORE_SETUP,
+}
+
+USER_ID = ModuleStoreEnum.UserID.test
+
+
+def import_course(store, contentstore, course_name, course_key):
+    """
+    Imports the test course `course_name` into `store` as `course_key`.
+    """
+    import_course_from_xml(
+        store,
+        USER_ID,
+        TEST_DATA_ROOT,
+        source_dirs=[course_name],
+        static_content_store=contentstore,
+        target_id=course_key,
+        create_if_not_present=True,
+        raise_on_failure=True,
+    )
+
+
+def new_course_key(store):
+    """
+    Returns a key for a course which doesn't exist yet.
+    """
+    return store.make_course_key('perf', 'course', uuid4().hex[:8])
+
+
+class BenchmarkContext(object):
+    """
+    What the benchmarks run on: the stores and an imported course.
+    """
+    def __init__(self, store, contentstore, course_name, course_key):
+        self.store = store
+        self.contentstore = contentstore
+        self.course_name = course_name
+        self.course_key = course_key
+
+    def first_item(self, category):
+        """
+        Returns the location of the first xblock of type `category` in the course.
+        """
+        items = self.store.get_items(self.course_key, qualifiers={'category': category})
+        if not items:
+            raise ValueError("Course {} has no {}".format(self.course_key, category))
+        return items[0].location
+
+
+def load_course(depth):
+    """
+    Loads the course, prefetching its descendants down to `depth`.
+    """
+    def benchmark(context):  # pylint: disable=missing-docstring
+        context.store.get_course(context.course_key, depth=depth)
+    return benchmark
+
+
+def get_items(qualifiers, settings=None):
+    """
+    Queries the xblocks of the course matching `qualifiers` and `settings`.
+    """
+    def benchmark(context):  # pylint: disable=missing-docstring
+        context.store.get_items(context.course_key, qualifiers=qualifiers, settings=settings)
+    return benchmark
+
+
+def publish(context):
+    """
+    Edits then publishes a vertical.
+    """
+    with context.store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, context.course_key):
+        vertical = context.store.get_item(context.first_item('vertical'))
+        vertical.display_name = uuid4().hex
+        context.store.update_item(vertical, USER_ID)
+        context.store.publish(vertical.location, USER_ID)
+
+
+def clone_course(context):
+    """
+    Clones the course.
+    """
+    context.store.clone_course(context.course_key, new_course_key(context.store), USER_ID)
+
+
+def import_xml(context):
+    """
+    Imports the course from XML into a new course.
+    """
+    import_course(context.store, context.contentstore, context.course_name, new_course_key(context.store))
+
+
+def render_sequential(context):
+    """
+    Reads what rendering a sequential would: the sequential and all its
+    descendants, with their content and settings fields.
+    """
+    def read_fields(block):
+        """
+        Reads the fields of `block` and its descendants.
+        """
+        block.get_explicitly_set_fields_by_scope(Scope.content)
+        block.get_explicitly_set_fields_by_scope(Scope.settings)
+        for child in block.get_children():
+            read_fields(child)
+
+    read_fields(context.store.get_item(context.first_item('sequential'), depth=None))
+
+
+# (name, benchmark) pairs, in the order they are run
+BENCHMARKS = (
+    ('load_course_depth_0', load_course(0)),
+    ('load_course_depth_1', load_course(1)),
+    ('load_course_depth_all', load_course(None)),
+    ('get_items_problems', get_items({'category': 'problem'})),
+    ('get_items_graded_sequentials', get_items({'category': 'sequential'}, settings={'graded': True})),
+    ('render_sequential', render_sequential),
+    ('publish', publish),
+    ('clone_course', clone_course),
+    ('import_course_from_xml', import_xml),
+)
+
+
+def median(values):
+    """
+    Returns the median of the non-empty list `values`.
+    """
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def time_benchmark(benchmark, context, repeat):
+    """
+    Runs `benchmark` `repeat` times, and returns its timings (in ms) and the number
+    of Mongo operations it made on its first run.
+    """
+    times = []
+    queries = None
+    for _ in range(repeat):
+        with QueryRecorder() as recorder:
+            start = time.time()
+            benchmark(context)
+            times.append((time.time() - start) * 1000)
+        if queries is None:
+            queries = recorder.total_count
+    return {
+        'times_ms': times,
+        'min_ms': min(times),
+        'median_ms': median(times),
+        'max_ms': max(times),
+        'queries': queries,
+    }
+
+
+def run_benchmarks(store_names, course_name=DEFAULT_COURSE, repeat=DEFAULT_REPEAT, only=None):
+    """
+    Runs the benchmarks (or those named in `only`) against each store, and returns
+    the results as a JSON-serializable dict.
+    """
+    results = {}
+    for store_name in store_names:
+        with STORE_SETUPS[store_name].build() as (contentstore, store):
+            course_key = new_course_key(store)
+            import_course(store, contentstore, course_name, course_key)
+            context = BenchmarkContext(store, contentstore, course_name, course_key)
+            results[store_name] = {
+                name: time_benchmark(benchmark, context, repeat)
+                for name, benchmark in BENCHMARKS
+                if only is None or name in only
+            }
+    return {
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'course': course_name,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares two results of `run_benchmarks`.
+
+    Returns a list of `(store, benchmark, baseline_median_ms, current_median_ms,
+    ratio, regressed)` for the benchmarks present in both, where `regressed` is
+    True if the median time grew by more than `threshold`, or if more Mongo
+    operations are made.
+    """
+    comparison = []
+    for store_name, benchmarks in sorted(current['results'].iteritems()):
+        baseline_benchmarks = baseline['results'].get(store_name, {})
+        for name, result in sorted(benchmarks.iteritems()):
+            if name not in baseline_benchmarks:
+                continue
+            before = baseline_benchmarks[name]
+            ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else 1.0
+            regressed = ratio > 1 + threshold or result['queries'] > before['queries']
+            comparison.append((store_name, name, before['median_ms'], result['median_ms'], ratio, regressed))
+    return comparison
+
+
+if click is not None:
+    @click.group()
+    def cli():
+        """
+        Modulestore benchmarks.
+        """
+        pass
+
+    @cli.command()
+    @click.option('--output', type=click.File('w'), default='-', help='File to write the JSON results to.')
+    @click.option('--store', 'stores', multiple=True, type=click.Choice(sorted(STORE_SETUPS)),
+                  help='Store to benchmark (default: all).')
+    @click.option('--course', default=DEFAULT_COURSE, help='Name of the test course to import.')
+    @click.option('--repeat', default=DEFAULT_REPEAT, help='Number of times each benchmark is run.')
+    @click.option('--benchmark', 'only', multiple=True, type=click.Choice([name for name, __ in BENCHMARKS]),
+                  help='Benchmark to run (default: all).')
+    def run(output, stores, course, repeat, only):
+        """
+        Run the benchmarks and write the results as JSON.
+        """
+        results = run_benchmarks(stores or sorted(STORE_SETUPS), course, repeat, only or None)
+        json.dump(results, output, indent=2, sort_keys=True)
+
+    @cli.command()
+    @click.argument('baseline', type=click.File('r'))
+    @click.argument('current', type=click.File('r'))
+    @click.option('--threshold', default=DEFAULT_THRESHOLD, help='Allowed relative growth of the median time.')
+    def compare(baseline, current, threshold):
+        """
+        Compare two benchmark results, failing if any benchmark regressed.
+        """
+        comparison = compare_results(json.load(baseline), json.load(current), threshold)
+        for store_name, name, before, after, ratio, regressed in comparison:
+            click.echo("{:<6} {:<28} {:>10.1f}ms -> {:>10.1f}ms  x{:.2f}{}".format(
+                store_name, name, before, after, ratio, '  REGRESSION' if regressed else ''
+            ))
+        if any(regressed for __, __, __, __, __, regressed in comparison):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    if click is not None:
+        cli()
+    else:
+        print "Aborted! Module 'click' is not installed."
@@ -0,0 +1,38 @@
+"""
+Tests for the comparison of modulestore benchmark results.
+"""
+import unittest
+
+from xmodule.modulestore.perf_tests.benchmark import compare_results, median
+
+
+def make_results(median_ms, queries):
+    """
+    Returns benchmark results with a single benchmark.
+    """
+    return {'results': {'split': {'publish': {'median_ms': median_ms, 'queries': queries}}}}
+
+
+class TestCompareResults(unittest.TestCase):
+    """
+    Tests for compare_results.
+    """
+    def test_median(self):
+        self.assertEqual(median([3, 1, 2]), 2)
+        self.assertEqual(median([4, 1, 2, 3]), 2.5)
+
+    def test_within_threshold(self):
+        comparison = compare_results(make_results(100, 5), make_results(110, 5), threshold=0.2)
+        self.assertEqual(comparison, [('split', 'publish', 100, 110, 1.1, False)])
+
+    def test_slower(self):
+        (comparison,) = compare_results(make_results(100, 5), make_results(130, 5), threshold=0.2)
+        self.assertTrue(comparison[-1])
+
+    def test_more_queries(self):
+        (comparison,) = compare_results(make_results(100, 5), make_results(100, 6))
+        self.assertTrue(comparison[-1])
+
+    def test_new_benchmark(self):
+        baseline = {'results': {}}
+        self.assertEqual(compare_results(baseline, make_results(100, 5)), [])
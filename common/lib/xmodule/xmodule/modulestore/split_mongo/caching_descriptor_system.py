@@ -76,6 +76,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.module_data = module_data
         self.default_class = default_class
         self.local_modules = {}
+        self._prefetched_definitions = {}
         self._services['library_tools'] = LibraryToolsService(modulestore)
 
     @lazy
@@ -128,6 +129,32 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.modulestore.cache_block(course_key, version_guid, block_key, block)
         return block
 
+    @contract(block_key=BlockKey, course_key="CourseLocator | LibraryLocator")
+    def prefetch_definition(self, block_key, course_key, definition_id):
+        """
+        Return the definition `definition_id` of `block_key`, loading the definitions of all the
+        not yet loaded siblings of `block_key` in the same query: rendering a container
+        typically needs the content of all its children.
+
+        Returns None if the definition doesn't exist.
+        """
+        if definition_id not in self._prefetched_definitions:
+            blocks = self.course_entry.structure['blocks']
+            parent_key = self._parent_map.get(block_key)
+            siblings = blocks[parent_key].fields.get('children', []) if parent_key in blocks else []
+            definition_ids = set(
+                blocks[sibling].definition
+                for sibling in siblings
+                if sibling in blocks and not blocks[sibling].definition_loaded
+            )
+            definition_ids.difference_update(self._prefetched_definitions)
+            definition_ids.add(definition_id)
+            for definition in self.modulestore.get_definitions(course_key, definition_ids):
+                self._prefetched_definitions[definition['_id']] = definition
+
+        # the loaders replace themselves with the definition, so it's only needed once
+        return self._prefetched_definitions.pop(definition_id, None)
+
     @contract(block_key=BlockKey, course_key="CourseLocator | LibraryLocator")
     def get_module_data(self, block_key, course_key):
         """
@@ -179,12 +206,17 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         )
 
         if definition_id is not None and not block_data.definition_loaded:
+            if self.modulestore.prefetch_sibling_definitions and not isinstance(block_key.id, LocalId):
+                prefetcher = lambda def_id: self.prefetch_definition(block_key, course_key, def_id)
+            else:
+                prefetcher = None
             definition_loader = DefinitionLazyLoader(
                 self.modulestore,
                 course_key,
                 block_key.type,
                 definition_id,
                 convert_fields,
+                prefetcher=prefetcher,
             )
         else:
             definition_loader = None
@@ -2,6 +2,10 @@
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
 import re
+import threading
+import zlib
+import cPickle as pickle
+from collections import OrderedDict
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
 
@@ -10,6 +14,7 @@ from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 from contracts import check, new_contract
 from xmodule.exceptions import HeartbeatFailure
+from xmodule.mongo_instrumentation import instrument
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.split_mongo import BlockKey
 import datetime
@@ -18,6 +23,14 @@ import pytz
 
 new_contract('BlockData', BlockData)
 
+try:
+    from django.conf import settings
+    from django.core.cache import get_cache, InvalidCacheBackendError
+    from django.core.exceptions import ImproperlyConfigured
+    HAS_DJANGO_CACHE = True
+except ImportError:
+    HAS_DJANGO_CACHE = False
+
 
 def structure_from_mongo(structure):
     """
@@ -70,6 +83,91 @@ def structure_to_mongo(structure):
     return new_structure
 
 
+class CourseStructureCache(object):
+    """
+    Cache of split structures, keyed by structure ``_id``.
+
+    Structures are immutable once written, so an entry never needs to be
+    invalidated. Two tiers are used: a size-bounded, process-wide LRU and the
+    ``course_structure_cache`` django cache (memcached in production), which is
+    shared across processes. Both tiers hold pickled payloads (compressed in the
+    shared tier) so every caller gets its own copy of the structure and may
+    mutate it freely.
+
+    The process-wide tier holds at most ``settings.COURSE_STRUCTURE_CACHE_LOCAL_SIZE``
+    structures; it is disabled when that is 0 or django isn't configured.
+    """
+    def __init__(self, local_size=None):
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache = None
+        if HAS_DJANGO_CACHE:
+            try:
+                if local_size is None:
+                    local_size = getattr(settings, 'COURSE_STRUCTURE_CACHE_LOCAL_SIZE', 0)
+                self.cache = get_cache('course_structure_cache')
+            except (InvalidCacheBackendError, ImproperlyConfigured):
+                self.cache = None
+        self.local_size = local_size or 0
+
+    @staticmethod
+    def _cache_key(key):
+        """
+        Return the shared cache key for the structure id ``key``.
+        """
+        return u'split_structure.{}'.format(key)
+
+    def get(self, key):
+        """
+        Return a copy of the structure with id ``key``, or None if it isn't cached.
+        """
+        with self._lock:
+            pickled_data = self._local.pop(key, None)
+            if pickled_data is not None:
+                self._local[key] = pickled_data
+
+        if pickled_data is None and self.cache is not None:
+            compressed_pickled_data = self.cache.get(self._cache_key(key))
+            if compressed_pickled_data is not None:
+                pickled_data = zlib.decompress(compressed_pickled_data)
+                if self.local_size:
+                    self._set_local(key, pickled_data)
+
+        if pickled_data is None:
+            return None
+        return pickle.loads(pickled_data)
+
+    def set(self, key, structure):
+        """
+        Store ``structure`` under the structure id ``key`` in both tiers.
+        """
+        if not self.local_size and self.cache is None:
+            return
+        pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+        if self.local_size:
+            self._set_local(key, pickled_data)
+        if self.cache is not None:
+            # Compression level 1 trades a little size for a lot of speed.
+            self.cache.set(self._cache_key(key), zlib.compress(pickled_data, 1), None)
+
+    def _set_local(self, key, pickled_data):
+        """
+        Add ``pickled_data`` to the process-wide tier, evicting the least recently used entries.
+        """
+        with self._lock:
+            self._local.pop(key, None)
+            self._local[key] = pickled_data
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def clear(self):
+        """
+        Empty the process-wide tier. Intended for tests.
+        """
+        with self._lock:
+            self._local.clear()
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
@@ -100,9 +198,9 @@ class MongoConnection(object):
         if user is not None and password is not None:
             self.database.authenticate(user, password)
 
-        self.course_index = self.database[collection + '.active_versions']
-        self.structures = self.database[collection + '.structures']
-        self.definitions = self.database[collection + '.definitions']
+        self.course_index = instrument(self.database[collection + '.active_versions'], 'split')
+        self.structures = instrument(self.database[collection + '.structures'], 'split')
+        self.definitions = instrument(self.database[collection + '.definitions'], 'split')
 
         # every app has write access to the db (v having a flag to indicate r/o v write)
         # Force mongo to report errors, at the expense of performance
@@ -112,6 +210,8 @@ class MongoConnection(object):
         self.structures.write_concern = {'w': 1}
         self.definitions.write_concern = {'w': 1}
 
+        self.structure_cache = CourseStructureCache()
+
     def heartbeat(self):
         """
         Check that the db is reachable.
@@ -125,7 +225,14 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        structure = self.structure_cache.get(key)
+        if structure is None:
+            doc = self.structures.find_one({'_id': key})
+            if doc is None:
+                return None
+            structure = structure_from_mongo(doc)
+            self.structure_cache.set(key, structure)
+        return structure
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -135,7 +242,21 @@ class MongoConnection(object):
         Arguments:
             ids (list): A list of structure ids
         """
-        return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+        structures = []
+        missing_ids = []
+        for structure_id in ids:
+            structure = self.structure_cache.get(structure_id)
+            if structure is None:
+                missing_ids.append(structure_id)
+            else:
+                structures.append(structure)
+
+        if missing_ids:
+            for doc in self.structures.find({'_id': {'$in': missing_ids}}):
+                structure = structure_from_mongo(doc)
+                self.structure_cache.set(structure['_id'], structure)
+                structures.append(structure)
+        return structures
 
     @autoretry_read()
     def find_structures_derived_from(self, ids):
@@ -177,6 +298,7 @@ class MongoConnection(object):
         Insert a new structure into the database.
         """
         self.structures.insert(structure_to_mongo(structure))
+        self.structure_cache.set(structure['_id'], structure)
 
     def get_course_index(self, key, ignore_case=False):
         """
@@ -387,6 +387,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
             # The definition hasn't been loaded from the db yet, so load it
             if definition is None:
+                self._count_definition_round_trip()
                 definition = self.db_connection.get_definition(definition_guid)
                 bulk_write_record.definitions[definition_guid] = definition
                 if definition is not None:
@@ -396,6 +397,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         else:
             # cast string to ObjectId if necessary
             definition_guid = course_key.as_object_id(definition_guid)
+            self._count_definition_round_trip()
             return self.db_connection.get_definition(definition_guid)
 
     def get_definitions(self, course_key, ids):
@@ -424,12 +426,31 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         if len(ids):
             # Query the db for the definitions.
-            defs_from_db = self.db_connection.get_definitions(list(ids))
+            self._count_definition_round_trip()
+            defs_from_db = list(self.db_connection.get_definitions(list(ids)))
             # Add the retrieved definitions to the cache.
             bulk_write_record.definitions.update({d.get('_id'): d for d in defs_from_db})
             definitions.extend(defs_from_db)
         return definitions
 
+    def _count_definition_round_trip(self):
+        """
+        Count a query for definitions in the current request, if there is a request cache.
+        """
+        if self.request_cache is not None:
+            data = self.request_cache.data
+            data['definition_round_trips'] = data.get('definition_round_trips', 0) + 1
+
+    @property
+    def definition_round_trips(self):
+        """
+        The number of queries for definitions made during the current request (0 without a
+        request cache).
+        """
+        if self.request_cache is None:
+            return 0
+        return self.request_cache.data.get('definition_round_trips', 0)
+
     def update_definition(self, course_key, definition):
         """
         Update a definition, respecting the current bulk operation status
@@ -636,9 +657,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None, prefetch_sibling_definitions=False, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param prefetch_sibling_definitions: if True, lazily loading the definition of a block loads
+            the definitions of all its siblings in the same query.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
@@ -666,6 +689,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             self.services["user"] = user_service
 
         self.signal_handler = signal_handler
+        self.prefetch_sibling_definitions = prefetch_sibling_definitions
 
     def close_connections(self):
         """
@@ -2424,6 +2448,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # this is the only real delete in the system. should it do something else?
         log.info(u"deleting course from split-mongo: %s", course_key)
         self.delete_course_index(course_key)
+        self._emit_course_deleted_signal(course_key)
 
         # We do NOT call the super class here since we need to keep the assets
         # in case the course is later restored.
@@ -39,12 +39,13 @@ from nose.tools import assert_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import as_draft, MetadataInheritanceTreeCache
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.tests.utils import LocationMixin
 from xmodule.modulestore.edit_info import EditInfoMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.inheritance import InheritanceMixin
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import MemoryCache
 
 
 log = logging.getLogger(__name__)
@@ -69,6 +70,32 @@ class ReferenceTestXBlock(XBlock, XModuleMixin):
     reference_dict = ReferenceValueDict(scope=Scope.settings)
 
 
+class VersionedMemoryCache(object):
+    """
+    In-memory stand-in for a django cache backend supporting atomic updates.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def get_many(self, keys):
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        self.data[key] = value
+
+    def add(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        return self.data.setdefault(key, value) is value
+
+    def incr(self, key, delta=1):
+        if key not in self.data:
+            raise ValueError("Key '{}' not found".format(key))
+        self.data[key] += delta
+        return self.data[key]
+
+
 class TestMongoModuleStoreBase(unittest.TestCase):
     '''
     Basic setup for all tests
@@ -778,6 +805,37 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         # Clean up the data so we don't break other tests which apparently expect a particular state
         self.draft_store.delete_course(course.id, self.dummy_user)
 
+    def test_incremental_inheritance_updates(self):
+        """
+        Updating containers patches the cached metadata inheritance tree
+        the same way recomputing it would.
+        """
+        original_incremental_updates = self.draft_store.incremental_inheritance_updates
+        original_cache = self.draft_store.metadata_inheritance_cache_subsystem
+        self.draft_store.incremental_inheritance_updates = True
+        self.draft_store.metadata_inheritance_cache_subsystem = VersionedMemoryCache()
+        course = self.draft_store.create_course("TestX", "InheritanceTest", "1234_A1", self.dummy_user)
+        try:
+            chapter = self.draft_store.create_child(self.dummy_user, course.location, "chapter")
+            sequential = self.draft_store.create_child(self.dummy_user, chapter.location, "sequential")
+            self.draft_store.create_child(self.dummy_user, sequential.location, "problem")
+            self.draft_store._get_cached_metadata_inheritance_tree(course.id, force_refresh=True)
+
+            chapter = self.draft_store.get_item(chapter.location)
+            chapter.visible_to_staff_only = True
+            self.draft_store.update_item(chapter, self.dummy_user)
+            self.draft_store.create_child(self.dummy_user, sequential.location, "vertical")
+
+            _version, tree = MetadataInheritanceTreeCache(
+                self.draft_store.metadata_inheritance_cache_subsystem
+            ).get(course.id)
+            self.assertEqual(tree, self.draft_store._compute_metadata_inheritance_tree(course.id))
+            self.assertTrue(tree[unicode(sequential.location)]['visible_to_staff_only'])
+        finally:
+            self.draft_store.incremental_inheritance_updates = original_incremental_updates
+            self.draft_store.metadata_inheritance_cache_subsystem = original_cache
+            self.draft_store.delete_course(course.id, self.dummy_user)
+
 
 class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
     '''
@@ -913,3 +971,46 @@ def _build_requested_filter(requested_filter):
         "$where": ' || '.join(where),
     }
     return filter_params
+
+
+class TestMetadataInheritanceTreeCache(unittest.TestCase):
+    """
+    Tests for MetadataInheritanceTreeCache.
+    """
+    def setUp(self):
+        super(TestMetadataInheritanceTreeCache, self).setUp()
+        self.course_key = SlashSeparatedCourseKey('edX', 'tree', 'run')
+        self.cache = MetadataInheritanceTreeCache(VersionedMemoryCache())
+
+    def test_get_set(self):
+        version, tree = self.cache.get(self.course_key)
+        self.assertIsNone(tree)
+        self.cache.set(self.course_key, version, {'a': {}})
+        self.assertEqual(self.cache.get(self.course_key), (version, {'a': {}}))
+
+    def test_bump_invalidates(self):
+        version, _tree = self.cache.get(self.course_key)
+        self.cache.set(self.course_key, version, {'a': {}})
+        self.assertEqual(self.cache.bump(self.course_key), version + 1)
+        self.assertEqual(self.cache.get(self.course_key), (version + 1, None))
+
+    def test_stale_set_ignored(self):
+        version, _tree = self.cache.get(self.course_key)
+        self.cache.bump(self.course_key)
+        # a tree computed before the course changed doesn't become valid
+        self.cache.set(self.course_key, version, {'a': {}})
+        self.assertIsNone(self.cache.get(self.course_key)[1])
+
+    def test_unversioned(self):
+        cache = MetadataInheritanceTreeCache(MemoryCache())
+        self.assertFalse(cache.versioned)
+        cache.set(self.course_key, cache.bump(self.course_key), {'a': {}})
+        self.assertEqual(cache.get(self.course_key), (None, {'a': {}}))
+
+    def test_old_format_ignored(self):
+        version, _tree = self.cache.get(self.course_key)
+        # processes on the previous code cache the tree itself under the course id
+        self.cache.cache.set(unicode(self.course_key), {'a': {}})
+        self.assertEqual(self.cache.get(self.course_key), (version, None))
+        self.cache.set(self.course_key, version, {'b': {}})
+        self.assertEqual(self.cache.cache.get(unicode(self.course_key)), {'a': {}})
@@ -10,10 +10,11 @@ import unittest
 import uuid
 
 from contracts import contract
+from mock import Mock
 from nose.plugins.attrib import attr
 
 from openedx.core.lib import tempdir
-from xblock.fields import Reference, ReferenceList, ReferenceValueDict
+from xblock.fields import Reference, ReferenceList, ReferenceValueDict, Scope
 from xmodule.course_module import CourseDescriptor
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.exceptions import (
@@ -815,6 +816,25 @@ class SplitModuleItemTests(SplitModuleTest):
             modulestore().has_item(locator.for_branch(BRANCH_NAME_PUBLISHED))
         )
 
+    def test_prefetch_sibling_definitions(self):
+        """
+        Loading the content of a block loads the definitions of its siblings in the same query
+        """
+        store = modulestore()
+        store.prefetch_sibling_definitions = True
+        store.request_cache = Mock(data={})
+        try:
+            course_locator = CourseLocator(org='testx', course='GreekHero', run='run', branch=BRANCH_NAME_DRAFT)
+            course = store.get_course(course_locator, depth=1)
+            children = course.get_children()
+            self.assertGreater(len(children), 1)
+            for child in children:
+                child.get_explicitly_set_fields_by_scope(Scope.content)
+            self.assertEqual(store.definition_round_trips, 1)
+        finally:
+            store.prefetch_sibling_definitions = False
+            store.request_cache = None
+
     def test_negative_has_item(self):
         # negative tests--not found
         # no such course or block
@@ -0,0 +1,93 @@
+"""
+Tests for the split modulestore structure cache.
+"""
+from unittest import TestCase
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import CourseStructureCache
+
+
+class FakeCache(object):
+    """
+    Minimal stand-in for a django cache backend.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, timeout):  # pylint: disable=unused-argument
+        self.data[key] = value
+
+
+def make_structure():
+    """
+    Return a small structure in the in-memory (post ``structure_from_mongo``) format.
+    """
+    root = BlockKey('course', 'course')
+    return {
+        '_id': ObjectId(),
+        'root': root,
+        'blocks': {
+            root: BlockData(block_type='course', fields={'children': []}, definition=ObjectId()),
+        },
+    }
+
+
+class TestCourseStructureCache(TestCase):
+    """
+    Tests for CourseStructureCache.
+    """
+    def setUp(self):
+        super(TestCourseStructureCache, self).setUp()
+        self.cache = CourseStructureCache(local_size=2)
+        self.cache.cache = None
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get(ObjectId()))
+
+    def test_get_returns_copy(self):
+        structure = make_structure()
+        self.cache.set(structure['_id'], structure)
+
+        cached = self.cache.get(structure['_id'])
+        self.assertEqual(cached['root'], structure['root'])
+        self.assertEqual(cached['blocks'].keys(), structure['blocks'].keys())
+
+        cached['blocks'].clear()
+        self.assertEqual(len(self.cache.get(structure['_id'])['blocks']), 1)
+
+    def test_lru_eviction(self):
+        structures = [make_structure() for _ in range(3)]
+        for structure in structures[:2]:
+            self.cache.set(structure['_id'], structure)
+
+        # Touch the first entry so the second one is the least recently used.
+        self.cache.get(structures[0]['_id'])
+        self.cache.set(structures[2]['_id'], structures[2])
+
+        self.assertIsNotNone(self.cache.get(structures[0]['_id']))
+        self.assertIsNone(self.cache.get(structures[1]['_id']))
+        self.assertIsNotNone(self.cache.get(structures[2]['_id']))
+
+    def test_shared_tier(self):
+        shared = FakeCache()
+        self.cache.cache = shared
+        structure = make_structure()
+        self.cache.set(structure['_id'], structure)
+
+        # A fresh process-wide tier still finds the structure in the shared cache.
+        other = CourseStructureCache(local_size=0)
+        other.cache = shared
+        self.assertEqual(other.get(structure['_id'])['_id'], structure['_id'])
+
+    def test_disabled(self):
+        structure = make_structure()
+        disabled = CourseStructureCache(local_size=0)
+        disabled.cache = None
+        disabled.set(structure['_id'], structure)
+        self.assertIsNone(disabled.get(structure['_id']))
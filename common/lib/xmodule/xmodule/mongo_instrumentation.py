@@ -0,0 +1,245 @@
+"""
+Instrumentation of the Mongo operations made by the modulestores and the contentstore.
+
+The stores wrap their pymongo collections (and GridFS objects) with `instrument`.
+While a `QueryRecorder` is recording in the current thread (e.g. for the duration
+of a request, see `monitoring.middleware.ModulestoreQueryMiddleware`), each
+operation made through the wrappers is recorded with its latency, and optionally
+the size of the documents it returned (which costs a BSON encoding of each
+document). Otherwise the wrappers only pass the calls through.
+"""
+from collections import defaultdict
+import threading
+import time
+
+from bson import BSON
+from bson.errors import BSONError
+from gridfs.grid_file import GridOut
+
+
+# The methods of collections and GridFS objects which talk to the database
+INSTRUMENTED_OPERATIONS = frozenset([
+    # pymongo.collection.Collection
+    'aggregate', 'count', 'distinct', 'find', 'find_and_modify', 'find_one', 'group', 'insert',
+    'map_reduce', 'remove', 'save', 'update',
+    # gridfs.GridFS
+    'delete', 'exists', 'get', 'get_last_version', 'get_version', 'list', 'put',
+])
+
+_local = threading.local()
+
+
+class OperationStats(object):
+    """
+    The number, total duration (in seconds) and total size of the results (in
+    bytes) of the operations of one type made on one store.
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.size = 0
+
+
+class QueryRecorder(object):
+    """
+    Records the Mongo operations made in the current thread while it is active.
+    The sizes of the results are only measured if `record_sizes` is True.
+
+    Usage:
+
+        with QueryRecorder() as recorder:
+            ...
+        recorder.stats  # {(store, operation): OperationStats}
+    """
+    def __init__(self, record_sizes=False):
+        self.record_sizes = record_sizes
+        self.stats = defaultdict(OperationStats)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """
+        Start recording the operations made in the current thread.
+        """
+        _local.recorder = self
+
+    def stop(self):
+        """
+        Stop recording, if this recorder is the active one.
+        """
+        if getattr(_local, 'recorder', None) is self:
+            _local.recorder = None
+
+    def record(self, store, operation, duration, size=0, count=1):
+        """
+        Adds an operation to the stats.
+        """
+        stats = self.stats[(store, operation)]
+        stats.count += count
+        stats.duration += duration
+        stats.size += size
+
+    @property
+    def total_count(self):
+        """
+        The number of operations recorded.
+        """
+        return sum(stats.count for stats in self.stats.itervalues())
+
+    @property
+    def total_duration(self):
+        """
+        The total duration of the operations recorded, in seconds.
+        """
+        return sum(stats.duration for stats in self.stats.itervalues())
+
+
+def active_recorder():
+    """
+    Returns the QueryRecorder recording in the current thread, if any.
+    """
+    return getattr(_local, 'recorder', None)
+
+
+def document_size(recorder, document):
+    """
+    Returns the size in bytes of `document` as BSON (or of the file, for GridFS
+    files), or 0 if it isn't a document or `recorder` doesn't record sizes.
+    """
+    if not recorder.record_sizes:
+        return 0
+    if isinstance(document, GridOut):
+        return document.length
+    if not isinstance(document, dict):
+        return 0
+    try:
+        return len(BSON.encode(document))
+    except (BSONError, TypeError):
+        return 0
+
+
+def is_cursor(result):
+    """
+    Returns whether `result` is a cursor. The collections of the stores may be
+    wrapped (e.g. by MongoProxy), so cursors are recognized by their methods
+    rather than their class.
+    """
+    return hasattr(result, 'next') and hasattr(result, 'batch_size')
+
+
+def instrument(target, store):
+    """
+    Wraps the pymongo collection or GridFS object `target` so that the operations
+    made on it by `store` (e.g. 'split') are recorded.
+    """
+    return InstrumentedProxy(target, store)
+
+
+class InstrumentedProxy(object):
+    """
+    Passes all attribute accesses through to the wrapped object, recording the
+    calls to INSTRUMENTED_OPERATIONS while a QueryRecorder is active.
+    """
+    def __init__(self, target, store):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_store', store)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name not in INSTRUMENTED_OPERATIONS or not callable(attr):
+            return attr
+
+        def instrumented(*args, **kwargs):
+            """
+            Calls the operation, recording it if a recorder is active.
+            """
+            recorder = active_recorder()
+            if recorder is None:
+                return attr(*args, **kwargs)
+
+            start = time.time()
+            result = attr(*args, **kwargs)
+            duration = time.time() - start
+            if is_cursor(result):
+                # the documents are fetched (and recorded) while iterating
+                recorder.record(self._store, name, duration)
+                return InstrumentedCursor(result, self._store, name)
+            recorder.record(self._store, name, duration, document_size(recorder, result))
+            return result
+        return instrumented
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __delattr__(self, name):
+        delattr(self._target, name)
+
+    def __getitem__(self, name):
+        return InstrumentedProxy(self._target[name], self._store)
+
+    def __repr__(self):
+        return 'InstrumentedProxy({!r})'.format(self._target)
+
+
+class InstrumentedCursor(object):
+    """
+    Wraps a pymongo cursor to add the time spent fetching its documents, and their
+    size, to the operation which created it.
+    """
+    def __init__(self, cursor, store, operation):
+        self._cursor = cursor
+        self._store = store
+        self._operation = operation
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            """
+            Keeps the cursor wrapped through chained calls such as `sort` or `limit`.
+            """
+            result = attr(*args, **kwargs)
+            if result is self._cursor:
+                return self
+            return result
+        return chained
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        """
+        Returns the next document, recording the time spent fetching it.
+        """
+        start = time.time()
+        document = self._cursor.next()
+        recorder = active_recorder()
+        if recorder is not None:
+            recorder.record(
+                self._store, self._operation, time.time() - start, document_size(recorder, document), count=0
+            )
+        return document
+
+    def __getitem__(self, index):
+        result = self._cursor[index]
+        if result is self._cursor:
+            return self
+        return result
+
+    def count(self, *args, **kwargs):
+        """
+        Counts the matching documents, which is a separate operation.
+        """
+        start = time.time()
+        result = self._cursor.count(*args, **kwargs)
+        recorder = active_recorder()
+        if recorder is not None:
+            recorder.record(self._store, 'count', time.time() - start)
+        return result
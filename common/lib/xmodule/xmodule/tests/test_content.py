@@ -164,6 +164,20 @@ class ContentTest(unittest.TestCase):
 
         self.assertEqual(total_length, last_byte - first_byte + 1)
 
+    def test_static_content_stream_data_in_range(self):
+        """
+        Test StaticContent stream_data_in_range function, asserts that we get the requested bytes
+        """
+        static_content = StaticContent('loc', 'name', 'type', SAMPLE_STRING, length=len(SAMPLE_STRING))
+
+        first_byte = 100
+        last_byte = 1500
+
+        self.assertEqual(
+            ''.join(static_content.stream_data_in_range(first_byte, last_byte)),
+            SAMPLE_STRING[first_byte:last_byte + 1]
+        )
+
     def test_static_content_write_js(self):
         """
         Test that only one filename starts with 000.
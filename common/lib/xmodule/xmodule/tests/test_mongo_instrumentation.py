@@ -0,0 +1,74 @@
+"""
+Tests for the instrumentation of Mongo operations.
+"""
+import unittest
+
+from mock import Mock
+from pymongo.cursor import Cursor
+
+from xmodule.mongo_instrumentation import QueryRecorder, active_recorder, instrument
+
+
+class TestInstrumentedProxy(unittest.TestCase):
+    """
+    Tests for instrument and QueryRecorder.
+    """
+    def setUp(self):
+        super(TestInstrumentedProxy, self).setUp()
+        self.collection = Mock()
+        self.collection.find_one.return_value = {'_id': 'abc'}
+        self.proxy = instrument(self.collection, 'split')
+
+    def test_not_recording(self):
+        self.assertIsNone(active_recorder())
+        self.assertEqual(self.proxy.find_one({'_id': 'abc'}), {'_id': 'abc'})
+        self.collection.find_one.assert_called_once_with({'_id': 'abc'})
+
+    def test_recording(self):
+        with QueryRecorder(record_sizes=True) as recorder:
+            self.proxy.find_one({'_id': 'abc'})
+            self.proxy.find_one({'_id': 'def'})
+            self.proxy.update({'_id': 'abc'}, {'$set': {'a': 1}})
+        self.assertIsNone(active_recorder())
+
+        self.assertEqual(recorder.total_count, 3)
+        self.assertEqual(recorder.stats[('split', 'find_one')].count, 2)
+        self.assertGreater(recorder.stats[('split', 'find_one')].size, 0)
+        self.assertEqual(recorder.stats[('split', 'update')].count, 1)
+
+    def test_sizes_not_recorded_by_default(self):
+        with QueryRecorder() as recorder:
+            self.proxy.find_one({'_id': 'abc'})
+        self.assertEqual(recorder.stats[('split', 'find_one')].count, 1)
+        self.assertEqual(recorder.stats[('split', 'find_one')].size, 0)
+
+    def test_cursor(self):
+        cursor = Mock(spec=Cursor)
+        cursor.next.side_effect = [{'_id': 'abc'}, {'_id': 'def'}, StopIteration]
+        cursor.sort.return_value = cursor
+        self.collection.find.return_value = cursor
+
+        with QueryRecorder(record_sizes=True) as recorder:
+            documents = list(self.proxy.find({}).sort('_id'))
+
+        self.assertEqual(documents, [{'_id': 'abc'}, {'_id': 'def'}])
+        stats = recorder.stats[('split', 'find')]
+        self.assertEqual(stats.count, 1)
+        self.assertGreater(stats.size, 0)
+
+    def test_wrapped_cursor(self):
+        # e.g. a cursor returned through MongoProxy, which isn't a Cursor instance
+        cursor = Mock(spec=['next', 'batch_size'])
+        cursor.next.side_effect = [{'_id': 'abc'}, StopIteration]
+        self.collection.find.return_value = cursor
+
+        with QueryRecorder() as recorder:
+            result = self.proxy.find({})
+            self.assertIsNot(result, cursor)
+            self.assertEqual(list(result), [{'_id': 'abc'}])
+        self.assertEqual(recorder.stats[('split', 'find')].count, 1)
+
+    def test_attributes_pass_through(self):
+        self.proxy.write_concern = {'w': 1}
+        self.assertEqual(self.collection.write_concern, {'w': 1})
+        self.assertIs(self.proxy.database, self.collection.database)
@@ -4,19 +4,28 @@ from django.conf import settings
 
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from microsite_configuration import microsite
+from openedx.core.djangoapps.content.course_summaries.models import CourseSummary
 
 
 def get_visible_courses():
     """
     Return the set of CourseDescriptors that should be visible in this branded instance
+
+    If FEATURES['ENABLE_COURSE_SUMMARIES'] is on, CourseSummary objects are returned
+    instead, read from the database rather than the modulestore.
     """
 
     filtered_by_org = microsite.get_value('course_org_filter')
 
-    _courses = modulestore().get_courses(org=filtered_by_org)
+    if settings.FEATURES.get('ENABLE_COURSE_SUMMARIES'):
+        courses = CourseSummary.objects.all()
+        if filtered_by_org:
+            courses = courses.filter(org=filtered_by_org)
+    else:
+        _courses = modulestore().get_courses(org=filtered_by_org)
 
-    courses = [c for c in _courses
-               if isinstance(c, CourseDescriptor)]
+        courses = [c for c in _courses
+                   if isinstance(c, CourseDescriptor)]
     courses = sorted(courses, key=lambda course: course.number)
 
     subdomain = microsite.get_value('subdomain', 'default')
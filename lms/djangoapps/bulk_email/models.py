@@ -12,6 +12,9 @@ file and check it in at the same time as your model changes. To do that,
 
 """
 import logging
+import re
+from string import Formatter
+
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models, transaction
@@ -20,7 +23,7 @@ from openedx.core.lib.html_to_text import html_to_text
 from openedx.core.lib.mail_utils import wrap_message
 
 from xmodule_django.models import CourseKeyField
-from util.keyword_substitution import substitute_keywords_with_data
+from util.keyword_substitution import anonymous_id_from_user_id, substitute_keywords, substitute_keywords_with_data
 
 log = logging.getLogger(__name__)
 
@@ -151,6 +154,126 @@ class Optout(models.Model):
 COURSE_EMAIL_MESSAGE_BODY_TAG = '{{message_body}}'
 
 
+# The keys of the context of course emails which differ between recipients.
+RECIPIENT_CONTEXT_KEYS = ('name', 'email', 'user_id')
+
+# The keywords of message bodies which differ between recipients, see util.keyword_substitution.
+RECIPIENT_KEYWORDS_PATTERN = re.compile(r'(%%USER_ID%%|%%USER_FULLNAME%%)')
+
+
+class CompiledEmailMessage(object):
+    """
+    A course email message rendered once for all its recipients, except for
+    the parts which differ between them.
+
+    `render(recipient_context)` returns what CourseEmailTemplate._render returns
+    for the template, message body and context the message was compiled from,
+    updated with `recipient_context`. Only the template fields and the keywords
+    of the recipient are substituted, and only the lines which contain them are
+    wrapped.
+    """
+    def __init__(self, format_string, message_body, context):
+        self.context = context
+        formatter = Formatter()
+
+        # The parts of the message: strings, and ('field', field_name, conversion, format_spec)
+        # or ('keyword', keyword) tuples which are substituted for each recipient.
+        template_parts = []
+        for literal_text, field_name, format_spec, conversion in formatter.parse(format_string):
+            template_parts.append(literal_text)
+            if field_name is None:
+                continue
+            if '{' in format_spec:
+                format_spec = formatter.vformat(format_spec, (), context)
+            if re.split(r'[.\[]', field_name, 1)[0] in RECIPIENT_CONTEXT_KEYS:
+                template_parts.append(('field', field_name, conversion, format_spec))
+            else:
+                template_parts.append(self._format_field(formatter, field_name, conversion, format_spec, context))
+        template_parts = self._merge_strings(template_parts)
+
+        # Keywords are substituted like _render does for recipients with a user_id.
+        # The course keywords are the same for all recipients.
+        if 'course_id' in context and context.get('course_title') is not None:
+            body_parts = [
+                ('keyword', part) if index % 2 else substitute_keywords(part, None, context)
+                for index, part in enumerate(RECIPIENT_KEYWORDS_PATTERN.split(message_body))
+            ]
+        else:
+            body_parts = [message_body]
+
+        # Insert the body in place of the first body tag, as _render does
+        message_body_tag = COURSE_EMAIL_MESSAGE_BODY_TAG.format()
+        parts = template_parts
+        for index, part in enumerate(template_parts):
+            if isinstance(part, basestring) and message_body_tag in part:
+                before, after = part.split(message_body_tag, 1)
+                parts = template_parts[:index] + [before] + body_parts + [after] + template_parts[index + 1:]
+                break
+
+        # Split the message into lines, and wrap those which are the same for all recipients
+        self.lines = [[]]
+        for part in self._merge_strings(parts):
+            if isinstance(part, basestring):
+                first_line, newline, remaining_text = part.partition('\n')
+                self.lines[-1].append(first_line)
+                if newline:
+                    self.lines.extend([text] for text in remaining_text.split('\n'))
+            else:
+                self.lines[-1].append(part)
+        self.lines = [
+            wrap_message(u''.join(line)) if all(isinstance(part, basestring) for part in line) else line
+            for line in self.lines
+        ]
+
+    @staticmethod
+    def _merge_strings(parts):
+        """
+        Returns `parts` with the consecutive strings joined.
+        """
+        merged_parts = []
+        for part in parts:
+            if isinstance(part, basestring) and merged_parts and isinstance(merged_parts[-1], basestring):
+                merged_parts[-1] += part
+            else:
+                merged_parts.append(part)
+        return merged_parts
+
+    @staticmethod
+    def _format_field(formatter, field_name, conversion, format_spec, context):
+        """
+        Returns the value of the template field `field_name` in `context`, formatted like str.format does.
+        """
+        value, __ = formatter.get_field(field_name, (), context)
+        return formatter.format_field(formatter.convert_field(value, conversion), format_spec)
+
+    def render(self, recipient_context):
+        """
+        Returns the message of the recipient described by `recipient_context`,
+        which holds values of RECIPIENT_CONTEXT_KEYS.
+        """
+        context = dict(self.context, **recipient_context)
+        formatter = Formatter()
+        keyword_values = {}
+
+        def render_part(part):  # pylint: disable=missing-docstring
+            if isinstance(part, basestring):
+                return part
+            if part[0] == 'field':
+                return self._format_field(formatter, part[1], part[2], part[3], context)
+            keyword = part[1]
+            if keyword not in keyword_values:
+                if keyword == '%%USER_ID%%':
+                    keyword_values[keyword] = anonymous_id_from_user_id(context['user_id'])
+                else:
+                    keyword_values[keyword] = context.get('name')
+            return keyword_values[keyword]
+
+        return u'\n'.join(
+            line if isinstance(line, basestring) else wrap_message(u''.join(render_part(part) for part in line))
+            for line in self.lines
+        )
+
+
 class CourseEmailTemplate(models.Model):
     """
     Stores templates for all emails to a course to use.
@@ -228,6 +351,20 @@ class CourseEmailTemplate(models.Model):
         """
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def compile_plaintext(self, plaintext, context):
+        """
+        Returns the CompiledEmailMessage rendering `plaintext` like render_plaintext,
+        for the recipients of a course email sharing `context`.
+        """
+        return CompiledEmailMessage(self.plain_template, plaintext, context)
+
+    def compile_htmltext(self, htmltext, context):
+        """
+        Returns the CompiledEmailMessage rendering `htmltext` like render_htmltext,
+        for the recipients of a course email sharing `context`.
+        """
+        return CompiledEmailMessage(self.html_template, htmltext, context)
+
 
 class CourseAuthorization(models.Model):
     """
@@ -0,0 +1,43 @@
+"""
+Rate limiting of the bulk email sends of all the workers.
+"""
+from time import sleep, time
+
+from django.core.cache import cache
+
+
+class SendRateLimiter(object):
+    """
+    Limits the number of emails sent per second by all the workers sharing the
+    django cache to `max_rate`.
+
+    The sends of each second are counted in the cache, which only supports
+    atomic increments, so the budget of each second is used up by the first
+    sends of the second: bursts of up to `max_rate` emails are allowed.
+    """
+    # How long the count of the sends of a second is kept
+    COUNT_TIMEOUT = 10
+
+    def __init__(self, max_rate, key_prefix='bulk_email.sends'):
+        self.max_rate = max_rate
+        self.key_prefix = key_prefix
+
+    def acquire(self):
+        """
+        Waits until another email may be sent, and counts it.
+        """
+        if not self.max_rate:
+            return
+        while True:
+            now = time()
+            second = int(now)
+            key = u'{}.{}'.format(self.key_prefix, second)
+            cache.add(key, 0, self.COUNT_TIMEOUT)
+            try:
+                count = cache.incr(key)
+            except ValueError:
+                # The count was evicted meanwhile, don't wait for it
+                return
+            if count <= self.max_rate:
+                return
+            sleep(second + 1 - now)
@@ -0,0 +1,89 @@
+"""
+Streaming of the recipients of bulk emails in the order of their user ids.
+
+The recipients are read in chunks, each starting after the last user id of the
+previous one, which keeps the queries cheap however far into the recipients
+they are.  The users who opted out of the emails of the course are excluded by
+the queries themselves.  Recipients are streamed as compact (id, email, name)
+tuples.
+"""
+import heapq
+
+# Number of recipients fetched per query
+CHUNK_SIZE = 1000
+
+RECIPIENT_FIELDS = ('id', 'email', 'profile__name')
+
+
+def _exclude_optouts(queryset, course_id):
+    """
+    Returns `queryset` without the users who opted out of the emails of the course `course_id`.
+    """
+    return queryset.exclude(optout__course_id=course_id)
+
+
+def _stream_queryset(queryset, fields, chunk_size):
+    """
+    Yields the `fields` of the users of `queryset` in the order of their ids, querying
+    `chunk_size` of them at a time.
+    """
+    queryset = queryset.order_by('id').values_list(*fields)
+    last_id = None
+    while True:
+        chunk_queryset = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        chunk = list(chunk_queryset[:chunk_size])
+        for recipient in chunk:
+            yield recipient
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+def count_recipients(recipient_qsets, course_id):
+    """
+    Returns the number of the recipients of `recipient_qsets` who didn't opt out
+    of the emails of the course `course_id`.
+    """
+    return sum(_exclude_optouts(queryset, course_id).count() for queryset in recipient_qsets)
+
+
+def stream_recipients(recipient_qsets, course_id, first_id=None, last_id=None, fields=RECIPIENT_FIELDS,
+                      chunk_size=CHUNK_SIZE):
+    """
+    Yields the recipients of `recipient_qsets` who didn't opt out of the emails
+    of the course `course_id`, as tuples of their `fields`, in the order of their
+    ids, once each.
+
+    `fields` must start with 'id'.  If given, only the recipients whose ids are
+    between `first_id` and `last_id` included are streamed.
+    """
+    streams = []
+    for queryset in recipient_qsets:
+        queryset = _exclude_optouts(queryset, course_id)
+        if first_id is not None:
+            queryset = queryset.filter(id__gte=first_id)
+        if last_id is not None:
+            queryset = queryset.filter(id__lte=last_id)
+        streams.append(_stream_queryset(queryset, fields, chunk_size))
+
+    previous_id = None
+    for recipient in heapq.merge(*streams):
+        # Users in several of the querysets are streamed once
+        if recipient[0] != previous_id:
+            previous_id = recipient[0]
+            yield recipient
+
+
+def expand_recipients(recipients):
+    """
+    Returns the list of the dicts representing the (id, email, name) `recipients`
+    in the to_list of the send_course_email task.
+    """
+    return [{'pk': pk, 'email': email, 'profile__name': name} for pk, email, name in recipients]
+
+
+def compact_recipients(to_list):
+    """
+    Returns the list of the (id, email, name) tuples of the recipients of `to_list`.
+    """
+    return [(recipient['pk'], recipient['email'], recipient['profile__name']) for recipient in to_list]
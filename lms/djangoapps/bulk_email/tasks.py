@@ -6,8 +6,11 @@ to a course.
 import re
 import random
 import json
+import sys
+import threading
 from time import sleep
 from collections import Counter
+from functools import partial
 import logging
 
 import dogstats_wrapper as dog_stats_api
@@ -39,12 +42,15 @@ from bulk_email.models import (
     SEND_TO_MYSELF, SEND_TO_ALL, TO_OPTIONS,
     SEND_TO_STAFF,
 )
+from bulk_email.rate_limit import SendRateLimiter
+from bulk_email.recipients import compact_recipients, count_recipients, expand_recipients, stream_recipients
 from courseware.courses import get_course, course_image_url
 from student.roles import CourseStaffRole, CourseInstructorRole
 from instructor_task.models import InstructorTask
 from instructor_task.subtasks import (
     SubtaskStatus,
     queue_subtasks_for_query,
+    queue_subtasks_for_id_ranges,
     check_subtask_is_valid,
     update_subtask_status,
 )
@@ -229,7 +235,11 @@ def perform_delegate_email_batches(entry_id, course_id, task_input, action_name)
     log.info(u"Task %s: Preparing to queue subtasks for sending emails for course %s, email %s, to_option %s",
              task_id, course_id, email_id, to_option)
 
-    total_recipients = sum([recipient_queryset.count() for recipient_queryset in recipient_qsets])
+    if settings.BULK_EMAIL_QUEUE_RECIPIENT_RANGES:
+        # Optouts are excluded here, rather than by the subtasks.
+        total_recipients = count_recipients(recipient_qsets, course_id)
+    else:
+        total_recipients = sum([recipient_queryset.count() for recipient_queryset in recipient_qsets])
 
     routing_key = settings.BULK_EMAIL_ROUTING_KEY
     # if there are few enough emails, send them through a different queue
@@ -253,15 +263,27 @@ def perform_delegate_email_batches(entry_id, course_id, task_input, action_name)
         )
         return new_subtask
 
-    progress = queue_subtasks_for_query(
-        entry,
-        action_name,
-        _create_send_email_subtask,
-        recipient_qsets,
-        recipient_fields,
-        settings.BULK_EMAIL_EMAILS_PER_TASK,
-        total_recipients,
-    )
+    if settings.BULK_EMAIL_QUEUE_RECIPIENT_RANGES:
+        # Each subtask is passed the range of the user ids of its recipients, and fetches them itself.
+        recipient_ids = (recipient[0] for recipient in stream_recipients(recipient_qsets, course_id, fields=('id',)))
+        progress = queue_subtasks_for_id_ranges(
+            entry,
+            action_name,
+            _create_send_email_subtask,
+            recipient_ids,
+            settings.BULK_EMAIL_EMAILS_PER_TASK,
+            total_recipients,
+        )
+    else:
+        progress = queue_subtasks_for_query(
+            entry,
+            action_name,
+            _create_send_email_subtask,
+            recipient_qsets,
+            recipient_fields,
+            settings.BULK_EMAIL_EMAILS_PER_TASK,
+            total_recipients,
+        )
 
     # We want to return progress here, as this is what will be stored in the
     # AsyncResult for the parent task as its return value.
@@ -283,6 +305,11 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
         - 'profile__name': full name of User.
         - 'email': email address of User.
         - 'pk': primary key of User model.
+        or as a (pk, email, profile__name) tuple.  When BULK_EMAIL_QUEUE_RECIPIENT_RANGES is set,
+        `to_list` is instead a dict with the following keys, and the recipients are fetched by the task:
+        - 'first_id': id of the first User of the recipients.
+        - 'last_id': id of the last User of the recipients.
+        - 'num_items': number of recipients.
       * `global_email_context`: dict containing values that are unique for this email but the same
         for all recipients of this email.  This dict is to be used to fill in slots in email
         template.  It does not include 'name' and 'email', which will be provided by the to_list.
@@ -308,7 +335,7 @@ def send_course_email(entry_id, email_id, to_list, global_email_context, subtask
     """
     subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
     current_task_id = subtask_status.task_id
-    num_to_send = len(to_list)
+    num_to_send = to_list['num_items'] if isinstance(to_list, dict) else len(to_list)
     log.info(u"Preparing to send email %s to %d recipients as subtask %s for instructor task %d: context = %s, status=%s",
              email_id, num_to_send, current_task_id, entry_id, global_email_context, subtask_status)
 
@@ -408,6 +435,28 @@ def _get_source_address(course_id, course_title):
     return from_addr
 
 
+def _call_concurrently(functions):
+    """
+    Calls the `functions` at once, each on its own thread, and returns the
+    exc_info of the exception raised by each of them, or None.
+    """
+    errors = [None] * len(functions)
+
+    def call(index):  # pylint: disable=missing-docstring
+        try:
+            functions[index]()
+        except Exception:  # pylint: disable=broad-except
+            errors[index] = sys.exc_info()
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in xrange(1, len(functions))]
+    for thread in threads:
+        thread.start()
+    call(0)
+    for thread in threads:
+        thread.join()
+    return errors
+
+
 def _send_course_email(entry_id, email_id, to_list, global_email_context, subtask_status):
     """
     Performs the email sending task.
@@ -437,22 +486,16 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         'failed' count above.
     """
     # Get information from current task's request:
-    parent_task_id = InstructorTask.objects.get(pk=entry_id).task_id
+    entry = InstructorTask.objects.get(pk=entry_id)
+    parent_task_id = entry.task_id
     task_id = subtask_status.task_id
-    total_recipients = len(to_list)
+    # Recipients passed as tuples or as a range are passed as tuples to retries.
+    compact = isinstance(to_list, dict) or any(not isinstance(recipient, dict) for recipient in to_list)
     recipient_num = 0
     total_recipients_successful = 0
     total_recipients_failed = 0
     recipients_info = Counter()
 
-    log.info(
-        "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, TotalRecipients: %s",
-        parent_task_id,
-        task_id,
-        email_id,
-        total_recipients
-    )
-
     try:
         course_email = CourseEmail.objects.get(id=email_id)
     except CourseEmail.DoesNotExist as exc:
@@ -464,15 +507,37 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         )
         raise
 
-    # Exclude optouts (if not a retry):
-    # Note that we don't have to do the optout logic at all if this is a retry,
-    # because we have presumably already performed the optout logic on the first
-    # attempt.  Anyone on the to_list on a retry has already passed the filter
-    # that existed at that time, and we don't need to keep checking for changes
-    # in the Optout list.
-    if subtask_status.get_retry_count() == 0:
-        to_list, num_optout = _filter_optouts_from_recipients(to_list, course_email.course_id)
-        subtask_status.increment(skipped=num_optout)
+    if isinstance(to_list, dict):
+        # Fetch the recipients of the range, which excludes the optouts.  Retries are
+        # passed the recipients, so this is only done on the first attempt.  Those who
+        # opted out since the task was queued are counted as skipped.
+        recipient_qsets = _get_recipient_querysets(entry.requester_id, course_email.to_option, course_email.course_id)
+        num_in_range = to_list['num_items']
+        to_list = expand_recipients(stream_recipients(
+            recipient_qsets, course_email.course_id, first_id=to_list['first_id'], last_id=to_list['last_id']
+        ))
+        subtask_status.increment(skipped=max(0, num_in_range - len(to_list)))
+    else:
+        if compact:
+            to_list = expand_recipients(to_list)
+        # Exclude optouts (if not a retry):
+        # Note that we don't have to do the optout logic at all if this is a retry,
+        # because we have presumably already performed the optout logic on the first
+        # attempt.  Anyone on the to_list on a retry has already passed the filter
+        # that existed at that time, and we don't need to keep checking for changes
+        # in the Optout list.
+        if subtask_status.get_retry_count() == 0:
+            to_list, num_optout = _filter_optouts_from_recipients(to_list, course_email.course_id)
+            subtask_status.increment(skipped=num_optout)
+
+    total_recipients = len(to_list)
+    log.info(
+        "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, TotalRecipients: %s",
+        parent_task_id,
+        task_id,
+        email_id,
+        total_recipients
+    )
 
     course_title = global_email_context['course_title']
     subject = "[" + course_title + "] " + course_email.subject
@@ -483,51 +548,68 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
 
     # use the CourseEmailTemplate that was associated with the CourseEmail
     course_email_template = course_email.get_template()
+    rate_limiter = SendRateLimiter(settings.BULK_EMAIL_MAX_SENDS_PER_SECOND)
+    connections = []
     try:
-        connection = get_connection()
-        connection.open()
+        # The messages are sent over several connections at once, one message per connection.
+        for __ in xrange(max(1, min(settings.BULK_EMAIL_CONNECTIONS_PER_TASK, len(to_list)))):
+            connection = get_connection()
+            connections.append(connection)
+            connection.open()
 
         # Define context values to use in all course emails:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
+        email_context['course_id'] = course_email.course_id
+
+        # Render the parts of the messages which are the same for all recipients once.
+        plaintext_template = course_email_template.compile_plaintext(course_email.text_message, email_context)
+        html_template = course_email_template.compile_htmltext(course_email.html_message, email_context)
+
+        def send(connection, email_msg):  # pylint: disable=missing-docstring
+            with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
+                connection.send_messages([email_msg])
 
         while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
+            # Send to the users at the end of the list, one per connection.
+            # At the end of processing these users, they will be removed from the to_list.
             # That way, the to_list will always contain the recipients remaining to be emailed.
             # This is convenient for retries, which will need to send to those who haven't
             # yet been emailed, but not send to those who have already been sent to.
-            recipient_num += 1
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
+            batch = to_list[:-len(connections) - 1:-1]
+            sends = []
+            for current_recipient, connection in zip(batch, connections):
+                recipient_num += 1
+                email = current_recipient['email']
+                recipient_context = {
+                    'email': email,
+                    'name': current_recipient['profile__name'],
+                    'user_id': current_recipient['pk'],
+                }
+
+                # Construct message content using templates and context:
+                plaintext_msg = plaintext_template.render(recipient_context)
+                html_msg = html_template.render(recipient_context)
+
+                # Create email:
+                email_msg = EmailMultiAlternatives(
+                    subject,
+                    plaintext_msg,
+                    from_addr,
+                    [email],
+                    connection=connection
+                )
+                email_msg.attach_alternative(html_msg, 'text/html')
 
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+                # Throttle if we have gotten the rate limiter.  This is not very high-tech,
+                # but if a task has been retried for rate-limiting reasons, then we sleep
+                # for a period of time between all emails within this task.  Choice of
+                # the value depends on the number of workers that might be sending email in
+                # parallel, and what the SES throttle rate is.
+                if subtask_status.retried_nomax > 0:
+                    sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+                rate_limiter.acquire()
 
-            try:
                 log.info(
                     "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
                     Recipient name: %s, Email address: %s",
@@ -539,82 +621,103 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
                     current_recipient['profile__name'],
                     email
                 )
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
+                sends.append((connection, email_msg))
+
+            send_errors = _call_concurrently([partial(send, *args) for args in sends])
+
+            # Remove the users that were emailed from the end of the list only once they have
+            # successfully been processed.  (That way, if there were a failure that
+            # needed to be retried, the user is still on the list.)
+            unprocessed = []
+            retry_error = None
+            for batch_num, (current_recipient, send_error) in enumerate(zip(batch, send_errors)):
+                email = current_recipient['email']
+                num = recipient_num - len(batch) + batch_num + 1
+                exc = send_error[1] if send_error else None
+
+                if isinstance(exc, SMTPDataError):
+                    # According to SMTP spec, we'll retry error codes in the 4xx range.
+                    # 5xx range indicates hard failure.
+                    total_recipients_failed += 1
+                    log.error(
+                        "BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
+                        Recipient num: %s/%s, Email address: %s",
+                        parent_task_id,
+                        task_id,
+                        email_id,
+                        num,
+                        total_recipients,
+                        email
+                    )
+                    if exc.smtp_code >= 400 and exc.smtp_code < 500:
+                        # This will cause the outer handler to catch the exception and retry the entire task.
+                        unprocessed.append(current_recipient)
+                        retry_error = retry_error or send_error
+                        continue
+                    else:
+                        # This will fall through and not retry the message.
+                        log.warning(
+                            'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
+                            Email not delivered to %s due to error %s',
+                            parent_task_id,
+                            task_id,
+                            email_id,
+                            num,
+                            total_recipients,
+                            email,
+                            exc.smtp_error
+                        )
+                        dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+                        subtask_status.increment(failed=1)
+
+                elif isinstance(exc, SINGLE_EMAIL_FAILURE_ERRORS):
                     # This will fall through and not retry the message.
-                    log.warning(
-                        'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
-                        Email not delivered to %s due to error %s',
+                    total_recipients_failed += 1
+                    log.error(
+                        "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
+                        EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
                         parent_task_id,
                         task_id,
                         email_id,
-                        recipient_num,
+                        num,
                         total_recipients,
                         email,
-                        exc.smtp_error
+                        exc
                     )
                     dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
                     subtask_status.increment(failed=1)
 
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                total_recipients_failed += 1
-                log.error(
-                    "BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
-                    EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email,
-                    exc
-                )
-                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
+                elif exc is not None:
+                    # This will cause the outer handlers to catch the exception.
+                    unprocessed.append(current_recipient)
+                    retry_error = retry_error or send_error
+                    continue
 
-            else:
-                total_recipients_successful += 1
-                log.info(
-                    "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s,",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
                 else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
+                    total_recipients_successful += 1
+                    log.info(
+                        "BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
+                        Recipient num: %s/%s, Email address: %s,",
+                        parent_task_id,
+                        task_id,
+                        email_id,
+                        num,
+                        total_recipients,
+                        email
+                    )
+                    dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
+                    if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+                        log.info('Email with id %s sent to %s', email_id, email)
+                    else:
+                        log.debug('Email with id %s sent to %s', email_id, email)
+                    subtask_status.increment(succeeded=1)
 
-            # Pop the user that was emailed off the end of the list only once they have
-            # successfully been processed.  (That way, if there were a failure that
-            # needed to be retried, the user is still on the list.)
-            recipients_info[email] += 1
-            to_list.pop()
+                recipients_info[email] += 1
+
+            del to_list[-len(batch):]
+            to_list.extend(reversed(unprocessed))
+            if retry_error is not None:
+                raise retry_error[0], retry_error[1], retry_error[2]
 
         log.info(
             "BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Total Successful Recipients: %s/%s, \
@@ -645,7 +748,8 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         # and set the state to RETRY:
         subtask_status.increment(retried_nomax=1, state=RETRY)
         return _submit_for_retry(
-            entry_id, email_id, to_list, global_email_context, exc, subtask_status, skip_retry_max=True
+            entry_id, email_id, to_list, global_email_context, exc, subtask_status, skip_retry_max=True,
+            compact=compact,
         )
 
     except LIMITED_RETRY_ERRORS as exc:
@@ -657,7 +761,8 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         # and set the state to RETRY:
         subtask_status.increment(retried_withmax=1, state=RETRY)
         return _submit_for_retry(
-            entry_id, email_id, to_list, global_email_context, exc, subtask_status, skip_retry_max=False
+            entry_id, email_id, to_list, global_email_context, exc, subtask_status, skip_retry_max=False,
+            compact=compact,
         )
 
     except BULK_EMAIL_FAILURE_ERRORS as exc:
@@ -682,7 +787,8 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         # and set the state to RETRY:
         subtask_status.increment(retried_withmax=1, state=RETRY)
         return _submit_for_retry(
-            entry_id, email_id, to_list, global_email_context, exc, subtask_status, skip_retry_max=False
+            entry_id, email_id, to_list, global_email_context, exc, subtask_status, skip_retry_max=False,
+            compact=compact,
         )
 
     else:
@@ -693,7 +799,8 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        for connection in connections:
+            connection.close()
 
 
 def _get_current_task():
@@ -709,14 +816,16 @@ def _get_current_task():
     return current_task
 
 
-def _submit_for_retry(entry_id, email_id, to_list, global_email_context, current_exception, subtask_status, skip_retry_max=False):
+def _submit_for_retry(entry_id, email_id, to_list, global_email_context, current_exception, subtask_status,
+                      skip_retry_max=False, compact=False):
     """
     Helper function to requeue a task for retry, using the new version of arguments provided.
 
     Inputs are the same as for running a task, plus two extra indicating the state at the time of retry.
     These include the `current_exception` that the task encountered that is causing the retry attempt,
     and the `subtask_status` that is to be returned.  A third extra argument `skip_retry_max`
-    indicates whether the current retry should be subject to a maximum test.
+    indicates whether the current retry should be subject to a maximum test.  If `compact` is set,
+    the recipients of `to_list` are passed to the retry as (pk, email, profile__name) tuples.
 
     Returns a tuple of two values:
       * First value is a dict which represents current progress.  Keys are:
@@ -778,7 +887,7 @@ def _submit_for_retry(entry_id, email_id, to_list, global_email_context, current
             args=[
                 entry_id,
                 email_id,
-                to_list,
+                compact_recipients(to_list) if compact else to_list,
                 global_email_context,
                 subtask_status.to_dict(),
             ],
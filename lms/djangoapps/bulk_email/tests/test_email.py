@@ -188,6 +188,28 @@ class TestEmailSendFromDashboardMockedHtmlToText(EmailSendFromDashboardTestCase)
         """
         self.test_send_to_all()
 
+    @override_settings(BULK_EMAIL_CONNECTIONS_PER_TASK=3)
+    def test_send_to_all_concurrently(self):
+        """
+        Test that email is still sent when it's sent over several connections at once
+        """
+        self.test_send_to_all()
+
+    @override_settings(BULK_EMAIL_QUEUE_RECIPIENT_RANGES=True)
+    def test_send_to_all_by_recipient_ranges(self):
+        """
+        Test that email is still sent when subtasks are queued with ranges of recipients
+        """
+        self.test_send_to_all()
+
+    @override_settings(BULK_EMAIL_QUEUE_RECIPIENT_RANGES=True)
+    def test_no_duplicate_emails_enrolled_staff_by_recipient_ranges(self):
+        """
+        Test that no duplicate emails are sent to an enrolled course instructor when
+        subtasks are queued with ranges of recipients
+        """
+        self.test_no_duplicate_emails_enrolled_staff()
+
     def test_no_duplicate_emails_staff_instructor(self):
         """
         Test that no duplicate emails are sent to a course instructor that is
@@ -314,6 +336,13 @@ class TestEmailSendFromDashboardMockedHtmlToText(EmailSendFromDashboardTestCase)
                                 [s.email for s in added_users if s not in optouts])
         self.assertItemsEqual(outbox_contents, should_send_contents)
 
+    @override_settings(BULK_EMAIL_QUEUE_RECIPIENT_RANGES=True)
+    def test_chunked_recipient_ranges_send_numerous_emails(self):
+        """
+        Test sending a large number of emails when subtasks are queued with ranges of recipients
+        """
+        self.test_chunked_queries_send_numerous_emails()  # pylint: disable=no-value-for-parameter
+
 
 @attr('shard_1')
 @patch.dict(settings.FEATURES, {'ENABLE_INSTRUCTOR_EMAIL': True, 'REQUIRE_COURSE_EMAIL_AUTH': False})
@@ -9,6 +9,7 @@ from django.conf import settings
 from django.core.management import call_command
 from django.core.urlresolvers import reverse
 from django.db import DatabaseError
+from django.test.utils import override_settings
 import json
 from mock import patch, Mock
 from nose.plugins.attrib import attr
@@ -82,6 +83,30 @@ class TestEmailErrors(ModuleStoreTestCase):
         exc = kwargs['exc']
         self.assertIsInstance(exc, SMTPDataError)
 
+    @override_settings(BULK_EMAIL_QUEUE_RECIPIENT_RANGES=True)
+    @patch('bulk_email.tasks.get_connection', autospec=True)
+    @patch('bulk_email.tasks.send_course_email.retry')
+    def test_data_err_retry_recipient_range(self, retry, get_conn):
+        """
+        Test that the recipients of a range are retried as (pk, email, profile__name) tuples.
+        """
+        get_conn.return_value.send_messages.side_effect = SMTPDataError(455, "Throttling: Sending rate exceeded")
+        test_email = {
+            'action': 'Send email',
+            'send_to': 'myself',
+            'subject': 'test subject for myself',
+            'message': 'test message for myself'
+        }
+        response = self.client.post(self.send_mail_url, test_email)
+        self.assertEquals(json.loads(response.content), self.success_content)
+
+        self.assertTrue(retry.called)
+        (__, kwargs) = retry.call_args
+        self.assertIsInstance(kwargs['exc'], SMTPDataError)
+        self.assertEquals(
+            kwargs['args'][2], [(self.instructor.id, self.instructor.email, self.instructor.profile.name)]
+        )
+
     @patch('bulk_email.tasks.get_connection', autospec=True)
     @patch('bulk_email.tasks.update_subtask_status')
     @patch('bulk_email.tasks.send_course_email.retry')
@@ -114,6 +139,44 @@ class TestEmailErrors(ModuleStoreTestCase):
         self.assertEquals(subtask_status.failed, expected_fails)
         self.assertEquals(subtask_status.succeeded, settings.BULK_EMAIL_EMAILS_PER_TASK - expected_fails)
 
+    @override_settings(BULK_EMAIL_CONNECTIONS_PER_TASK=4)
+    @patch('bulk_email.tasks.get_connection', autospec=True)
+    @patch('bulk_email.tasks.send_course_email.retry')
+    def test_data_err_retry_concurrent(self, retry, get_conn):
+        """
+        Test that only the recipients whose messages failed are retried when
+        several messages are sent at once.
+        """
+        connections = [Mock() for __ in xrange(4)]
+        connections[1].send_messages.side_effect = SMTPDataError(455, "Throttling: Sending rate exceeded")
+        get_conn.side_effect = connections
+        students = [UserFactory() for _ in xrange(6)]
+        for student in students:
+            CourseEnrollmentFactory.create(user=student, course_id=self.course.id)
+
+        test_email = {
+            'action': 'Send email',
+            'send_to': 'all',
+            'subject': 'test subject for all',
+            'message': 'test message for all'
+        }
+        response = self.client.post(self.send_mail_url, test_email)
+        self.assertEquals(json.loads(response.content), self.success_content)
+
+        # The messages sent by the other connections aren't sent again
+        self.assertTrue(retry.called)
+        (__, kwargs) = retry.call_args
+        self.assertIsInstance(kwargs['exc'], SMTPDataError)
+        to_list = kwargs['args'][2]
+        self.assertEquals(len(to_list), 3)
+        sent_emails = [
+            connection.send_messages.call_args[0][0][0].to[0]
+            for connection in connections if connection is not connections[1]
+        ]
+        self.assertFalse(set(sent_emails) & set(recipient['email'] for recipient in to_list))
+        subtask_status = SubtaskStatus.from_dict(kwargs['args'][4])
+        self.assertEquals(subtask_status.succeeded, 3)
+
     @patch('bulk_email.tasks.get_connection', autospec=True)
     @patch('bulk_email.tasks.send_course_email.retry')
     def test_disconn_err_retry(self, retry, get_conn):
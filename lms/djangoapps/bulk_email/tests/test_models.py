@@ -127,6 +127,29 @@ class CourseEmailTemplateTest(TestCase):
             with self.assertRaises(KeyError):
                 template.render_plaintext("My new plain text.", context)
 
+    def test_compiled_messages(self):
+        user = UserFactory.create()
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        context['course_id'] = SlashSeparatedCourseKey('edX', 'course', 'run')
+        context['course_end_date'] = 'the end'
+        message = u"Dear %%USER_FULLNAME%% (%%USER_ID%%), %%COURSE_DISPLAY_NAME%% ends on %%COURSE_END_DATE%%.\n"
+        message += u"A long line. " * 100
+        recipient_context = {'name': u'Ünicode Name', 'email': user.email, 'user_id': user.id}
+
+        compiled_plaintext = template.compile_plaintext(message, context)
+        compiled_htmltext = template.compile_htmltext(message, context)
+        context.update(recipient_context)
+        self.assertEqual(compiled_plaintext.render(recipient_context), template.render_plaintext(message, context))
+        self.assertEqual(compiled_htmltext.render(recipient_context), template.render_htmltext(message, context))
+
+    def test_compile_without_context(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        del context['course_title']
+        with self.assertRaises(KeyError):
+            template.compile_htmltext("My new html text.", context)
+
     def test_render_html(self):
         template = CourseEmailTemplate.get_template()
         context = self._get_sample_html_context()
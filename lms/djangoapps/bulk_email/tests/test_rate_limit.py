@@ -0,0 +1,52 @@
+"""
+Unit tests for the rate limiting of bulk email sends
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from mock import patch
+
+from bulk_email.rate_limit import SendRateLimiter
+
+
+class SendRateLimiterTest(TestCase):
+    """Test the SendRateLimiter."""
+
+    def setUp(self):
+        super(SendRateLimiterTest, self).setUp()
+        cache.clear()
+
+    @patch('bulk_email.rate_limit.sleep')
+    def test_unlimited(self, mock_sleep):
+        rate_limiter = SendRateLimiter(0)
+        for __ in xrange(10):
+            rate_limiter.acquire()
+        self.assertFalse(mock_sleep.called)
+
+    def _mock_clock(self, now):
+        """
+        Mocks the time used by the rate limiter, starting at `now`, and returns the mock of sleep.
+        """
+        time_patcher = patch('bulk_email.rate_limit.time', return_value=now)
+        mock_time = time_patcher.start()
+        self.addCleanup(time_patcher.stop)
+        sleep_patcher = patch('bulk_email.rate_limit.sleep')
+        mock_sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+        mock_sleep.side_effect = lambda seconds: setattr(mock_time, 'return_value', mock_time.return_value + seconds)
+        return mock_sleep
+
+    def test_limited(self):
+        mock_sleep = self._mock_clock(100.25)
+        rate_limiter = SendRateLimiter(2)
+        rate_limiter.acquire()
+        rate_limiter.acquire()
+        self.assertFalse(mock_sleep.called)
+
+        rate_limiter.acquire()
+        mock_sleep.assert_called_once_with(0.75)
+
+    def test_shared(self):
+        mock_sleep = self._mock_clock(100.5)
+        SendRateLimiter(1).acquire()
+        SendRateLimiter(1).acquire()
+        mock_sleep.assert_called_once_with(0.5)
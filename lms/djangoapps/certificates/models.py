@@ -174,22 +174,50 @@ def certificate_status_for_student(student, course_id):
     try:
         generated_certificate = GeneratedCertificate.objects.get(
             user=student, course_id=course_id)
-        d = {'status': generated_certificate.status,
-             'mode': generated_certificate.mode}
-        if generated_certificate.grade:
-            d['grade'] = generated_certificate.grade
-        if generated_certificate.status == CertificateStatuses.downloadable:
-            d['download_url'] = generated_certificate.download_url
-
-        return d
     except GeneratedCertificate.DoesNotExist:
-        pass
-    return {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor}
+        generated_certificate = None
+    return _certificate_status(generated_certificate)
 
 
-def certificate_info_for_user(user, course_id, grade, user_is_whitelisted=None):
+def certificate_statuses_for_students(students, course_id):
+    """
+    Returns a dict mapping the id of each of `students` to the dictionary
+    `certificate_status_for_student` returns for them, in a single query.
+    """
+    generated_certificates = {
+        certificate.user_id: certificate
+        for certificate in GeneratedCertificate.objects.filter(user__in=students, course_id=course_id)
+    }
+    return {
+        student.id: _certificate_status(generated_certificates.get(student.id))
+        for student in students
+    }
+
+
+def _certificate_status(generated_certificate):
+    """
+    Returns the status dictionary of `certificate_status_for_student` for
+    `generated_certificate`, which is None if the student has none.
+    """
+    if generated_certificate is None:
+        return {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor}
+
+    d = {'status': generated_certificate.status,
+         'mode': generated_certificate.mode}
+    if generated_certificate.grade:
+        d['grade'] = generated_certificate.grade
+    if generated_certificate.status == CertificateStatuses.downloadable:
+        d['download_url'] = generated_certificate.download_url
+
+    return d
+
+
+def certificate_info_for_user(user, course_id, grade, user_is_whitelisted=None, certificate_status=None):
     """
     Returns the certificate info for a user for grade report.
+
+    `certificate_status` may be given if the result of
+    `certificate_status_for_student` for the user is already known.
     """
     if user_is_whitelisted is None:
         user_is_whitelisted = CertificateWhitelist.objects.filter(
@@ -201,7 +229,8 @@ def certificate_info_for_user(user, course_id, grade, user_is_whitelisted=None):
     if eligible_for_certificate:
         user_is_eligible = 'Y'
 
-        certificate_status = certificate_status_for_student(user, course_id)
+        if certificate_status is None:
+            certificate_status = certificate_status_for_student(user, course_id)
         certificate_generated = certificate_status['status'] == CertificateStatuses.downloadable
         certificate_is_delivered = 'Y' if certificate_generated else 'N'
 
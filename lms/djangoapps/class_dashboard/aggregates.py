@@ -0,0 +1,191 @@
+"""
+Maintains the pre-aggregated distributions of the Metrics tab, see models.py.
+
+A refresh recomputes the aggregates of the problems and subsections whose
+StudentModules were modified since the previous refresh (the watermark). As
+deleted StudentModules leave no trace, all the aggregates of a course are
+recomputed once every FULL_REFRESH_INTERVAL.
+
+Refreshes run in celery tasks, queued by the dashboard. Until the first one of
+a course is done, the dashboard queries the StudentModules directly.
+"""
+from datetime import timedelta
+import logging
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from courseware import models as courseware_models
+from class_dashboard.models import DistributionRefresh, ProblemGradeCount, SequentialOpenCount
+
+log = logging.getLogger(__name__)
+
+# How old the aggregates of a course may be before they are refreshed
+REFRESH_INTERVAL = timedelta(minutes=15)
+
+# How often all the aggregates of a course are recomputed
+FULL_REFRESH_INTERVAL = timedelta(days=1)
+
+# StudentModules saved by transactions that commit after a refresh may carry a
+# modification time before its watermark, so each refresh looks back this much further.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Number of problems or subsections whose aggregates are recomputed by each query
+MODULES_PER_QUERY = 500
+
+# How long a queued refresh keeps others from being queued
+REFRESH_LOCK_EXPIRE = 10 * 60
+
+
+def refresh_distributions(course_id, full=False):
+    """
+    Refreshes the aggregates of the course `course_id`, all of them if `full`
+    (or if they are due a full refresh, or have never been computed), else
+    those of the modules modified since the last refresh.
+
+    Concurrent refreshes of a course run one after the other, as each locks the
+    DistributionRefresh of the course.
+    """
+    started = timezone.now()
+    student_modules = courseware_models.StudentModule.objects.filter(
+        course_id__exact=course_id,
+        module_type__in=('problem', 'sequential'),
+    )
+
+    with transaction.commit_on_success():
+        try:
+            refresh, created = DistributionRefresh.objects.get_or_create(
+                course_id=course_id,
+                defaults={'refreshed_through': started, 'fully_refreshed_at': started},
+            )
+        except IntegrityError:
+            # Another refresh created it meanwhile, and has committed by now.
+            created = False
+        if not created:
+            refresh = DistributionRefresh.objects.select_for_update().get(course_id=course_id)
+        full = full or created or refresh.fully_refreshed_at < started - FULL_REFRESH_INTERVAL
+
+        if full:
+            module_keys = None
+            ProblemGradeCount.objects.filter(course_id=course_id).delete()
+            SequentialOpenCount.objects.filter(course_id=course_id).delete()
+            _store_aggregates(course_id, student_modules)
+            refresh.fully_refreshed_at = started
+        else:
+            module_keys = list(set(
+                student_modules.filter(
+                    modified__gte=refresh.refreshed_through - WATERMARK_OVERLAP,
+                ).values_list('module_state_key', flat=True)
+            ))
+            for start in xrange(0, len(module_keys), MODULES_PER_QUERY):
+                keys = module_keys[start:start + MODULES_PER_QUERY]
+                ProblemGradeCount.objects.filter(course_id=course_id, module_state_key__in=keys).delete()
+                SequentialOpenCount.objects.filter(course_id=course_id, module_state_key__in=keys).delete()
+                _store_aggregates(course_id, student_modules.filter(module_state_key__in=keys))
+        refresh.refreshed_through = started
+        refresh.save()
+
+    log.info(
+        u"Refreshed the class dashboard distributions of %s (%s)",
+        course_id, 'all modules' if full else u'{} modules'.format(len(module_keys))
+    )
+
+
+def _store_aggregates(course_id, student_modules):
+    """
+    Stores the aggregates of the StudentModules `student_modules`, with the
+    same queries the dashboard used to run.
+    """
+    grade_rows = student_modules.filter(
+        grade__isnull=False,
+        module_type__exact="problem",
+    ).values('module_state_key', 'grade', 'max_grade').annotate(count_grade=Count('grade'))
+    ProblemGradeCount.objects.bulk_create([
+        ProblemGradeCount(
+            course_id=course_id,
+            module_state_key=row['module_state_key'],
+            grade=row['grade'],
+            max_grade=row['max_grade'],
+            count=row['count_grade'],
+        )
+        for row in grade_rows
+    ])
+
+    sequential_rows = student_modules.filter(
+        module_type__exact="sequential",
+    ).values('module_state_key').annotate(count_sequential=Count('module_state_key'))
+    SequentialOpenCount.objects.bulk_create([
+        SequentialOpenCount(
+            course_id=course_id,
+            module_state_key=row['module_state_key'],
+            count=row['count_sequential'],
+        )
+        for row in sequential_rows
+    ])
+
+
+def ensure_distributions(course_id):
+    """
+    Returns whether the aggregates of the course `course_id` can be served.
+
+    Queues a refresh of the aggregates if they have never been computed, in
+    which case they can't be served until it's done, or if they are older than
+    REFRESH_INTERVAL, in which case the current ones are served meanwhile.
+    """
+    try:
+        refresh = DistributionRefresh.objects.get(course_id=course_id)
+    except DistributionRefresh.DoesNotExist:
+        _queue_refresh(course_id)
+        return False
+
+    if refresh.refreshed_through < timezone.now() - REFRESH_INTERVAL:
+        _queue_refresh(course_id)
+    return True
+
+
+def _queue_refresh(course_id):
+    """
+    Queues a refresh of the aggregates of the course `course_id`, unless one
+    was queued less than REFRESH_LOCK_EXPIRE ago.
+    """
+    # Import here to avoid circular import.
+    from class_dashboard.tasks import refresh_class_dashboard_distributions
+
+    # cache.add fails if the key already exists
+    if cache.add(u'class-dashboard-refresh-{}'.format(course_id), 'true', REFRESH_LOCK_EXPIRE):
+        refresh_class_dashboard_distributions.delay(unicode(course_id))
+
+
+def problem_grade_rows(course_id, problem_set=None):
+    """
+    Returns the aggregated rows of the grades of the problems of the course
+    `course_id` (only those in `problem_set` if it's given), like the
+    StudentModule GROUP BY query: dicts of 'module_state_key', 'grade',
+    'max_grade' and 'count_grade'.
+    """
+    counts = ProblemGradeCount.objects.filter(course_id__exact=course_id)
+    if problem_set is not None:
+        counts = counts.filter(module_state_key__in=problem_set).order_by('module_state_key', 'grade')
+    return [
+        {
+            'module_state_key': row['module_state_key'],
+            'grade': row['grade'],
+            'max_grade': row['max_grade'],
+            'count_grade': row['count'],
+        }
+        for row in counts.values('module_state_key', 'grade', 'max_grade', 'count')
+    ]
+
+
+def sequential_open_rows(course_id):
+    """
+    Returns the aggregated rows of the subsections of the course `course_id`
+    opened by students, like the StudentModule GROUP BY query: dicts of
+    'module_state_key' and 'count_sequential'.
+    """
+    return [
+        {'module_state_key': row['module_state_key'], 'count_sequential': row['count']}
+        for row in SequentialOpenCount.objects.filter(course_id__exact=course_id).values('module_state_key', 'count')
+    ]
@@ -0,0 +1,54 @@
+import logging
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore.django import modulestore
+
+from class_dashboard.tasks import refresh_class_dashboard_distributions
+
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Refreshes the pre-aggregated Metrics tab distributions, e.g. before enabling
+    FEATURES['ENABLE_CLASS_DASHBOARD_AGGREGATES'], or periodically from cron.
+    """
+    args = '<course_id course_id ...>'
+    help = 'Refreshes the class dashboard distributions of one or more courses.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--all',
+                    action='store_true',
+                    default=False,
+                    help='Refresh the distributions of all courses.'),
+        make_option('--full',
+                    action='store_true',
+                    default=False,
+                    help='Recompute all the distributions, not only those of the modules modified since the last '
+                         'refresh.'),
+    )
+
+    def handle(self, *args, **options):
+
+        if options['all']:
+            course_keys = [course.id for course in modulestore().get_courses()]
+        else:
+            course_keys = [CourseKey.from_string(arg) for arg in args]
+
+        if not course_keys:
+            log.fatal('No courses specified.')
+            return
+
+        log.info('Refreshing class dashboard distributions for %d courses.', len(course_keys))
+
+        for course_key in course_keys:
+            try:
+                refresh_class_dashboard_distributions.apply([unicode(course_key)], {'full': options['full']})
+            except Exception as ex:  # pylint: disable=broad-except
+                log.exception('An error occurred while refreshing the distributions of %s: %s',
+                              unicode(course_key), ex.message)
+
+        log.info('Finished refreshing class dashboard distributions.')
@@ -0,0 +1,42 @@
+"""
+Pre-aggregated copies of the distributions shown on the Metrics tab of the
+instructor dashboard, so that the dashboard doesn't run GROUP BY queries over
+all the StudentModules of a course on each page load.
+
+The aggregates of a course are refreshed from the StudentModules modified since
+the last refresh, see `class_dashboard.aggregates`.
+"""
+from django.db import models
+
+from xmodule_django.models import CourseKeyField, UsageKeyField
+
+
+class ProblemGradeCount(models.Model):
+    """
+    The number of students with a given grade (out of a given max_grade) on a problem.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_state_key = UsageKeyField(max_length=255, db_index=True, db_column='module_id')
+    grade = models.FloatField()
+    max_grade = models.FloatField(null=True)
+    count = models.IntegerField()
+
+
+class SequentialOpenCount(models.Model):
+    """
+    The number of students who opened a subsection.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    module_state_key = UsageKeyField(max_length=255, db_index=True, db_column='module_id')
+    count = models.IntegerField()
+
+
+class DistributionRefresh(models.Model):
+    """
+    When the aggregates of a course were last refreshed.
+    """
+    course_id = CourseKeyField(max_length=255, unique=True)
+    # The aggregates account for the StudentModules modified before this time
+    refreshed_through = models.DateTimeField()
+    # The last time all the aggregates of the course were recomputed
+    fully_refreshed_at = models.DateTimeField()
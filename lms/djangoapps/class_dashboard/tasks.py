@@ -0,0 +1,31 @@
+"""
+Celery tasks of the class dashboard.
+"""
+import logging
+
+from celery.task import task
+from opaque_keys.edx.keys import CourseKey
+
+
+log = logging.getLogger('edx.celery.task')
+
+
+@task(name=u'class_dashboard.tasks.refresh_class_dashboard_distributions')
+def refresh_class_dashboard_distributions(course_key, full=False):
+    """
+    Refreshes the pre-aggregated Metrics tab distributions of the specified course.
+    """
+    # Import here to avoid circular import.
+    from class_dashboard.aggregates import refresh_distributions
+
+    # Callers pass the course key as a Unicode string, as CourseLocators aren't JSON-serializable.
+    if not isinstance(course_key, basestring):
+        raise ValueError('course_key must be a string. {} is not acceptable.'.format(type(course_key)))
+
+    course_key = CourseKey.from_string(course_key)
+
+    try:
+        refresh_distributions(course_key, full=full)
+    except Exception as ex:
+        log.exception('An error occurred while refreshing the distributions of course %s: %s', course_key, ex.message)
+        raise
@@ -0,0 +1,149 @@
+"""
+Tests for the pre-aggregated distributions of the class dashboard.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+from mock import patch
+from nose.plugins.attrib import attr
+
+from courseware.models import StudentModule
+from courseware.tests.factories import StudentModuleFactory
+from student.tests.factories import UserFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+
+from class_dashboard.aggregates import ensure_distributions, refresh_distributions, REFRESH_INTERVAL
+from class_dashboard.dashboard_data import (
+    get_problem_grade_distribution, get_problem_set_grade_distrib, get_sequential_open_distrib,
+)
+from class_dashboard.models import DistributionRefresh
+
+USER_COUNT = 5
+
+
+@attr('shard_1')
+class TestDistributionAggregates(ModuleStoreTestCase):
+    """
+    Tests of the aggregates served when ENABLE_CLASS_DASHBOARD_AGGREGATES is on.
+    """
+    def setUp(self):
+        super(TestDistributionAggregates, self).setUp()
+        self.course = CourseFactory.create()
+        section = ItemFactory.create(parent_location=self.course.location, category="chapter")
+        self.sub_section = ItemFactory.create(parent_location=section.location, category="sequential")
+        unit = ItemFactory.create(parent_location=self.sub_section.location, category="vertical")
+        self.problems = [ItemFactory.create(parent_location=unit.location, category="problem") for __ in range(2)]
+        self.users = [UserFactory.create() for __ in xrange(USER_COUNT)]
+        for i, user in enumerate(self.users):
+            for problem in self.problems:
+                StudentModuleFactory.create(
+                    grade=i % 2,
+                    max_grade=1,
+                    student=user,
+                    course_id=self.course.id,
+                    module_state_key=problem.location,
+                )
+            StudentModuleFactory.create(
+                student=user,
+                course_id=self.course.id,
+                module_type='sequential',
+                module_state_key=self.sub_section.location,
+            )
+        # The StudentModules are older than the watermarks of the refreshes.
+        StudentModule.objects.filter(course_id=self.course.id).update(modified=timezone.now() - timedelta(hours=1))
+
+    def _distributions(self):
+        """
+        Returns the distributions served by the dashboard.
+        """
+        return (
+            get_problem_grade_distribution(self.course.id),
+            get_sequential_open_distrib(self.course.id),
+            get_problem_set_grade_distrib(self.course.id, [problem.location for problem in self.problems]),
+        )
+
+    def _aggregated_distributions(self):
+        """
+        Returns the distributions served from the aggregates.
+        """
+        with patch.dict(settings.FEATURES, {'ENABLE_CLASS_DASHBOARD_AGGREGATES': True}):
+            return self._distributions()
+
+    def _assert_same_distributions(self):
+        """
+        Asserts that the aggregates match the StudentModules.
+        """
+        (grades, counts), opened, problem_set_grades = self._aggregated_distributions()
+        (expected_grades, expected_counts), expected_opened, expected_problem_set_grades = self._distributions()
+        for problem in expected_grades:
+            expected_grades[problem]['grade_distrib'].sort()
+            grades[problem]['grade_distrib'].sort()
+        self.assertEqual(grades, expected_grades)
+        self.assertEqual(counts, expected_counts)
+        self.assertEqual(opened, expected_opened)
+        self.assertEqual(problem_set_grades, expected_problem_set_grades)
+
+    @patch('class_dashboard.tasks.refresh_class_dashboard_distributions.delay')
+    def test_computed_in_background_on_first_use(self, mock_refresh):
+        # The StudentModules are queried directly until the aggregates are computed.
+        self._assert_same_distributions()
+        self.assertFalse(DistributionRefresh.objects.filter(course_id=self.course.id).exists())
+        mock_refresh.assert_called_once_with(unicode(self.course.id))
+
+        refresh_distributions(self.course.id)
+        self._assert_same_distributions()
+        self.assertTrue(DistributionRefresh.objects.filter(course_id=self.course.id).exists())
+
+    def test_concurrent_first_refresh(self):
+        refresh_distributions(self.course.id)
+        # Another refresh created the DistributionRefresh after this one looked for it.
+        with patch.object(DistributionRefresh.objects, 'get_or_create', side_effect=IntegrityError):
+            refresh_distributions(self.course.id)
+        self.assertEqual(DistributionRefresh.objects.filter(course_id=self.course.id).count(), 1)
+        self._assert_same_distributions()
+
+    def test_incremental_refresh(self):
+        refresh_distributions(self.course.id)
+        StudentModule.objects.filter(student=self.users[0], module_type='problem').update(
+            grade=1, modified=timezone.now()
+        )
+        StudentModuleFactory.create(
+            course_id=self.course.id,
+            module_type='sequential',
+            module_state_key=self.sub_section.location,
+        )
+
+        # The aggregates are only refreshed when they are due.
+        __, opened, __ = self._aggregated_distributions()
+        self.assertEqual(opened[self.sub_section.location], USER_COUNT)
+
+        refresh_distributions(self.course.id)
+        self._assert_same_distributions()
+
+    def test_full_refresh(self):
+        refresh_distributions(self.course.id)
+        StudentModule.objects.filter(student=self.users[0]).delete()
+
+        # Deleted StudentModules are only accounted for by full refreshes.
+        refresh_distributions(self.course.id)
+        __, opened, __ = self._aggregated_distributions()
+        self.assertEqual(opened[self.sub_section.location], USER_COUNT)
+
+        refresh_distributions(self.course.id, full=True)
+        self._assert_same_distributions()
+
+    @patch('class_dashboard.tasks.refresh_class_dashboard_distributions.delay')
+    def test_stale_distributions_refreshed_in_background(self, mock_refresh):
+        refresh_distributions(self.course.id)
+        self.assertTrue(ensure_distributions(self.course.id))
+        self.assertFalse(mock_refresh.called)
+
+        DistributionRefresh.objects.filter(course_id=self.course.id).update(
+            refreshed_through=timezone.now() - REFRESH_INTERVAL - timedelta(minutes=1)
+        )
+        ensure_distributions(self.course.id)
+        ensure_distributions(self.course.id)
+        mock_refresh.assert_called_once_with(unicode(self.course.id))
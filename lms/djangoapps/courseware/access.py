@@ -19,23 +19,23 @@ from xmodule.course_module import (
     CourseDescriptor, CATALOG_VISIBILITY_CATALOG_AND_ABOUT,
     CATALOG_VISIBILITY_ABOUT)
 from xmodule.error_module import ErrorDescriptor
+from xmodule.modulestore.django import modulestore
 from xmodule.x_module import XModule, DEPRECATION_VSCOMPAT_EVENT
 from xmodule.split_test_module import get_split_user_partitions
 from xmodule.partitions.partitions import NoSuchUserPartitionError, NoSuchUserPartitionGroupError
 from xmodule.util.django import get_current_request_hostname
 
 from external_auth.models import ExternalAuthMap
+from courseware import access_cache
 from courseware.masquerade import get_masquerade_role, is_masquerading_as_student
 from student import auth
 from student.models import CourseEnrollment, CourseEnrollmentAllowed
-from student.roles import (
-    GlobalStaff, CourseStaffRole, CourseInstructorRole,
-    OrgStaffRole, OrgInstructorRole, CourseBetaTesterRole
-)
+from student.roles import CourseBetaTesterRole, CourseRoleSnapshot, GlobalStaff
 from util.milestones_helpers import (
     get_pre_requisite_courses_not_completed,
     any_unfulfilled_milestones,
 )
+from openedx.core.djangoapps.content.course_summaries.models import CourseSummary
 
 import dogstats_wrapper as dog_stats_api
 
@@ -84,11 +84,54 @@ def has_access(user, action, obj, course_key=None):
     if not user:
         user = AnonymousUser()
 
+    decision_key = _access_decision_key(user, action, obj, course_key)
+    if decision_key is not None:
+        return access_cache.get_access_decision(
+            user, decision_key, lambda: _has_access(user, action, obj, course_key)
+        )
+    return _has_access(user, action, obj, course_key)
+
+
+# ================ Implementation helpers ================================
+def _access_decision_key(user, action, obj, course_key):
+    """
+    Returns the key of the decision of has_access(user, action, obj, course_key)
+    in the access decision caches, or None if it isn't cached: when the caches
+    are disabled, when the user is masquerading (the masquerade is set up in the
+    course of the request) or when obj is of an unknown type.
+    """
+    if not settings.FEATURES.get('ENABLE_ACCESS_DECISION_CACHE') or getattr(user, 'masquerade_settings', None):
+        return None
+
+    if isinstance(obj, CourseDescriptor):
+        obj_type, obj_key = 'course', obj.id
+    elif isinstance(obj, CourseSummary):
+        obj_type, obj_key = 'summary', obj.course_id
+    elif isinstance(obj, ErrorDescriptor):
+        obj_type, obj_key = 'error', obj.location
+    elif isinstance(obj, (XModule, XBlock)):
+        # XModules are checked like their descriptors
+        obj_type, obj_key = 'block', obj.location
+    elif isinstance(obj, (CourseKey, UsageKey, basestring)):
+        obj_type, obj_key = 'key', obj
+    else:
+        return None
+
+    return u'{}.{}.{}.{}.{}'.format(action, obj_type, obj_key, course_key, bool(in_preview_mode()))
+
+
+def _has_access(user, action, obj, course_key):
+    """
+    Check whether a user has the access to do action on obj, see has_access.
+    """
     # delegate the work to type-specific functions.
     # (start with more specific types, then get more general)
     if isinstance(obj, CourseDescriptor):
         return _has_access_course_desc(user, action, obj)
 
+    if isinstance(obj, CourseSummary):
+        return _has_access_course_summary(user, action, obj)
+
     if isinstance(obj, ErrorDescriptor):
         return _has_access_error_desc(user, action, obj, course_key)
 
@@ -114,7 +157,6 @@ def has_access(user, action, obj, course_key=None):
                     .format(type(obj)))
 
 
-# ================ Implementation helpers ================================
 def _has_access_course_desc(user, action, course):
     """
     Check if user has access to a course descriptor.
@@ -307,6 +349,22 @@ def _has_access_course_desc(user, action, course):
     return _dispatch(checkers, action, user, course)
 
 
+def _has_access_course_summary(user, action, summary):
+    """
+    Check if user has access to a course, given its CourseSummary.
+
+    The summary has the course settings the checks of _has_access_course_desc
+    read, except for the group access settings of the course: if the course
+    restricts access to some groups of users, it is loaded from the modulestore.
+    """
+    if summary.has_group_access:
+        course = modulestore().get_course(summary.id, depth=0)
+        if course is None:
+            return False
+        return has_access(user, action, course)
+    return _has_access_course_desc(user, action, summary)
+
+
 def _has_access_error_desc(user, action, descriptor, course_key):
     """
     Only staff should see error descriptors.
@@ -570,7 +628,7 @@ def _adjust_start_date_for_beta_testers(user, descriptor, course_key=None):  # p
         # bail early if no beta testing is set up
         return descriptor.start
 
-    if CourseBetaTesterRole(course_key).has_user(user):
+    if CourseRoleSnapshot.get(user, course_key).is_beta_tester:
         debug("Adjust start time: user in beta role for %s", descriptor)
         delta = timedelta(descriptor.days_early_for_beta)
         effective = descriptor.start - delta
@@ -607,7 +665,9 @@ def _has_access_to_course(user, access_level, course_key):
     if is_masquerading_as_student(user, course_key):
         return False
 
-    if GlobalStaff().has_user(user):
+    roles = CourseRoleSnapshot.get(user, course_key)
+
+    if roles.is_global_staff:
         debug("Allow: user.is_staff")
         return True
 
@@ -616,21 +676,11 @@ def _has_access_to_course(user, access_level, course_key):
         debug("Deny: unknown access level")
         return False
 
-    staff_access = (
-        CourseStaffRole(course_key).has_user(user) or
-        OrgStaffRole(course_key.org).has_user(user)
-    )
-
-    if staff_access and access_level == 'staff':
+    if roles.is_staff and access_level == 'staff':
         debug("Allow: user has course staff access")
         return True
 
-    instructor_access = (
-        CourseInstructorRole(course_key).has_user(user) or
-        OrgInstructorRole(course_key.org).has_user(user)
-    )
-
-    if instructor_access and access_level in ('staff', 'instructor'):
+    if roles.is_instructor and access_level in ('staff', 'instructor'):
         debug("Allow: user has course instructor access")
         return True
 
@@ -692,3 +742,68 @@ def in_preview_mode():
     """
     hostname = get_current_request_hostname()
     return hostname and settings.PREVIEW_DOMAIN in hostname.split('.')
+
+
+def filter_accessible_index_entries(user, course, entries):
+    """
+    Returns the entries of `entries` which `user` may load, checked like
+    has_access(user, 'load', descriptor, course.id) checks the descriptors.
+
+    The entries of the indexes of the descriptors of `course` stand in for the
+    descriptors: they have their start, days_early_for_beta and
+    visible_to_staff_only values, and their group_access rules as returned by
+    util.module_utils.restricted_group_access.
+    """
+    now = datetime.now(UTC())
+    ignore_start_dates = settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user, course.id)
+    preview = in_preview_mode()
+    partitions = {partition.id: partition for partition in course.user_partitions}
+    # The checks of the user which don't depend on the entry, made on first use
+    checks = {}
+    user_groups = {}
+
+    def has_staff_access():  # pylint: disable=missing-docstring
+        if 'staff' not in checks:
+            checks['staff'] = has_access(user, 'staff', course)
+        return checks['staff']
+
+    def is_beta_tester():  # pylint: disable=missing-docstring
+        if 'beta_tester' not in checks:
+            checks['beta_tester'] = CourseRoleSnapshot.get(user, course.id).is_beta_tester
+        return checks['beta_tester']
+
+    def has_group_access(group_access):
+        """
+        Returns whether the user is in the groups allowed by each partition of `group_access`.
+        """
+        if False in group_access.values():
+            return False
+        for partition_id, group_ids in group_access.items():
+            partition = partitions.get(partition_id)
+            if partition is None or not set(group_ids) <= set(group.id for group in partition.groups):
+                log.warning("Unknown group in the access rules of an index entry, access will be denied.")
+                return False
+        for partition_id, group_ids in group_access.items():
+            if not group_ids:
+                continue
+            if partition_id not in user_groups:
+                partition = partitions[partition_id]
+                group = partition.scheme.get_group_for_user(course.id, user, partition)
+                user_groups[partition_id] = group.id if group is not None else None
+            if user_groups[partition_id] not in group_ids:
+                return False
+        return True
+
+    def can_load(entry):  # pylint: disable=missing-docstring
+        if entry.visible_to_staff_only and not has_staff_access():
+            return False
+        if entry.group_access is not None and not has_group_access(entry.group_access):
+            return has_staff_access()
+        if ignore_start_dates or entry.start is None:
+            return True
+        start = entry.start
+        if entry.days_early_for_beta is not None and is_beta_tester():
+            start -= timedelta(entry.days_early_for_beta)
+        return preview or now > start or has_staff_access()
+
+    return [entry for entry in entries if can_load(entry)]
@@ -0,0 +1,171 @@
+"""
+Caches of the decisions of `courseware.access.has_access`.
+
+Decisions are memoized for the duration of the request, and when
+ACCESS_DECISION_CACHE_TIMEOUT is set, for that many seconds across requests in
+the django cache. The entries of a user are keyed by a version which is
+replaced whenever the user, their CourseAccessRoles or their CourseEnrollments
+are saved or deleted, which invalidates them. So do the changes to the groups
+which the group_access settings of blocks refer to: the membership of their
+cohorts (and other CourseUserGroups), the partition groups those are linked to,
+and the random partition groups users are assigned to (UserCourseTags).
+
+Changes to course content, such as a new group_access setting on a block, or
+the passing of start dates are only picked up by the cross-request cache when
+its entries expire. So are the groups of user partition schemes which don't
+store their assignments in those models.
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from openedx.core.djangoapps.course_groups.models import CourseUserGroup, CourseUserGroupPartitionGroup
+from openedx.core.djangoapps.user_api.models import UserCourseTag
+from request_cache.middleware import RequestCache
+from student.models import CourseAccessRole, CourseEnrollment
+
+import dogstats_wrapper as dog_stats_api
+
+# Keys of the decisions and of the versions memoized in the request cache, by user id
+REQUEST_CACHE_KEY = 'courseware.access.decisions'
+REQUEST_CACHE_VERSIONS_KEY = 'courseware.access.versions'
+
+# How long the version of a user's entries is kept in the django cache
+VERSION_TIMEOUT = 24 * 60 * 60
+
+
+def _version_cache_key(user_id):
+    """
+    Returns the django cache key of the version of the entries of the user `user_id`.
+    """
+    return u'courseware.access.version.{}'.format(user_id)
+
+
+def _request_data():
+    """
+    Returns the data of the request cache, or None outside of requests.
+    """
+    request_cache = RequestCache.get_request_cache()
+    if getattr(request_cache, 'request', None) is None:
+        return None
+    return request_cache.data
+
+
+def _user_version(user_id, request_data):
+    """
+    Returns the version of the entries of the user `user_id` in the django
+    cache, memoized in `request_data` if it's not None.
+    """
+    versions = request_data.setdefault(REQUEST_CACHE_VERSIONS_KEY, {}) if request_data is not None else {}
+    if user_id not in versions:
+        version_key = _version_cache_key(user_id)
+        version = cache.get(version_key)
+        if version is None:
+            version = uuid4().hex
+            # cache.add fails if another process created the version meanwhile
+            if not cache.add(version_key, version, VERSION_TIMEOUT):
+                version = cache.get(version_key) or version
+        versions[user_id] = version
+    return versions[user_id]
+
+
+def get_access_decision(user, decision_key, compute_decision):
+    """
+    Returns the access decision of `user` identified by `decision_key`, from
+    the caches if it's there, else from `compute_decision()`, which is cached.
+    """
+    user_id = user.id
+    request_data = _request_data()
+    decisions = None
+    if request_data is not None:
+        decisions = request_data.setdefault(REQUEST_CACHE_KEY, {}).setdefault(user_id, {})
+    if decisions is not None and decision_key in decisions:
+        dog_stats_api.increment('courseware.access.cache', tags=['result:request_hit'])
+        return decisions[decision_key]
+
+    timeout = settings.ACCESS_DECISION_CACHE_TIMEOUT
+    if timeout:
+        cache_key = u'courseware.access.{}.{}.{}'.format(user_id, _user_version(user_id, request_data), decision_key)
+        decision = cache.get(cache_key)
+        if decision is not None:
+            dog_stats_api.increment('courseware.access.cache', tags=['result:hit'])
+            if decisions is not None:
+                decisions[decision_key] = decision
+            return decision
+
+    dog_stats_api.increment('courseware.access.cache', tags=['result:miss'])
+    decision = compute_decision()
+    if decisions is not None:
+        decisions[decision_key] = decision
+    if timeout:
+        cache.set(cache_key, decision, timeout)
+    return decision
+
+
+def invalidate_access_decisions(user_id):
+    """
+    Invalidates the cached access decisions of the user `user_id`.
+    """
+    request_data = _request_data()
+    if request_data is not None:
+        request_data.get(REQUEST_CACHE_KEY, {}).pop(user_id, None)
+        request_data.get(REQUEST_CACHE_VERSIONS_KEY, {}).pop(user_id, None)
+    if settings.ACCESS_DECISION_CACHE_TIMEOUT:
+        cache.set(_version_cache_key(user_id), uuid4().hex, VERSION_TIMEOUT)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_access_decisions_of_user(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the cached access decisions of a user when it's saved, as
+    its is_staff flag may have changed.
+    """
+    invalidate_access_decisions(instance.id)
+
+
+@receiver(post_save, sender=CourseAccessRole)
+@receiver(post_delete, sender=CourseAccessRole)
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+@receiver(post_save, sender=UserCourseTag)
+@receiver(post_delete, sender=UserCourseTag)
+def invalidate_access_decisions_of_role_user(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the cached access decisions of the user of a CourseAccessRole,
+    a CourseEnrollment or a UserCourseTag when it changes.
+    """
+    invalidate_access_decisions(instance.user_id)
+
+
+@receiver(m2m_changed, sender=CourseUserGroup.users.through)
+def invalidate_access_decisions_of_group_members(sender, instance, action, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the cached access decisions of the users added to or removed
+    from a CourseUserGroup, e.g. a cohort.
+    """
+    reverse = kwargs['reverse']
+    if action in ('post_add', 'post_remove'):
+        user_ids = [instance.id] if reverse else kwargs['pk_set']
+    elif action == 'pre_clear':
+        user_ids = [instance.id] if reverse else instance.users.values_list('id', flat=True)
+    else:
+        return
+    for user_id in user_ids:
+        invalidate_access_decisions(user_id)
+
+
+@receiver(post_save, sender=CourseUserGroupPartitionGroup)
+@receiver(post_delete, sender=CourseUserGroupPartitionGroup)
+def invalidate_access_decisions_of_linked_group(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the cached access decisions of the members of a CourseUserGroup
+    when the partition group it's linked to changes.
+    """
+    user_ids = User.objects.filter(course_groups__id=instance.course_user_group_id).values_list('id', flat=True)
+    for user_id in user_ids:
+        invalidate_access_decisions(user_id)
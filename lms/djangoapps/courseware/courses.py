@@ -23,6 +23,7 @@ from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module
 from student.models import CourseEnrollment
 import branding
+from openedx.core.djangoapps.content.course_summaries.models import CourseSummary
 
 from opaque_keys.edx.keys import UsageKey
 
@@ -122,6 +123,8 @@ def get_opt_course_with_access(user, action, course_key):
 def course_image_url(course):
     """Try to look up the image url for the course.  If it's not found,
     log an error and return the dead link"""
+    if isinstance(course, CourseSummary):
+        return course.course_image_url
     if course.static_asset_path or modulestore().get_modulestore_type(course.id) == ModuleStoreEnum.Type.xml:
         # If we are a static course with the course_image attribute
         # set different than the default, return that path so that
@@ -181,6 +184,9 @@ def get_course_about_section(course, section_key):
     - faq
     - more_info
     - ocw_links
+
+    `course` may be a CourseSummary, in which case the course is loaded for
+    the sections other than title, university and number.
     """
 
     # Many of these are stored as html files instead of some semantic
@@ -194,6 +200,11 @@ def get_course_about_section(course, section_key):
                        'number', 'instructors', 'overview',
                        'effort', 'end_date', 'prerequisites', 'ocw_links']:
 
+        if isinstance(course, CourseSummary):
+            # The about sections are blocks of the course, which a summary
+            # doesn't hold.
+            course = get_course(course.id)
+
         try:
 
             request = get_request_for_thread()
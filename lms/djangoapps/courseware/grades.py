@@ -7,7 +7,7 @@ import logging
 
 from contextlib import contextmanager
 from django.conf import settings
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.test.client import RequestFactory
 
 import dogstats_wrapper as dog_stats_api
@@ -20,11 +20,12 @@ from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import StudentModule, StudentSubsectionGrade, chunks, usage_key_string
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
+from submissions.models import ScoreSummary
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 
 
 log = logging.getLogger("edx.courseware")
@@ -122,16 +123,16 @@ def answer_distributions(course_key):
 
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, bulk_data=None):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(student, request, course, keep_raw_scores, bulk_data)
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, bulk_data=None):
     """
     Unwrapped version of "grade"
 
@@ -150,6 +151,9 @@ def _grade(student, request, course, keep_raw_scores):
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
 
+    If `bulk_data` (a BulkGradingData loaded for a group of students including
+    this one) is given, scores are read from it instead of being queried.
+
     More information on the format is in the docstring for CourseGrader.
     """
     grading_context = course.grading_context
@@ -158,9 +162,27 @@ def _grade(student, request, course, keep_raw_scores):
     # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
     # scores that were registered with the submissions API, which for the moment
     # means only openassessment (edx-ora2)
-    submissions_scores = sub_api.get_scores(
-        course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+    if bulk_data is not None:
+        submissions_scores = bulk_data.submissions_scores[student.id]
+    else:
+        submissions_scores = sub_api.get_scores(
+            course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
+        )
+    student_modules = bulk_data.student_modules[student.id] if bulk_data is not None else None
+
+    # Previously computed subsection scores, keyed by subsection location string.
+    persist_grades = (
+        settings.FEATURES.get('ENABLE_PERSISTENT_SUBSECTION_GRADES') and not settings.GENERATE_PROFILE_SCORES
     )
+    stored_grades = {}
+    if persist_grades and bulk_data is not None:
+        stored_grades = bulk_data.stored_grades[student.id]
+    elif persist_grades:
+        with manual_transaction():
+            stored_grades = {
+                usage_key_string(stored.usage_key): stored
+                for stored in StudentSubsectionGrade.objects.filter(student=student, course_id=course.id)
+            }
 
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
@@ -187,57 +209,47 @@ def _grade(student, request, course, keep_raw_scores):
                     for descriptor in section['xmoduledescriptors']
                 )
 
-            if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
-
-            # If we haven't seen a single problem in the section, we don't have
-            # to grade it at all! We can assume 0%
-            if should_grade_section:
-                scores = []
-
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
+            # Sections graded through the two checks above change without any
+            # StudentModule being saved, so only the others can be persisted.
+            content_version = _section_content_version(section_descriptor)
+            use_stored_grade = persist_grades and not should_grade_section and content_version is not None
+            stored_grade = None
+            if use_stored_grade:
+                stored_grade = stored_grades.get(usage_key_string(section_descriptor.location))
+
+            if stored_grade is not None and not stored_grade.dirty and stored_grade.content_version == content_version:
+                should_grade_section = stored_grade.attempted
+                scores = _deserialize_scores(stored_grade.scores, course.id)
+            else:
+                if not should_grade_section and student_modules is not None:
+                    should_grade_section = any(
+                        usage_key_string(descriptor.location) in student_modules
+                        for descriptor in section['xmoduledescriptors']
+                    )
+                elif not should_grade_section:
                     with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
-
-                    (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
+                        should_grade_section = StudentModule.objects.filter(
+                            student=student,
+                            module_state_key__in=[
+                                descriptor.location for descriptor in section['xmoduledescriptors']
+                            ]
+                        ).exists()
+
+                # If we haven't seen a single problem in the section, we don't have
+                # to grade it at all! We can assume 0%
+                if should_grade_section:
+                    scores = _grade_section(
+                        student, request, course, section_descriptor, submissions_scores, student_modules
                     )
-                    if correct is None and total is None:
-                        continue
+                else:
+                    scores = []
 
-                    if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
-
-                    graded = module_descriptor.graded
-                    if not total > 0:
-                        # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
-
-                    scores.append(
-                        Score(
-                            correct,
-                            total,
-                            graded,
-                            module_descriptor.display_name_with_default,
-                            module_descriptor.location
-                        )
+                if use_stored_grade:
+                    _store_section_grade(
+                        student, course, section, content_version, should_grade_section, scores, stored_grade
                     )
 
+            if should_grade_section:
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
@@ -273,6 +285,121 @@ def _grade(student, request, course, keep_raw_scores):
     return grade_summary
 
 
+def _grade_section(student, request, course, section_descriptor, submissions_scores, student_modules=None):
+    """
+    Return the list of Scores of every scored module of the section for the student.
+
+    `student_modules` is an optional preloaded dict of the student's
+    StudentModules by location, see `get_score`.
+    """
+    scores = []
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        with manual_transaction():
+            field_data_cache = FieldDataCache([descriptor], course.id, student)
+        return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
+
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+
+        (correct, total) = get_score(
+            course.id, student, module_descriptor, create_module,
+            scores_cache=submissions_scores, student_modules=student_modules
+        )
+        if correct is None and total is None:
+            continue
+
+        if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
+            if total > 1:
+                correct = random.randrange(max(total - 2, 1), total + 1)
+            else:
+                correct = total
+
+        graded = module_descriptor.graded
+        if not total > 0:
+            # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+            graded = False
+
+        scores.append(
+            Score(
+                correct,
+                total,
+                graded,
+                module_descriptor.display_name_with_default,
+                module_descriptor.location
+            )
+        )
+    return scores
+
+
+def _section_content_version(section_descriptor):
+    """
+    Return a string identifying the current content of the section, or None if
+    the modulestore doesn't track edits (in which case grades aren't persisted).
+    """
+    edited_on = getattr(section_descriptor, 'subtree_edited_on', None)
+    return edited_on.isoformat() if edited_on is not None else None
+
+
+def _deserialize_scores(serialized_scores, course_id):
+    """
+    Return the list of Scores stored in a StudentSubsectionGrade.
+
+    The stored keys carry no run (old mongo) or branch/version (split), so they
+    are mapped into `course_id` to compare equal to the descriptors' locations.
+    """
+    return [
+        Score(earned, possible, graded, display_name, UsageKey.from_string(module_id).map_into_course(course_id))
+        for earned, possible, graded, display_name, module_id in json.loads(serialized_scores)
+    ]
+
+
+def _store_section_grade(student, course, section, content_version, attempted, scores, stored_grade):
+    """
+    Create or update the StudentSubsectionGrade of the student for the section.
+
+    An existing row is only overwritten if it hasn't been marked dirty since it
+    was read, so a score change racing with this computation isn't lost.
+    """
+    section_descriptor = section['section_descriptor']
+    values = {
+        'content_version': content_version,
+        'module_keys': StudentSubsectionGrade.serialize_module_keys(
+            [descriptor.location for descriptor in section['xmoduledescriptors']]
+        ),
+        'attempted': attempted,
+        'scores': json.dumps([
+            [score.earned, score.possible, score.graded, score.section, unicode(score.module_id)]
+            for score in scores
+        ]),
+        'dirty': False,
+    }
+    with manual_transaction():
+        if stored_grade is None:
+            # The insert runs in a savepoint so that losing the race with
+            # another process storing the same grade doesn't abort (and log)
+            # the whole transaction.
+            savepoint = transaction.savepoint()
+            try:
+                StudentSubsectionGrade.objects.create(
+                    student=student,
+                    course_id=course.id,
+                    usage_key=section_descriptor.location,
+                    **values
+                )
+            except IntegrityError:
+                transaction.savepoint_rollback(savepoint)
+            else:
+                transaction.savepoint_commit(savepoint)
+        else:
+            StudentSubsectionGrade.objects.filter(
+                pk=stored_grade.pk,
+                generation=stored_grade.generation,
+            ).update(**values)
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -407,7 +534,7 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, student_modules=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -421,6 +548,9 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_modules: A dict of location strings (see `usage_key_string`) to all of
+           the user's StudentModules in the course. If given, it is used instead
+           of querying StudentModule.
     """
     scores_cache = scores_cache or {}
 
@@ -447,14 +577,17 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if student_modules is not None:
+        student_module = student_modules.get(usage_key_string(problem_descriptor.location))
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
@@ -500,7 +633,54 @@ def manual_transaction():
         transaction.commit()
 
 
-def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
+class BulkGradingData(object):
+    """
+    The score data needed to grade a group of students in a course, loaded
+    with a handful of queries rather than several per student and section.
+
+    Attributes are dicts keyed by student id:
+
+    - student_modules : dict of location string -> StudentModule (without state)
+    - submissions_scores : dict of item id -> (earned, possible), as returned
+      by the submissions API's get_scores
+    - stored_grades : dict of subsection location string -> StudentSubsectionGrade
+
+    Location strings are built with `usage_key_string`.
+    """
+    def __init__(self, course, students):
+        student_ids = [student.id for student in students]
+
+        self.student_modules = {student_id: {} for student_id in student_ids}
+        student_modules = StudentModule.objects.filter(
+            course_id=course.id,
+            student_id__in=student_ids,
+        ).defer('state')
+        for student_module in student_modules:
+            module_key = usage_key_string(student_module.module_state_key)
+            self.student_modules[student_module.student_id][module_key] = student_module
+
+        self.submissions_scores = {student_id: {} for student_id in student_ids}
+        anonymous_ids = {anonymous_id_for_user(student, course.id): student.id for student in students}
+        score_summaries = ScoreSummary.objects.filter(
+            student_item__course_id=course.id.to_deprecated_string(),
+            student_item__student_id__in=anonymous_ids.keys(),
+        ).select_related('latest', 'student_item')
+        for summary in score_summaries:
+            # Mirrors sub_api.get_scores, which hides reset (0/0) scores.
+            if not summary.latest.is_hidden():
+                student_id = anonymous_ids[summary.student_item.student_id]
+                self.submissions_scores[student_id][summary.student_item.item_id] = (
+                    summary.latest.points_earned, summary.latest.points_possible
+                )
+
+        self.stored_grades = {student_id: {} for student_id in student_ids}
+        if settings.FEATURES.get('ENABLE_PERSISTENT_SUBSECTION_GRADES'):
+            stored_grades = StudentSubsectionGrade.objects.filter(course_id=course.id, student_id__in=student_ids)
+            for stored_grade in stored_grades:
+                self.stored_grades[stored_grade.student_id][usage_key_string(stored_grade.usage_key)] = stored_grade
+
+
+def iterate_grades_for(course_or_id, students, keep_raw_scores=False, chunk_size=None):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
     (student, gradeset, err_msg) for every student enrolled in the course.
@@ -517,6 +697,9 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    If `chunk_size` is given, students are graded in chunks of that many, with
+    the score data of each chunk loaded up front through BulkGradingData.
     """
     if isinstance(course_or_id, (basestring, CourseKey)):
         course = courses.get_course_by_id(course_or_id)
@@ -528,25 +711,43 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
+    if chunk_size:
+        student_chunks = chunks(students, chunk_size)
+    else:
+        student_chunks = [students]
+
+    for student_chunk in student_chunks:
+        bulk_data = None
+        if chunk_size:
             try:
-                request.user = student
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course, keep_raw_scores)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course.id,
-                    exc.message
-                )
-                yield student, {}, exc.message
+                with dog_stats_api.timer('lms.grades.bulk_grading_data', tags=[u'action:{}'.format(course.id)]):
+                    bulk_data = BulkGradingData(course, student_chunk)
+            except Exception:  # pylint: disable=broad-except
+                # Fall back to querying the scores of each student separately.
+                log.exception('Cannot load bulk grading data for course %s', course.id)
+
+        for student in student_chunk:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
+                try:
+                    request.user = student
+                    # Grading calls problem rendering, which calls masquerading,
+                    # which checks session vars -- thus the empty session dict below.
+                    # It's not pretty, but untangling that is currently beyond the
+                    # scope of this feature.
+                    request.session = {}
+                    if bulk_data is not None:
+                        gradeset = grade(student, request, course, keep_raw_scores, bulk_data=bulk_data)
+                    else:
+                        gradeset = grade(student, request, course, keep_raw_scores)
+                    yield student, gradeset, ""
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Keep marching on even if this student couldn't be graded for
+                    # some reason, but log it for future reference.
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course.id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
@@ -371,6 +371,19 @@ class UserStateCache(object):
         for usage_key, field_state in block_field_state:
             self._cache[usage_key] = field_state
 
+    def cache_student_modules(self, student_modules):
+        """
+        Cache the state of the already loaded ``student_modules`` of this
+        user, instead of querying it.
+
+        Arguments:
+            student_modules (list of :class:`~StudentModule`): The modules to cache the state of.
+        """
+        for student_module in student_modules:
+            assert student_module.student_id == self.user.id
+            usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
+            self._cache[usage_key] = json.loads(student_module.state) if student_module.state else {}
+
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def set(self, kvs_key, value):
         """
@@ -811,6 +824,24 @@ class FieldDataCache(object):
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
+    @classmethod
+    def cache_for_student_module(cls, student_module, descriptor, asides=None):
+        """
+        Return a FieldDataCache for the user of `student_module` and the
+        childless `descriptor`, using the state of the already loaded
+        `student_module` rather than querying it again.
+
+        student_module: the StudentModule of `descriptor`, with its student.
+        descriptor: An XModuleDescriptor without children
+        """
+        assert not descriptor.has_children
+        cache = FieldDataCache([], student_module.course_id, student_module.student, asides=asides)
+        cache.cache[Scope.user_state].cache_student_modules([student_module])
+        for scope, fields in cache._fields_to_cache([descriptor]).items():  # pylint: disable=protected-access
+            if scope in cache.cache and scope != Scope.user_state:
+                cache.cache[scope].cache_fields(fields, [descriptor], cache.asides)
+        return cache
+
     def _fields_to_cache(self, descriptors):
         """
         Returns a map of scopes to fields in that scope that should be cached
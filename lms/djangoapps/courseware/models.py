@@ -18,18 +18,34 @@ import itertools
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver, Signal
 
 from model_utils.models import TimeStampedModel
 from student.models import user_by_anonymous_id
 from submissions.models import score_set, score_reset
+from xblock.core import XBlock
+from xblock.fields import Field
+from xblock.plugin import PluginMissingError
 
-from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField  # pylint: disable=import-error
+from xmodule_django.models import (  # pylint: disable=import-error
+    CourseKeyField, LocationKeyField, UsageKeyField, BlockTypeKeyField
+)
 
 log = logging.getLogger("edx.courseware")
 
 
+def usage_key_string(usage_key):
+    """
+    Return the string `usage_key` is stored as in the database, i.e. without
+    any branch or version information, so that keys read from the database
+    can be matched with the locations of descriptors.
+    """
+    if hasattr(usage_key, 'for_branch') and hasattr(usage_key, 'version_agnostic'):
+        usage_key = usage_key.for_branch(None).version_agnostic()
+    return unicode(usage_key)
+
+
 def chunks(items, chunk_size):
     """
     Yields the values from items in chunks of size chunk_size
@@ -298,6 +314,111 @@ class StudentFieldOverride(TimeStampedModel):
     value = models.TextField(default='null')
 
 
+def _module_type_has_score(module_type):
+    """
+    Return whether blocks of type `module_type` may hold a score, according to
+    the `has_score` attribute of their class.
+
+    Unknown types, and types where `has_score` is a per-block field, are
+    assumed to be scored.
+    """
+    try:
+        block_class = XBlock.load_class(module_type, select=settings.XBLOCK_SELECT_FUNCTION)
+    except PluginMissingError:
+        return True
+    has_score = getattr(block_class, 'has_score', False)
+    return True if isinstance(has_score, Field) else bool(has_score)
+
+
+class StudentSubsectionGrade(TimeStampedModel):
+    """
+    The scores a student earned on the scored modules of one graded subsection.
+
+    Rows are written by `courseware.grades` and marked dirty whenever a
+    `StudentModule` belonging to the subsection is created, scored or deleted,
+    so that grading only has to recompute dirty (or outdated) subsections.
+    """
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('student', 'course_id', 'usage_key'),)
+
+    student = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    usage_key = UsageKeyField(max_length=255)
+
+    # subtree_edited_on of the subsection when the scores were computed; a
+    # mismatch means the content changed and the scores must be recomputed.
+    content_version = models.CharField(max_length=255)
+
+    # Newline delimited usage keys of every module in the subsection, used to
+    # find the rows affected by a score change.
+    module_keys = models.TextField(default='')
+
+    # Whether the student had any state in the subsection. Unattempted
+    # subsections are graded as 0/1 without looking at their problems.
+    attempted = models.BooleanField(default=False)
+
+    # JSON list of [earned, possible, graded, display_name, usage_key] entries.
+    scores = models.TextField(default='[]')
+
+    dirty = models.BooleanField(default=False, db_index=True)
+
+    # Incremented every time the row is marked dirty.
+    generation = models.PositiveIntegerField(default=0)
+
+    @staticmethod
+    def serialize_module_keys(usage_keys):
+        """
+        Return the `module_keys` value for the given usage keys.
+        """
+        return u'\n{}\n'.format(u'\n'.join(usage_key_string(usage_key) for usage_key in usage_keys))
+
+    @classmethod
+    def mark_dirty(cls, student_module):
+        """
+        Flag the stored subsection grades of the student affected by a score
+        change on the StudentModule `student_module` as needing recomputation.
+
+        Only the subsections which hold the module among their scored modules
+        are flagged, so the modules of blocks which carry no score are skipped.
+        """
+        if not _module_type_has_score(student_module.module_type):
+            return
+        module_key = u'\n{}\n'.format(usage_key_string(student_module.module_state_key))
+        # `generation` is bumped as well so that a concurrent grading of the
+        # subsection can tell that its result is already stale.
+        cls.objects.filter(
+            student_id=student_module.student_id,
+            course_id=student_module.course_id,
+            dirty=False,
+            module_keys__contains=module_key,
+        ).update(dirty=True, generation=models.F('generation') + 1)
+
+    def __unicode__(self):
+        return u"[StudentSubsectionGrade] {}: {} {}".format(self.student_id, self.usage_key, self.scores)
+
+
+@receiver(post_save, sender=StudentModule)
+def invalidate_subsection_grade_on_save(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    Mark stored subsection grades dirty when a student's module is first
+    created (the subsection becomes attempted) or has a score.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_SUBSECTION_GRADES'):
+        return
+    if created or instance.grade is not None or instance.max_grade is not None:
+        StudentSubsectionGrade.mark_dirty(instance)
+
+
+@receiver(post_delete, sender=StudentModule)
+def invalidate_subsection_grade_on_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Mark stored subsection grades dirty when a student's module is deleted,
+    e.g. when an instructor resets the student's attempts.
+    """
+    if settings.FEATURES.get('ENABLE_PERSISTENT_SUBSECTION_GRADES'):
+        StudentSubsectionGrade.mark_dirty(instance)
+
+
 # Signal that indicates that a user's score for a problem has been updated.
 # This signal is generated when a scoring event occurs either within the core
 # platform or in the Submissions module. Note that this signal will be triggered
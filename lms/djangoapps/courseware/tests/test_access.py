@@ -1,16 +1,24 @@
 import datetime
 import pytz
 
+from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
 from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
 from mock import Mock, patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 import courseware.access as access
+import courseware.access_cache as access_cache
 from courseware.masquerade import CourseMasquerade
 from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
 from courseware.tests.helpers import LoginEnrollmentTestCase
+from request_cache.middleware import RequestCache
+from openedx.core.djangoapps.content.course_summaries.models import CourseSummary
+from openedx.core.djangoapps.course_groups.models import CourseUserGroup, CourseUserGroupPartitionGroup
+from student.roles import CourseStaffRole
 from student.tests.factories import AnonymousUserFactory, CourseEnrollmentAllowedFactory, CourseEnrollmentFactory
 from xmodule.course_module import (
     CATALOG_VISIBILITY_CATALOG_AND_ABOUT, CATALOG_VISIBILITY_ABOUT,
@@ -256,6 +264,19 @@ class AccessTestCase(LoginEnrollmentTestCase, ModuleStoreTestCase):
         )
         self.assertFalse(access._has_access_course_desc(user, 'enroll', course))
 
+    @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+    def test_has_access_course_summary(self):
+        tomorrow = datetime.datetime.now(pytz.utc) + datetime.timedelta(days=1)
+        course = CourseFactory.create(start=tomorrow, enrollment_start=tomorrow)
+        summary = CourseSummary.update_from_course(course)
+        staff = StaffFactory.create(course_key=course.id)
+
+        for action in ('load', 'enroll', 'see_exists', 'see_in_catalog', 'load_mobile'):
+            for user in (self.student, staff):
+                self.assertEqual(
+                    access.has_access(user, action, summary), access.has_access(user, action, course), action
+                )
+
     def test__user_passed_as_none(self):
         """Ensure has_access handles a user being passed as null"""
         access.has_access(None, 'staff', 'global', None)
@@ -424,3 +445,89 @@ class UserRoleTestCase(TestCase):
             'student',
             access.get_user_role(self.anonymous_user, self.course_key)
         )
+
+
+@attr('shard_1')
+@patch.dict(settings.FEATURES, {'ENABLE_ACCESS_DECISION_CACHE': True})
+class AccessDecisionCacheTestCase(TestCase):
+    """
+    Tests for the caches of the access decisions.
+    """
+    def setUp(self):
+        super(AccessDecisionCacheTestCase, self).setUp()
+        self.course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        self.location = self.course_key.make_usage_key('chapter', 'Overview')
+        self.student = UserFactory()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _start_request(self):
+        """
+        Makes the following checks happen in a request.
+        """
+        RequestCache().process_request(Mock())
+        self.addCleanup(RequestCache().clear_request_cache)
+
+    def _assert_staff_access(self, expected, expected_computations):
+        """
+        Asserts the staff access of the student to self.location, and that
+        it was computed `expected_computations` times.
+        """
+        with patch.object(access, '_has_access_location', wraps=access._has_access_location) as mock_has_access:
+            self.assertEqual(access.has_access(self.student, 'staff', self.location, self.course_key), expected)
+            self.assertEqual(access.has_access(self.student, 'staff', self.location, self.course_key), expected)
+        self.assertEqual(mock_has_access.call_count, expected_computations)
+
+    def test_not_cached_outside_of_requests(self):
+        self._assert_staff_access(False, 2)
+
+    def test_request_cache(self):
+        self._start_request()
+        self._assert_staff_access(False, 1)
+        self._assert_staff_access(False, 0)
+
+        CourseStaffRole(self.course_key).add_users(self.student)
+        self._assert_staff_access(True, 1)
+
+    @override_settings(ACCESS_DECISION_CACHE_TIMEOUT=60)
+    def test_cross_request_cache(self):
+        self._assert_staff_access(False, 1)
+        self._assert_staff_access(False, 0)
+
+        CourseStaffRole(self.course_key).add_users(self.student)
+        self._assert_staff_access(True, 1)
+
+        CourseStaffRole(self.course_key).remove_users(self.student)
+        self._assert_staff_access(False, 1)
+
+    @override_settings(ACCESS_DECISION_CACHE_TIMEOUT=60)
+    def test_user_saved(self):
+        self.assertFalse(access.has_access(self.student, 'staff', 'global'))
+        self.student.is_staff = True
+        self.student.save()
+        self.assertTrue(access.has_access(self.student, 'staff', 'global'))
+
+    @override_settings(ACCESS_DECISION_CACHE_TIMEOUT=60)
+    def test_group_changes_invalidate(self):
+        group = CourseUserGroup.objects.create(
+            name='cohort', course_id=self.course_key, group_type=CourseUserGroup.COHORT
+        )
+
+        def assert_invalidated(change):
+            """Asserts that `change()` replaces the version of the student's entries."""
+            version_key = access_cache._version_cache_key(self.student.id)  # pylint: disable=protected-access
+            version = access_cache._user_version(self.student.id, None)  # pylint: disable=protected-access
+            change()
+            self.assertNotEqual(cache.get(version_key), version)
+
+        assert_invalidated(lambda: group.users.add(self.student))
+        assert_invalidated(lambda: CourseUserGroupPartitionGroup.objects.create(
+            course_user_group=group, partition_id=0, group_id=1
+        ))
+        assert_invalidated(lambda: CourseUserGroupPartitionGroup.objects.filter(course_user_group=group).delete())
+        assert_invalidated(lambda: self.student.course_groups.clear())
+
+    def test_not_cached_when_masquerading(self):
+        self._start_request()
+        self.student.masquerade_settings = {self.course_key: CourseMasquerade(self.course_key, role='student')}
+        self._assert_staff_access(False, 2)
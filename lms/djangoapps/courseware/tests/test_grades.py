@@ -1,14 +1,19 @@
 """
 Test grade calculation.
 """
+import json
+
 from django.http import Http404
+from django.test.client import RequestFactory
 from mock import patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
-from courseware.grades import grade, iterate_grades_for
+from courseware.grades import _store_section_grade, grade, iterate_grades_for
+from courseware.models import StudentSubsectionGrade
+from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
@@ -106,8 +111,15 @@ class TestGradeIteration(ModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    def test_chunked_grading_matches_per_student_grading(self):
+        """Grading with bulk-loaded score data gives the same gradesets."""
+        per_student_gradesets, _ = self._gradesets_and_errors_for(self.course.id, self.students)
+        chunked_gradesets, errors = self._gradesets_and_errors_for(self.course.id, self.students, chunk_size=2)
+        self.assertEqual(errors, {})
+        self.assertEqual(chunked_gradesets, per_student_gradesets)
+
     ################################# Helpers #################################
-    def _gradesets_and_errors_for(self, course_id, students):
+    def _gradesets_and_errors_for(self, course_id, students, chunk_size=None):
         """Simple helper method to iterate through student grades and give us
         two dictionaries -- one that has all students and their respective
         gradesets, and one that has only students that could not be graded and
@@ -115,9 +127,95 @@ class TestGradeIteration(ModuleStoreTestCase):
         students_to_gradesets = {}
         students_to_errors = {}
 
-        for student, gradeset, err_msg in iterate_grades_for(course_id, students):
+        for student, gradeset, err_msg in iterate_grades_for(course_id, students, chunk_size=chunk_size):
             students_to_gradesets[student] = gradeset
             if err_msg:
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+@attr('shard_1')
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_SUBSECTION_GRADES': True})
+class TestPersistentSubsectionGrades(ModuleStoreTestCase):
+    """
+    Test that subsection scores are persisted and only recomputed when dirty.
+    """
+    def setUp(self):
+        super(TestPersistentSubsectionGrades, self).setUp()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=self.course, category='chapter')
+        self.sequential = ItemFactory.create(
+            parent=chapter, category='sequential', graded=True, format='Homework'
+        )
+        vertical = ItemFactory.create(parent=self.sequential, category='vertical')
+        self.problem = ItemFactory.create(parent=vertical, category='problem')
+        self.course = self.store.get_course(self.course.id)
+        self.student = UserFactory.create()
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+
+    def _stored_grade(self):
+        """
+        Return the StudentSubsectionGrade of the student for the sequential.
+        """
+        return StudentSubsectionGrade.objects.get(student=self.student, usage_key=self.sequential.location)
+
+    def test_unattempted_subsection_is_stored(self):
+        grade(self.student, self.request, self.course)
+        stored_grade = self._stored_grade()
+        self.assertFalse(stored_grade.attempted)
+        self.assertFalse(stored_grade.dirty)
+
+    def test_score_change_marks_dirty(self):
+        grade(self.student, self.request, self.course)
+        StudentModuleFactory.create(
+            student=self.student,
+            course_id=self.course.id,
+            module_state_key=self.problem.location,
+            grade=1,
+            max_grade=2,
+        )
+        self.assertTrue(self._stored_grade().dirty)
+
+        gradeset = grade(self.student, self.request, self.course, keep_raw_scores=True)
+        stored_grade = self._stored_grade()
+        self.assertTrue(stored_grade.attempted)
+        self.assertFalse(stored_grade.dirty)
+        self.assertEqual(json.loads(stored_grade.scores)[0][:2], [1, 2])
+        self.assertEqual(gradeset['raw_scores'][0].earned, 1)
+
+    def test_unscored_module_does_not_mark_dirty(self):
+        grade(self.student, self.request, self.course)
+        StudentModuleFactory.create(
+            student=self.student,
+            course_id=self.course.id,
+            module_state_key=self.sequential.location,
+            module_type='sequential',
+            state='{"position": 1}',
+        )
+        self.assertFalse(self._stored_grade().dirty)
+
+    def test_clean_subsection_is_not_regraded(self):
+        StudentModuleFactory.create(
+            student=self.student,
+            course_id=self.course.id,
+            module_state_key=self.problem.location,
+            grade=1,
+            max_grade=2,
+        )
+        grade(self.student, self.request, self.course)
+        with patch('courseware.grades._grade_section') as mock_grade_section:
+            gradeset = grade(self.student, self.request, self.course, keep_raw_scores=True)
+        self.assertFalse(mock_grade_section.called)
+        self.assertEqual(gradeset['raw_scores'][0].module_id, self.problem.location)
+
+    def test_concurrently_stored_grade(self):
+        grade(self.student, self.request, self.course)
+        # Another process stored the grade between the read and the insert.
+        section = {'section_descriptor': self.sequential, 'xmoduledescriptors': [self.problem]}
+        with patch('courseware.grades.log') as mock_log:
+            _store_section_grade(self.student, self.course, section, 'version', True, [], None)
+        self.assertFalse(mock_log.exception.called)
+        self.assertFalse(self._stored_grade().attempted)
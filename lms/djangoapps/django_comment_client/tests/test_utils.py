@@ -9,6 +9,7 @@ from django.utils.timezone import UTC as django_utc
 from django_comment_client.tests.factories import RoleFactory
 from django_comment_client.tests.unicode import UnicodeTestMixin
 import django_comment_client.utils as utils
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from edxmako import add_lookup
@@ -931,6 +932,42 @@ class ContentGroupCategoryMapTestCase(CategoryMapTestMixin, ContentGroupTestCase
         )
 
 
+@attr('shard_1')
+@mock.patch.dict('django.conf.settings.FEATURES', {'ENABLE_DISCUSSION_INDEX': True})
+class DiscussionIndexCategoryMapTestCase(CategoryMapTestCase):
+    """
+    Runs the category map tests on the discussion index.
+    """
+    def setUp(self):
+        super(DiscussionIndexCategoryMapTestCase, self).setUp()
+        cache.clear()
+
+    def test_index_dropped_on_publish(self):
+        self.create_discussion("Chapter 1", "Discussion 1")
+        self.assertEqual(utils.get_discussion_categories_ids(self.course, self.user), ["discussion1"])
+
+        with mock.patch('django_comment_common.discussion_index.modulestore') as mock_modulestore:
+            # The index is read from the cache
+            utils.get_discussion_categories_ids(self.course, self.user)
+            self.assertFalse(mock_modulestore.called)
+
+        self.create_discussion("Chapter 1", "Discussion 2")
+        self.assertItemsEqual(
+            utils.get_discussion_categories_ids(self.course, self.user), ["discussion1", "discussion2"]
+        )
+
+
+@attr('shard_1')
+@mock.patch.dict('django.conf.settings.FEATURES', {'ENABLE_DISCUSSION_INDEX': True})
+class DiscussionIndexContentGroupCategoryMapTestCase(ContentGroupCategoryMapTestCase):
+    """
+    Runs the content group category map tests on the discussion index.
+    """
+    def setUp(self):
+        super(DiscussionIndexContentGroupCategoryMapTestCase, self).setUp()
+        cache.clear()
+
+
 class JsonResponseTestCase(TestCase, UnicodeTestMixin):
     def _test_unicode_data(self, text):
         response = utils.JsonResponse(text)
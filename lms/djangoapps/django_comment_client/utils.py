@@ -4,6 +4,7 @@ import json
 import logging
 
 import pytz
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
 from django.db import connection
@@ -14,11 +15,12 @@ from opaque_keys.edx.locations import i4xEncoder
 from opaque_keys.edx.keys import CourseKey
 from xmodule.modulestore.django import modulestore
 
+from django_comment_common.discussion_index import get_discussion_index
 from django_comment_common.models import Role, FORUM_ROLE_STUDENT
 from django_comment_client.permissions import check_permissions_by_view, cached_has_permission
 from edxmako import lookup_template
 
-from courseware.access import has_access
+from courseware.access import filter_accessible_index_entries, has_access
 from openedx.core.djangoapps.course_groups.cohorts import (
     get_course_cohort_settings, get_cohort_by_id, get_cohort_id, is_commentable_cohorted, is_course_cohorted
 )
@@ -65,7 +67,14 @@ def get_accessible_discussion_modules(course, user, include_all=False):  # pylin
     """
     Return a list of all valid discussion modules in this course that
     are accessible to the given user.
+
+    With the ENABLE_DISCUSSION_INDEX feature, the entries of the discussion
+    index of the course are returned instead of the modules.
     """
+    if settings.FEATURES.get('ENABLE_DISCUSSION_INDEX'):
+        index = get_discussion_index(course.id)
+        return index if include_all else filter_accessible_index_entries(user, course, index)
+
     all_modules = modulestore().get_items(course.id, qualifiers={'category': 'discussion'})
 
     def has_required_keys(module):
@@ -35,7 +35,7 @@ from django_comment_common.models import FORUM_ROLE_ADMINISTRATOR
 from student.models import CourseEnrollment
 from shoppingcart.models import Coupon, PaidCourseRegistration, CourseRegCodeItem
 from course_modes.models import CourseMode, CourseModesArchive
-from student.roles import CourseFinanceAdminRole, CourseSalesAdminRole
+from student.roles import CourseFinanceAdminRole, CourseRoleSnapshot, CourseSalesAdminRole
 from certificates.models import CertificateGenerationConfiguration
 from certificates import api as certs_api
 
@@ -59,11 +59,12 @@ def instructor_dashboard_2(request, course_id):
 
     course = get_course_by_id(course_key, depth=0)
 
+    roles = CourseRoleSnapshot.get(request.user, course_key)
     access = {
         'admin': request.user.is_staff,
         'instructor': has_access(request.user, 'instructor', course),
-        'finance_admin': CourseFinanceAdminRole(course_key).has_user(request.user),
-        'sales_admin': CourseSalesAdminRole(course_key).has_user(request.user),
+        'finance_admin': roles.has_course_role(CourseFinanceAdminRole.ROLE),
+        'sales_admin': roles.has_course_role(CourseSalesAdminRole.ROLE),
         'staff': has_access(request.user, 'staff', course),
         'forum_admin': has_forum_access(request.user, course_key, FORUM_ROLE_ADMINISTRATOR),
     }
@@ -323,13 +323,18 @@ def submit_bulk_course_email(request, course_key, email_id):
     return submit_task(request, task_type, task_class, course_key, task_input, task_key)
 
 
-def submit_calculate_grades_csv(request, course_key):
+def submit_calculate_grades_csv(request, course_key, chunk_size=None):
     """
     AlreadyRunningError is raised if the course's grades are already being updated.
+
+    `chunk_size` optionally sets how many students are graded per batch of
+    bulk-loaded score data.
     """
     task_type = 'grade_course'
     task_class = calculate_grades_csv
     task_input = {}
+    if chunk_size is not None:
+        task_input['chunk_size'] = chunk_size
     task_key = ""
 
     return submit_task(request, task_type, task_class, course_key, task_input, task_key)
@@ -12,9 +12,11 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
-from cStringIO import StringIO
+from contextlib import contextmanager
 from gzip import GzipFile
+from tempfile import NamedTemporaryFile, SpooledTemporaryFile
 from uuid import uuid4
+import abc
 import csv
 import json
 import hashlib
@@ -35,6 +37,9 @@ from xmodule_django.models import CourseKeyField
 QUEUING = 'QUEUING'
 PROGRESS = 'PROGRESS'
 
+# Reports read back from S3 are kept in memory up to this size, and spooled to disk beyond it.
+REPORT_SPOOL_MAX_MEMORY_SIZE = 5 * 1024 * 1024
+
 
 class InstructorTask(models.Model):
     """
@@ -193,10 +198,11 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Large reports should be written a row at a time with
+    `open_csv_writer()`, rather than passing in the whole dataset.
     """
+    __metaclass__ = abc.ABCMeta
+
     @classmethod
     def from_config(cls, config_name):
         """
@@ -209,14 +215,49 @@ class ReportStore(object):
         elif storage_type.lower() == "localfs":
             return LocalFSReportStore.from_config(config_name)
 
-    def _get_utf8_encoded_rows(self, rows):
+    def _get_utf8_decoded_rows(self, csv_file):
+        """
+        Given a file-like object containing a utf-8 encoded CSV, yield its rows
+        as lists of unicode strings.
+        """
+        for row in csv.reader(csv_file):
+            yield [item.decode('utf-8') for item in row]
+
+    @abc.abstractmethod
+    def open_csv_writer(self, course_id, filename):
         """
-        Given a list of `rows` containing unicode strings, return a
-        new list of rows with those strings encoded as utf-8 for CSV
-        compatibility.
+        Return a context manager that yields a `ReportCSVWriter` for the CSV
+        file `filename` of `course_id`. Rows are written to a temporary file as
+        they come in, and the report only becomes visible once the block exits
+        without an exception; if it raises, nothing is stored.
         """
+
+    def store_rows(self, course_id, filename, rows):
+        """
+        Given a `course_id`, `filename`, and `rows` (each row is an iterable of
+        strings), write this data out. `rows` may be any iterable, including a
+        generator, and is consumed one row at a time.
+        """
+        with self.open_csv_writer(course_id, filename) as writer:
+            writer.writerows(rows)
+
+
+class ReportCSVWriter(object):
+    """
+    Writes rows of unicode strings (or anything that can be converted to
+    unicode) to a CSV file, encoding them as utf-8.
+    """
+    def __init__(self, csv_file):
+        self._writer = csv.writer(csv_file)
+
+    def writerow(self, row):
+        """Write a single row."""
+        self._writer.writerow([unicode(item).encode('utf-8') for item in row])
+
+    def writerows(self, rows):
+        """Write every row of the iterable `rows`."""
         for row in rows:
-            yield [unicode(item).encode('utf-8') for item in row]
+            self.writerow(row)
 
 
 class S3ReportStore(ReportStore):
@@ -305,22 +346,33 @@ class S3ReportStore(ReportStore):
             }
         )
 
-    def store_rows(self, course_id, filename, rows):
+    @contextmanager
+    def open_csv_writer(self, course_id, filename):
         """
-        Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        Return a context manager that yields a `ReportCSVWriter` for a gzip'd
+        CSV file, spooled to disk once it outgrows REPORT_SPOOL_MAX_MEMORY_SIZE.
+        The file is uploaded in a single PUT when the block exits, so readers
+        never see a partial report.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
         """
-        output_buffer = StringIO()
-        gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
-        csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
-
-        self.store(course_id, filename, output_buffer)
+        with SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_MEMORY_SIZE) as report_file:
+            gzip_file = GzipFile(fileobj=report_file, mode="wb")
+            yield ReportCSVWriter(gzip_file)
+            gzip_file.close()
+
+            key = self.key_for(course_id, filename)
+            size = report_file.tell()
+            report_file.seek(0)
+            key.set_contents_from_file(
+                report_file,
+                headers={
+                    "Content-Encoding": "gzip",
+                    "Content-Length": size,
+                    "Content-Type": "text/csv",
+                }
+            )
 
     def links_for(self, course_id):
         """
@@ -333,6 +385,24 @@ class S3ReportStore(ReportStore):
             for key in sorted(self.bucket.list(prefix=course_dir.key), reverse=True, key=lambda k: k.last_modified)
         ]
 
+    def iter_rows(self, course_id, filename):
+        """
+        Yield the rows of the CSV file `filename` stored for `course_id`, as
+        lists of unicode strings. The file is spooled to disk if it is large,
+        and decompressed as it is read.
+        """
+        key = self.key_for(course_id, filename)
+        with SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_MEMORY_SIZE) as compressed_file:
+            key.get_contents_to_file(compressed_file)
+            compressed_file.seek(0)
+            gzip_file = GzipFile(fileobj=compressed_file, mode="rb")
+            for row in self._get_utf8_decoded_rows(gzip_file):
+                yield row
+
+    def delete(self, course_id, filename):
+        """Delete the file `filename` stored for `course_id`."""
+        self.key_for(course_id, filename).delete()
+
 
 class LocalFSReportStore(ReportStore):
     """
@@ -386,16 +456,25 @@ class LocalFSReportStore(ReportStore):
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
 
-    def store_rows(self, course_id, filename, rows):
+    @contextmanager
+    def open_csv_writer(self, course_id, filename):
         """
-        Given a course_id, filename, and rows (each row is an iterable of strings),
-        write this data out.
+        Return a context manager that yields a `ReportCSVWriter` for a CSV file
+        written next to the course directory, and moved into it when the block
+        exits. The move is atomic, so readers never see a partial report.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
 
-        self.store(course_id, filename, output_buffer)
+        with NamedTemporaryFile(dir=self.root_path, suffix='.csv', delete=False) as report_file:
+            try:
+                yield ReportCSVWriter(report_file)
+            except Exception:
+                os.remove(report_file.name)
+                raise
+        os.rename(report_file.name, full_path)
 
     def links_for(self, course_id):
         """
@@ -415,3 +494,16 @@ class LocalFSReportStore(ReportStore):
             (filename, ("file://" + urllib.quote(full_path)))
             for filename, full_path in files
         ]
+
+    def iter_rows(self, course_id, filename):
+        """
+        Yield the rows of the CSV file `filename` stored for `course_id`, as
+        lists of unicode strings.
+        """
+        with open(self.path_to(course_id, filename), "rb") as csv_file:
+            for row in self._get_utf8_decoded_rows(csv_file):
+                yield row
+
+    def delete(self, course_id, filename):
+        """Delete the file `filename` stored for `course_id`."""
+        os.remove(self.path_to(course_id, filename))
@@ -125,6 +125,50 @@ def _generate_items_for_subtask(
         TASK_LOG.info("Number of items generated by chunking %s not equal to original total %s", num_items_queued, total_num_items)
 
 
+def _generate_id_ranges_for_subtask(item_ids, total_num_items, items_per_task, total_num_subtasks):
+    """
+    Generates the range of ids of a chunk of "items" that should be passed into a subtask.
+
+    Arguments:
+        `item_ids` : an iterable of the ids of the "items", in increasing order.
+        `total_num_items` : the number of ids in `item_ids`.
+        `items_per_task` : maximum size of chunks to break the ids into for use by a subtask.
+        `total_num_subtasks` : the number of chunks to break the ids into.
+
+    Returns:  yields a dict with the following keys:
+        'first_id' : the id of the first item of the chunk.
+        'last_id' : the id of the last item of the chunk.
+        'num_items' : the number of items in the chunk.
+
+    Like _generate_items_for_subtask(), the last chunk takes the items left over if there are more
+    than `total_num_items` of them.
+    """
+    num_items_queued = 0
+    num_subtasks = 0
+    id_range = None
+
+    for item_id in item_ids:
+        if id_range is not None and id_range['num_items'] == items_per_task and num_subtasks < total_num_subtasks - 1:
+            yield id_range
+            num_items_queued += items_per_task
+            id_range = None
+            num_subtasks += 1
+        if id_range is None:
+            id_range = {'first_id': item_id, 'last_id': item_id, 'num_items': 0}
+        id_range['last_id'] = item_id
+        id_range['num_items'] += 1
+
+    # yield remainder items for task, if any
+    if id_range is not None:
+        yield id_range
+        num_items_queued += id_range['num_items']
+
+    if num_items_queued != total_num_items:
+        TASK_LOG.info(
+            "Number of items generated by chunking %s not equal to original total %s", num_items_queued, total_num_items
+        )
+
+
 class SubtaskStatus(object):
     """
     Create and return a dict for tracking the status of a subtask.
@@ -302,6 +346,85 @@ def queue_subtasks_for_query(
 
     Returns:  the task progress as stored in the InstructorTask object.
 
+    """
+    return _queue_subtasks(
+        entry,
+        action_name,
+        create_subtask_fcn,
+        # Construct a generator that will return the recipients to use for each subtask.
+        # Pass in the desired fields to fetch for each recipient.
+        lambda total_num_subtasks: _generate_items_for_subtask(
+            item_querysets,
+            item_fields,
+            total_num_items,
+            items_per_task,
+            total_num_subtasks,
+            entry.course_id,
+        ),
+        items_per_task,
+        total_num_items,
+    )
+
+
+# pylint: disable=bad-continuation
+def queue_subtasks_for_id_ranges(
+    entry,
+    action_name,
+    create_subtask_fcn,
+    item_ids,
+    items_per_task,
+    total_num_items,
+):
+    """
+    Generates and queues subtasks to each execute a range of "items" identified by their ids.
+
+    Unlike queue_subtasks_for_query(), the subtasks are passed the range of the ids of their items
+    rather than the items themselves, which keeps the messages of the subtasks small.  The subtasks
+    are responsible for fetching their items.
+
+    Arguments:
+        `entry` : the InstructorTask object for which subtasks are being queued.
+        `action_name` : a past-tense verb that can be used for constructing readable status messages.
+        `create_subtask_fcn` : a function of two arguments that constructs the desired kind of subtask object.
+            Arguments are the range of the items to be processed by this subtask, as a dict with
+            'first_id', 'last_id' and 'num_items' keys, and a SubtaskStatus object reflecting
+            initial status (and containing the subtask's id).
+        `item_ids` : an iterable of the ids of the "items", in increasing order.
+        `items_per_task` : maximum size of chunks to break the ids into for use by a subtask.
+        `total_num_items` : total amount of items that will be put into subtasks
+
+    Returns:  the task progress as stored in the InstructorTask object.
+
+    """
+    return _queue_subtasks(
+        entry,
+        action_name,
+        create_subtask_fcn,
+        lambda total_num_subtasks: _generate_id_ranges_for_subtask(
+            item_ids,
+            total_num_items,
+            items_per_task,
+            total_num_subtasks,
+        ),
+        items_per_task,
+        total_num_items,
+    )
+
+
+# pylint: disable=bad-continuation
+def _queue_subtasks(
+    entry,
+    action_name,
+    create_subtask_fcn,
+    generate_items_fcn,
+    items_per_task,
+    total_num_items,
+):
+    """
+    Queues a subtask for each chunk of "items" generated by `generate_items_fcn`, a function
+    taking the number of subtasks to generate chunks for.
+
+    Returns:  the task progress as stored in the InstructorTask object.
     """
     task_id = entry.task_id
 
@@ -319,16 +442,7 @@ def queue_subtasks_for_query(
     )  # pylint: disable=no-member
     progress = initialize_subtask_info(entry, action_name, total_num_items, subtask_id_list)
 
-    # Construct a generator that will return the recipients to use for each subtask.
-    # Pass in the desired fields to fetch for each recipient.
-    item_list_generator = _generate_items_for_subtask(
-        item_querysets,
-        item_fields,
-        total_num_items,
-        items_per_task,
-        total_num_subtasks,
-        entry.course_id,
-    )
+    item_list_generator = generate_items_fcn(total_num_subtasks)
 
     # Now create the subtasks, and start them running.
     TASK_LOG.info(
@@ -460,10 +574,14 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
         raise DuplicateTaskException(msg)
 
 
-def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0):
+def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0, complete_parent=True):
     """
     Update the status of the subtask in the parent InstructorTask object tracking its progress.
 
+    If `complete_parent` is False, the InstructorTask isn't marked as succeeded
+    when its last subtask is done, e.g. because the results of the subtasks are
+    still to be combined.
+
     Because select_for_update is used to lock the InstructorTask object while it is being updated,
     multiple subtasks updating at the same time may time out while waiting for the lock.
     The actual update operation is surrounded by a try/except/else that permits the update to be
@@ -473,7 +591,7 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
     the attempting of retries has concluded.
     """
     try:
-        _update_subtask_status(entry_id, current_task_id, new_subtask_status)
+        _update_subtask_status(entry_id, current_task_id, new_subtask_status, complete_parent)
     except DatabaseError:
         # If we fail, try again recursively.
         retry_count += 1
@@ -481,7 +599,7 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
             TASK_LOG.info("Retrying to update status for subtask %s of instructor task %d with status %s:  retry %d",
                           current_task_id, entry_id, new_subtask_status, retry_count)
             dog_stats_api.increment('instructor_task.subtask.retry_after_failed_update')
-            update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count)
+            update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count, complete_parent)
         else:
             TASK_LOG.info("Failed to update status after %d retries for subtask %s of instructor task %d with status %s",
                           retry_count, current_task_id, entry_id, new_subtask_status)
@@ -495,7 +613,7 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 
 
 @transaction.commit_manually
-def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
+def _update_subtask_status(entry_id, current_task_id, new_subtask_status, complete_parent=True):
     """
     Update the status of the subtask in the parent InstructorTask object tracking its progress.
 
@@ -515,7 +633,7 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     subtasks.  'Total' is expected to have been set at the time the subtasks were created.
     The other three counters are incremented depending on the value of `status`.  Once the counters
     for 'succeeded' and 'failed' match the 'total', the subtasks are done and the InstructorTask's
-    "status" is changed to SUCCESS.
+    "status" is changed to SUCCESS, unless `complete_parent` is False.
 
     The "subtasks" field also contains a 'status' key, that contains a dict that stores status
     information for each subtask.  At the moment, the value for each subtask (keyed by its task_id)
@@ -571,7 +689,7 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
         # At present, we mark the task as having succeeded.  In future, we should see
         # if there was a catastrophic failure that occurred, and figure out how to
         # report that here.
-        if num_remaining <= 0:
+        if num_remaining <= 0 and complete_parent:
             entry.task_state = SUCCESS
         entry.subtasks = json.dumps(subtask_dict)
         entry.task_output = InstructorTask.create_output_for_success(task_progress)
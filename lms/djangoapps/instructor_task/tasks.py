@@ -31,10 +31,12 @@ from instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
     perform_module_state_update,
+    perform_module_state_update_subtask,
     rescore_problem_module_state,
     reset_attempts_module_state,
     delete_problem_module_state,
     upload_grades_csv,
+    generate_grade_report_shard,
     upload_problem_grade_report,
     upload_students_csv,
     cohort_students_and_upload,
@@ -67,14 +69,30 @@ def rescore_problem(entry_id, xmodule_instance_args):
     action_name = ugettext_noop('rescored')
     update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
 
-    def filter_fcn(modules_to_update):
-        """Filter that matches problems which are marked as being done"""
-        return modules_to_update.filter(state__contains='"done": true')
-
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
+    visit_fcn = partial(
+        perform_module_state_update, update_fcn, _rescore_filter_fcn,
+        xmodule_instance_args=xmodule_instance_args, subtask=rescore_problem_subtask,
+    )
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+def _rescore_filter_fcn(modules_to_update):
+    """Filter that matches problems which are marked as being done"""
+    return modules_to_update.filter(state__contains='"done": true')
+
+
+@task  # pylint: disable=not-callable
+def rescore_problem_subtask(entry_id, xmodule_instance_args, module_ids, chunk_size, subtask_status_dict):
+    """
+    Rescore the StudentModules with ids `module_ids`, for a rescoring split
+    between subtasks by `rescore_problem`.
+    """
+    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    return perform_module_state_update_subtask(
+        update_fcn, _rescore_filter_fcn, entry_id, module_ids, chunk_size, subtask_status_dict
+    )
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def reset_problem_attempts(entry_id, xmodule_instance_args):
     """Resets problem attempts to zero for a particular problem for all students in a course.
@@ -152,10 +170,19 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(upload_grades_csv, xmodule_instance_args, shard_task=calculate_grades_csv_shard)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_shard(entry_id, xmodule_instance_args, student_ids, chunk_size, subtask_status_dict):
+    """
+    Grade a subset of the students of a course for a grade report split
+    between subtasks by `calculate_grades_csv`.
+    """
+    return generate_grade_report_shard(entry_id, xmodule_instance_args, student_ids, chunk_size, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
@@ -5,16 +5,20 @@ running state of a course.
 """
 import json
 from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 from eventtracking import tracker
-from itertools import chain
+from itertools import chain, islice
 from time import time
+import traceback
 import unicodecsv
 import logging
 
 from celery import Task, current_task
-from celery.states import SUCCESS, FAILURE
+from celery.states import SUCCESS, FAILURE, READY_STATES
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
@@ -24,9 +28,11 @@ from instructor.paidcourse_enrollment_report import PaidCourseEnrollmentReportPr
 from track.views import task_track
 from util.file import course_filename_prefix_generator, UniversalNewlineIterator
 from xmodule.modulestore.django import modulestore
+from xmodule.partitions.partitions import NoSuchUserPartitionGroupError
 from xmodule.split_test_module import get_split_user_partitions
 from django.utils.translation import ugettext as _
-from certificates.models import CertificateWhitelist, certificate_info_for_user
+from certificates.models import CertificateWhitelist, certificate_info_for_user, certificate_statuses_for_students
+from course_modes.models import CourseMode
 from courseware.courses import get_course_by_id, get_problems_in_section
 from courseware.grades import iterate_grades_for
 from courseware.models import StudentModule
@@ -35,12 +41,20 @@ from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import enrolled_students_features
 from instructor_analytics.csvs import format_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from opaque_keys.edx.keys import UsageKey
 from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort, is_course_cohorted
+import openedx.core.djangoapps.user_api.course_tag.api as course_tag_api
+from openedx.core.djangoapps.user_api.partition_schemes import RandomUserPartitionScheme
 from student.models import CourseEnrollment
 from verify_student.models import SoftwareSecurePhotoVerification
 
@@ -59,6 +73,17 @@ UPDATE_STATUS_SKIPPED = 'skipped'
 # The setting name used for events when "settings" (account settings, preferences, profile information) change.
 REPORT_REQUESTED_EVENT_NAME = u'edx.instructor.report.requested'
 
+# Number of students whose score data is loaded at once when generating grade
+# reports; can be overridden with the `chunk_size` task input.
+GRADE_REPORT_CHUNK_SIZE = 100
+
+# How long the worker merging a sharded grade report holds its lock.
+GRADE_REPORT_MERGE_LOCK_EXPIRE = 60 * 60
+
+# Number of StudentModules loaded at once when updating problem state; can be
+# overridden with the `chunk_size` task input.
+MODULE_STATE_UPDATE_CHUNK_SIZE = 100
+
 
 class BaseInstructorTask(Task):
     """
@@ -273,7 +298,8 @@ def run_main_task(entry_id, task_fcn, action_name):
     return task_progress
 
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name,
+                                xmodule_instance_args=None, subtask=None):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -291,6 +317,14 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     the update is successful; False indicates the update on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    The StudentModules are loaded, with their students, `chunk_size` (a task input,
+    MODULE_STATE_UPDATE_CHUNK_SIZE by default) at a time.
+
+    If `subtask` is given, the ENABLE_MODULE_STATE_UPDATE_SUBTASKS feature is on and there are more
+    than MODULE_STATE_UPDATE_MODULES_PER_TASK StudentModules to update, they are instead split between
+    `subtask` subtasks, see `perform_module_state_update_subtask`.  `xmodule_instance_args` is passed
+    through to the subtasks.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -308,6 +342,44 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
+    problems, modules_to_update = _get_modules_to_update(filter_fcn, course_id, task_input)
+    total_num_modules = modules_to_update.count()
+
+    if (
+            subtask is not None and settings.FEATURES.get('ENABLE_MODULE_STATE_UPDATE_SUBTASKS') and
+            total_num_modules > settings.MODULE_STATE_UPDATE_MODULES_PER_TASK
+    ):
+        return _queue_module_state_update_subtasks(
+            xmodule_instance_args, _entry_id, task_input, action_name, subtask, modules_to_update, total_num_modules
+        )
+
+    task_progress = TaskProgress(action_name, total_num_modules, start_time)
+    task_progress.update_task_state()
+
+    chunk_size = task_input.get('chunk_size', MODULE_STATE_UPDATE_CHUNK_SIZE)
+    for modules_chunk in _iter_module_chunks(modules_to_update, chunk_size):
+        for module_to_update in modules_chunk:
+            task_progress.attempted += 1
+            update_status = _update_module_state(update_fcn, problems, module_to_update, action_name)
+            if update_status == UPDATE_STATUS_SUCCEEDED:
+                # If the update_fcn returns true, then it performed some kind of work.
+                # Logging of failures is left to the update_fcn itself.
+                task_progress.succeeded += 1
+            elif update_status == UPDATE_STATUS_FAILED:
+                task_progress.failed += 1
+            elif update_status == UPDATE_STATUS_SKIPPED:
+                task_progress.skipped += 1
+        task_progress.update_task_state()
+
+    return task_progress.update_task_state()
+
+
+def _get_modules_to_update(filter_fcn, course_id, task_input):
+    """
+    Returns the descriptors of the problems of `task_input`, by usage key string,
+    and the query of the StudentModules of those problems which should be updated.
+    See `perform_module_state_update`.
+    """
     usage_keys = []
     problem_url = task_input.get('problem_url')
     entrance_exam_url = task_input.get('entrance_exam_url')
@@ -348,28 +420,127 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     if filter_fcn is not None:
         modules_to_update = filter_fcn(modules_to_update)
 
-    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
-    task_progress.update_task_state()
+    return problems, modules_to_update
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[unicode(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update)
-            if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                task_progress.succeeded += 1
-            elif update_status == UPDATE_STATUS_FAILED:
-                task_progress.failed += 1
-            elif update_status == UPDATE_STATUS_SKIPPED:
-                task_progress.skipped += 1
-            else:
-                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
 
-    return task_progress.update_task_state()
+def _iter_module_chunks(modules, chunk_size):
+    """
+    Yields the StudentModules of the query `modules`, with their students, in
+    lists of `chunk_size` in id order. Each chunk is queried when it is needed,
+    so its state is as recent as possible when it is updated.
+    """
+    modules = modules.select_related('student').order_by('id')
+    last_id = 0
+    while True:
+        chunk = list(modules.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].id
+
+
+def _update_module_state(update_fcn, problems, module_to_update, action_name):
+    """
+    Calls `update_fcn` on `module_to_update`, whose descriptor is in `problems`,
+    and returns the update status.
+    """
+    module_descriptor = problems[unicode(module_to_update.module_state_key)]
+    # There is no try here:  if there's an error, we let it throw, and the task will
+    # be marked as FAILED, with a stack trace.
+    with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
+        update_status = update_fcn(module_descriptor, module_to_update)
+    if update_status not in (UPDATE_STATUS_SUCCEEDED, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED):
+        raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+    return update_status
+
+
+def _queue_module_state_update_subtasks(
+        xmodule_instance_args, entry_id, task_input, action_name, subtask, modules, total_num_modules
+):
+    """
+    Split the update of the StudentModules `modules` between `subtask` subtasks
+    of MODULE_STATE_UPDATE_MODULES_PER_TASK modules each, and return the task progress.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As with bulk email, a requeued parent task must not queue its subtasks twice.
+    if entry.subtasks and entry.task_output:
+        TASK_LOG.warning(u"Task %s has already queued module state update subtasks: %s", entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    def _create_update_subtask(module_list, initial_subtask_status):
+        """Creates a subtask to update the StudentModules in `module_list`."""
+        return subtask.subtask(
+            (
+                entry_id,
+                xmodule_instance_args,
+                [module['pk'] for module in module_list],
+                task_input.get('chunk_size', MODULE_STATE_UPDATE_CHUNK_SIZE),
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_update_subtask,
+        [modules.order_by('id')],
+        [],
+        settings.MODULE_STATE_UPDATE_MODULES_PER_TASK,
+        total_num_modules,
+    )
+
+
+def perform_module_state_update_subtask(
+        update_fcn, filter_fcn, entry_id, module_ids, chunk_size, subtask_status_dict
+):
+    """
+    Visit the StudentModules with ids `module_ids` with `update_fcn`, for the
+    InstructorTask `entry_id` split between subtasks by `perform_module_state_update`,
+    and record the results in the status of the subtask.
+
+    As in the unsplit task, an exception raised by `update_fcn` is fatal: the
+    subtask fails, and the StudentModules it didn't update are counted as failed.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    task_input = json.loads(entry.task_input)
+    TASK_LOG.info(
+        u'Task: %s, InstructorTask ID: %s, Course: %s, Updating %s StudentModules in subtask %s',
+        entry.task_id, entry_id, entry.course_id, len(module_ids), current_task_id
+    )
+    action_name = json.loads(entry.task_output).get('action_name', '')
+    problems, modules_to_update = _get_modules_to_update(filter_fcn, entry.course_id, task_input)
+    modules_to_update = modules_to_update.filter(id__in=module_ids)
+    counts = {UPDATE_STATUS_SUCCEEDED: 0, UPDATE_STATUS_FAILED: 0, UPDATE_STATUS_SKIPPED: 0}
+    try:
+        for modules_chunk in _iter_module_chunks(modules_to_update, chunk_size):
+            for module_to_update in modules_chunk:
+                counts[_update_module_state(update_fcn, problems, module_to_update, action_name)] += 1
+    except Exception:  # pylint: disable=broad-except
+        TASK_LOG.exception(u'Task: %s, subtask %s failed', entry.task_id, current_task_id)
+        not_updated = len(module_ids) - sum(counts.values())
+        subtask_status.increment(
+            succeeded=counts[UPDATE_STATUS_SUCCEEDED],
+            failed=counts[UPDATE_STATUS_FAILED] + not_updated,
+            skipped=counts[UPDATE_STATUS_SKIPPED],
+            state=FAILURE,
+        )
+    else:
+        # StudentModules that no longer match the query (e.g. deleted ones) are skipped.
+        not_updated = len(module_ids) - sum(counts.values())
+        subtask_status.increment(
+            succeeded=counts[UPDATE_STATUS_SUCCEEDED],
+            failed=counts[UPDATE_STATUS_FAILED],
+            skipped=counts[UPDATE_STATUS_SKIPPED] + not_updated,
+            state=SUCCESS,
+        )
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    return subtask_status.to_dict()
 
 
 def _get_task_id_from_xmodule_args(xmodule_instance_args):
@@ -399,16 +570,19 @@ def _get_track_function_for_task(student, xmodule_instance_args=None, source_pag
 
 
 def _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args=None,
-                                  grade_bucket_type=None):
+                                  grade_bucket_type=None, field_data_cache=None):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `module_descriptor`.
 
     `xmodule_instance_args` is used to provide information for creating a track function and an XQueue callback.
     These are passed, along with `grade_bucket_type`, to get_module_for_descriptor_internal, which sidesteps
     the need for a Request object when instantiating an xmodule instance.
+
+    `field_data_cache` is the FieldDataCache of the module, if it has already been loaded.
     """
     # reconstitute the problem's corresponding XModule:
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
+    if field_data_cache is None:
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course_id, student, module_descriptor)
 
     # get request-related tracking information from args passthrough, and supplement with task-specific
     # information:
@@ -458,7 +632,14 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
     course_id = student_module.course_id
     student = student_module.student
     usage_key = student_module.module_state_key
-    instance = _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore')
+    # The StudentModule has just been loaded, so there's no need to query its state again.
+    field_data_cache = None
+    if not module_descriptor.has_children:
+        field_data_cache = FieldDataCache.cache_for_student_module(student_module, module_descriptor)
+    instance = _get_module_instance_for_task(
+        course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore',
+        field_data_cache=field_data_cache,
+    )
 
     if instance is None:
         # Either permissions just changed, or someone is trying to be clever
@@ -544,23 +725,34 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            Any iterable of rows will do, including a generator.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
+    with open_report_csv_writer(csv_name, course_id, timestamp, config_name) as writer:
+        writer.writerows(rows)
+
+
+@contextmanager
+def open_report_csv_writer(csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
+    """
+    Return a context manager that yields a `ReportCSVWriter` for the CSV named
+    as `upload_csv_to_report_store` would name it. Rows are streamed to the
+    report store as they are written, and the report is published when the
+    block exits.
+    """
     report_store = ReportStore.from_config(config_name)
-    report_store.store_rows(
-        course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
-        rows
+    filename = u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
     )
+    with report_store.open_csv_writer(course_id, filename) as writer:
+        yield writer
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name, shard_task=None):  # pylint: disable=too-many-statements
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -569,6 +761,12 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
+    If `shard_task` is given, the ENABLE_GRADE_REPORT_SUBTASKS feature is on
+    and the course has more than GRADE_REPORT_STUDENTS_PER_TASK students, the
+    students are instead split between `shard_task` subtasks, see
+    `generate_grade_report_shard`. The subtasks may run on different workers,
+    so this requires GRADE_REPORT_SHARDS to be a store shared by all of them.
+
     As we start to add more CSV downloads, it will probably be worthwhile to
     make a more general CSVDoc class instead of building out the rows like we
     do here.
@@ -577,7 +775,19 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     start_date = datetime.now(UTC)
     status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    total_enrolled_students = enrolled_students.count()
+
+    if (
+            shard_task is not None and settings.FEATURES.get('ENABLE_GRADE_REPORT_SUBTASKS') and
+            total_enrolled_students > settings.GRADE_REPORT_STUDENTS_PER_TASK and
+            _grade_report_shards_are_shared()
+    ):
+        return _queue_grade_report_shards(
+            _xmodule_instance_args, _entry_id, _task_input, action_name, shard_task,
+            enrolled_students.order_by('id'), total_enrolled_students
+        )
+
+    task_progress = TaskProgress(action_name, total_enrolled_students, start_time)
 
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
@@ -588,25 +798,14 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
+    chunk_size = (_task_input or {}).get('chunk_size', GRADE_REPORT_CHUNK_SIZE)
     course = get_course_by_id(course_id)
-    course_is_cohorted = is_course_cohorted(course.id)
-    cohorts_header = ['Cohort Name'] if course_is_cohorted else []
 
-    experiment_partitions = get_split_user_partitions(course.user_partitions)
-    group_configs_header = [u'Experiment Group ({})'.format(partition.name) for partition in experiment_partitions]
-
-    certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
-    certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
-    whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
-
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
+    # Loop over all our students, streaming their rows into the grade report.
+    # Only the error rows are kept in memory.
     err_rows = [["id", "username", "error_msg"]]
     current_step = {'step': 'Calculating Grades'}
 
-    total_enrolled_students = enrolled_students.count()
-    student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
         task_info_string,
@@ -614,31 +813,103 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         current_step,
         total_enrolled_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
+    with open_report_csv_writer('grade_report', course_id, start_date) as grades_writer:
+        # The profiles are needed for the certificate columns.
+        students = enrolled_students.select_related('profile')
+        for student, header, row, err_msg in _iterate_grade_report_rows(course, students, chunk_size):
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
+
+            # Now add a log entry after each student is graded to get a sense
+            # of the task's progress
+            TASK_LOG.info(
+                u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+                task_info_string,
+                action_name,
+                current_step,
+                task_progress.attempted,
+                total_enrolled_students
+            )
+
+            if row is not None:
+                # We were able to successfully grade this student for this course.
+                if not task_progress.succeeded:
+                    grades_writer.writerow(header)
+                task_progress.succeeded += 1
+                grades_writer.writerow(row)
+            else:
+                # We failed to grade this student.
+                task_progress.failed += 1
+                err_rows.append([student.id, student.username, err_msg])
 
-        # Now add a log entry after each student is graded to get a sense
-        # of the task's progress
-        student_counter += 1
         TASK_LOG.info(
-            u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+            u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
             task_info_string,
             action_name,
             current_step,
-            student_counter,
+            task_progress.attempted,
             total_enrolled_students
         )
 
-        if gradeset:
-            # We were able to successfully grade this student for this course.
-            task_progress.succeeded += 1
+        # By this point, every row has been written out, and the grade report
+        # is published as we leave this block.
+        current_step = {'step': 'Uploading CSVs'}
+        task_progress.update_task_state(extra_meta=current_step)
+        TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+
+    # If there are any error rows (don't count the header), write them out as well
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _iterate_grade_report_rows(course, students, chunk_size):
+    """
+    Grade `students` and yield `(student, header, row, err_msg)` for each of
+    them, where `header` is the header row of the grade report and `row` is the
+    student's row, or None if the student couldn't be graded (with the reason
+    in `err_msg`).
+
+    The other columns of the rows are loaded by `BulkStudentContext` for every
+    `chunk_size` students that are graded.
+    """
+    course_id = course.id
+    course_is_cohorted = is_course_cohorted(course.id)
+    cohorts_header = ['Cohort Name'] if course_is_cohorted else []
+
+    experiment_partitions = get_split_user_partitions(course.user_partitions)
+    group_configs_header = [u'Experiment Group ({})'.format(partition.name) for partition in experiment_partitions]
+
+    certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
+    certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
+    whitelisted_user_ids = set(entry.user_id for entry in certificate_whitelist)
+
+    header = None
+    section_labels = None
+    graded_students = iterate_grades_for(course, students, chunk_size=chunk_size)
+    for graded_chunk in _iter_chunks(graded_students, chunk_size or GRADE_REPORT_CHUNK_SIZE):
+        student_context = BulkStudentContext(
+            course_id,
+            [student for student, gradeset, _ in graded_chunk if gradeset],
+            course_is_cohorted,
+            experiment_partitions,
+            whitelisted_user_ids,
+        )
+        for student, gradeset, err_msg in graded_chunk:
+            if not gradeset:
+                # An empty gradeset means we failed to grade a student.
+                yield student, header, None, err_msg
+                continue
+
             if not header:
-                header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
-                    ["id", "email", "username", "grade"] + header + cohorts_header +
+                section_labels = [section['label'] for section in gradeset[u'section_breakdown']]
+                header = (
+                    ["id", "email", "username", "grade"] + section_labels + cohorts_header +
                     group_configs_header + ['Enrollment Track', 'Verification Status'] + certificate_info_header
                 )
 
@@ -648,70 +919,351 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
                 if 'label' in section
             }
 
-            cohorts_group_name = []
-            if course_is_cohorted:
-                group = get_cohort(student, course_id, assign=False)
-                cohorts_group_name.append(group.name if group else '')
-
-            group_configs_group_names = []
-            for partition in experiment_partitions:
-                group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
-                group_configs_group_names.append(group.name if group else '')
-
-            enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
-            verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
-                student,
-                course_id,
-                enrollment_mode
-            )
-            certificate_info = certificate_info_for_user(
-                student,
-                course_id,
-                gradeset['grade'],
-                student.id in whitelisted_user_ids
-            )
-
             # Not everybody has the same gradable items. If the item is not
             # found in the user's gradeset, just assume it's a 0. The aggregated
             # grades for their sections and overall course will be calculated
             # without regard for the item they didn't have access to, so it's
             # possible for a student to have a 0.0 show up in their row but
             # still have 100% for the course.
-            row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
-                [student.id, student.email, student.username, gradeset['percent']] +
-                row_percents + cohorts_group_name + group_configs_group_names +
-                [enrollment_mode] + [verification_status] + certificate_info
+            row_percents = [percents.get(label, 0.0) for label in section_labels]
+            row = (
+                [student.id, student.email, student.username, gradeset['percent']] + row_percents +
+                student_context.cohort_names(student) + student_context.group_names(student) +
+                [student_context.enrollment_mode(student), student_context.verification_status(student)] +
+                student_context.certificate_info(student, gradeset['grade'])
             )
-        else:
-            # An empty gradeset means we failed to grade a student.
-            task_progress.failed += 1
-            err_rows.append([student.id, student.username, err_msg])
+            yield student, header, row, ""
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
-        task_info_string,
+
+def _iter_chunks(items, chunk_size):
+    """
+    Yields the values of the iterable `items` in lists of `chunk_size`,
+    consuming only one chunk of `items` at a time.
+    """
+    iterator = iter(items)
+    chunk = list(islice(iterator, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunk_size))
+
+
+class BulkStudentContext(object):
+    """
+    Loads the grade report columns that describe `students` other than their
+    grades -- cohorts, experiment groups, enrollment tracks, verification
+    statuses and certificates -- with a handful of queries for all of them,
+    instead of a few queries per student.
+
+    Students that weren't loaded are looked up one at a time.
+    """
+    def __init__(self, course_id, students, course_is_cohorted, experiment_partitions, whitelisted_user_ids):
+        self.course_id = course_id
+        self.course_is_cohorted = course_is_cohorted
+        self.experiment_partitions = experiment_partitions
+        self.whitelisted_user_ids = whitelisted_user_ids
+        self.user_ids = set(student.id for student in students)
+
+        self.cohorts = {}
+        if course_is_cohorted and self.user_ids:
+            self.cohorts = dict(
+                CourseUserGroup.objects.filter(
+                    course_id=course_id,
+                    group_type=CourseUserGroup.COHORT,
+                    users__id__in=self.user_ids,
+                ).values_list('users__id', 'name')
+            )
+
+        self.partition_tags = {}
+        tag_keys = [
+            RandomUserPartitionScheme.key_for_partition(partition)
+            for partition in experiment_partitions if partition.scheme is RandomUserPartitionScheme
+        ]
+        if tag_keys and self.user_ids:
+            self.partition_tags = course_tag_api.get_course_tags_for_users(self.user_ids, course_id, tag_keys)
+
+        self.enrollment_modes = {}
+        self.verified_user_ids = set()
+        self.certificate_statuses = {}
+        if self.user_ids:
+            self.enrollment_modes = dict(
+                CourseEnrollment.objects.filter(
+                    course_id=course_id,
+                    user__id__in=self.user_ids,
+                ).values_list('user_id', 'mode')
+            )
+            verified_mode_user_ids = [
+                user_id for user_id, mode in self.enrollment_modes.iteritems() if mode in CourseMode.VERIFIED_MODES
+            ]
+            if verified_mode_user_ids:
+                self.verified_user_ids = SoftwareSecurePhotoVerification.verified_user_ids(verified_mode_user_ids)
+            self.certificate_statuses = certificate_statuses_for_students(students, course_id)
+
+    def cohort_names(self, student):
+        """
+        Returns the 'Cohort Name' column of `student`, or no column if the
+        course isn't cohorted.
+        """
+        if not self.course_is_cohorted:
+            return []
+        if student.id in self.user_ids:
+            return [self.cohorts.get(student.id, '')]
+        group = get_cohort(student, self.course_id, assign=False)
+        return [group.name if group else '']
+
+    def group_names(self, student):
+        """
+        Returns the 'Experiment Group' columns of `student`.
+        """
+        group_names = []
+        for partition in self.experiment_partitions:
+            if student.id in self.user_ids and partition.scheme is RandomUserPartitionScheme:
+                group = None
+                group_id = self.partition_tags.get(
+                    (student.id, RandomUserPartitionScheme.key_for_partition(partition))
+                )
+                if group_id is not None:
+                    try:
+                        group = partition.get_group(int(group_id))
+                    except NoSuchUserPartitionGroupError:
+                        pass
+            else:
+                group = LmsPartitionService(student, self.course_id).get_group(partition, assign=False)
+            group_names.append(group.name if group else '')
+        return group_names
+
+    def enrollment_mode(self, student):
+        """
+        Returns the enrollment mode of `student`.
+        """
+        if student.id in self.user_ids:
+            return self.enrollment_modes.get(student.id)
+        return CourseEnrollment.enrollment_mode_for_user(student, self.course_id)[0]
+
+    def verification_status(self, student):
+        """
+        Returns the 'Verification Status' column of `student`.
+        """
+        if student.id not in self.user_ids:
+            return SoftwareSecurePhotoVerification.verification_status_for_user(
+                student,
+                self.course_id,
+                self.enrollment_mode(student)
+            )
+        if self.enrollment_mode(student) not in CourseMode.VERIFIED_MODES:
+            return 'N/A'
+        return 'ID Verified' if student.id in self.verified_user_ids else 'Not ID Verified'
+
+    def certificate_info(self, student, grade):
+        """
+        Returns the certificate columns of `student`, whose letter grade is
+        `grade`.
+        """
+        return certificate_info_for_user(
+            student,
+            self.course_id,
+            grade,
+            student.id in self.whitelisted_user_ids,
+            certificate_status=self.certificate_statuses.get(student.id),
+        )
+
+
+def _grade_report_shards_are_shared():
+    """
+    Return whether the GRADE_REPORT_SHARDS report store is shared by all the
+    workers, which only S3 is.
+    """
+    return settings.GRADE_REPORT_SHARDS.get('STORAGE_TYPE', '').lower() == 's3'
+
+
+def _queue_grade_report_shards(
+        xmodule_instance_args, entry_id, task_input, action_name, shard_task, students, total_num_students
+):
+    """
+    Split the grade report of `students` between `shard_task` subtasks of
+    GRADE_REPORT_STUDENTS_PER_TASK students each, and return the task progress.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As with bulk email, a requeued parent task must not queue its subtasks twice.
+    if entry.subtasks and entry.task_output:
+        TASK_LOG.warning(u"Task %s has already queued grade report subtasks: %s", entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    def _create_shard_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to grade the students in `student_list`."""
+        return shard_task.subtask(
+            (
+                entry_id,
+                xmodule_instance_args,
+                [student['pk'] for student in student_list],
+                (task_input or {}).get('chunk_size', GRADE_REPORT_CHUNK_SIZE),
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
         action_name,
-        current_step,
-        student_counter,
-        total_enrolled_students
+        _create_shard_subtask,
+        [students],
+        [],
+        settings.GRADE_REPORT_STUDENTS_PER_TASK,
+        total_num_students,
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+def _grade_report_shard_filename(task_id, kind, first_student_id):
+    """
+    Return the name of the partial `kind` ('grades' or 'errors') CSV of the
+    shard of grade report `task_id` starting at `first_student_id`. Names sort
+    in student order.
+    """
+    return u"{task_id}_{kind}_{first_student_id:012d}.csv".format(
+        task_id=task_id, kind=kind, first_student_id=first_student_id
+    )
 
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
 
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
+def generate_grade_report_shard(entry_id, xmodule_instance_args, student_ids, chunk_size, subtask_status_dict):
+    """
+    Grade the students with ids `student_ids` for the grade report of the
+    InstructorTask `entry_id`, and store their rows as partial CSVs in the
+    GRADE_REPORT_SHARDS report store.
+
+    The subtask that completes the report last merges the partial CSVs into
+    the final grade report, see `merge_grade_report_shards`.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    TASK_LOG.info(
+        u'Task: %s, InstructorTask ID: %s, Course: %s, Grading shard %s of %s students',
+        entry.task_id, entry_id, entry.course_id, current_task_id, len(student_ids)
+    )
+    report_store = ReportStore.from_config('GRADE_REPORT_SHARDS')
+    first_student_id = min(student_ids)
+    try:
+        course = get_course_by_id(entry.course_id)
+        students = User.objects.filter(id__in=student_ids).select_related('profile').order_by('id')
+        num_rows = 0
+        err_rows = []
+        # The rows are streamed to the shard; a shard without any row is left empty.
+        with report_store.open_csv_writer(
+            entry.course_id, _grade_report_shard_filename(entry.task_id, 'grades', first_student_id)
+        ) as writer:
+            for student, header, row, err_msg in _iterate_grade_report_rows(course, students, chunk_size):
+                if row is not None:
+                    if num_rows == 0:
+                        writer.writerow(header)
+                    writer.writerow(row)
+                    num_rows += 1
+                else:
+                    err_rows.append([student.id, student.username, err_msg])
+        subtask_status.increment(succeeded=num_rows, failed=len(err_rows), state=SUCCESS)
+    except Exception as exc:  # pylint: disable=broad-except
+        # Don't let one broken shard hold back the whole report: report its
+        # students in the error CSV, and carry on with the merge.
+        TASK_LOG.exception(u'Task: %s, failed to grade shard %s', entry.task_id, current_task_id)
+        err_rows = [[student_id, u'', unicode(exc)] for student_id in student_ids]
+        subtask_status.increment(failed=len(student_ids), state=FAILURE)
+
+    if err_rows:
+        report_store.store_rows(
+            entry.course_id,
+            _grade_report_shard_filename(entry.task_id, 'errors', first_student_id),
+            err_rows
+        )
+    # The report is only complete once the shards are merged.
+    update_subtask_status(entry_id, current_task_id, subtask_status, complete_parent=False)
+
+    merge_grade_report_shards(entry_id)
+    return subtask_status.to_dict()
+
+
+def merge_grade_report_shards(entry_id):
+    """
+    Once every grade report subtask of the InstructorTask `entry_id` is done,
+    concatenate their partial CSVs into the final grade report (and error
+    report) and delete them.
+
+    The InstructorTask is marked as succeeded once the report is uploaded, or
+    as failed if the merge fails.
+
+    Does nothing if some subtasks are still running, or if another worker is
+    merging or has merged the report.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    if subtask_dict['succeeded'] + subtask_dict['failed'] < subtask_dict['total']:
+        return
+    if entry.task_state in READY_STATES:
+        return
+
+    # cache.add fails if the key already exists
+    lock_key = u'grade-report-merge-{}'.format(entry.task_id)
+    if not cache.add(lock_key, 'true', GRADE_REPORT_MERGE_LOCK_EXPIRE):
+        return
+
+    # Another worker may have merged the report between the check above and
+    # taking the lock, and consumed the shards.
+    entry = InstructorTask.objects.get(pk=entry_id)
+    if entry.task_state in READY_STATES:
+        cache.delete(lock_key)
+        return
+
+    course_id = entry.course_id
+    report_store = ReportStore.from_config('GRADE_REPORT_SHARDS')
+    shard_filenames = []
+    try:
+        shard_filenames = sorted(
+            filename for filename, _ in report_store.links_for(course_id)
+            if filename.startswith(u'{}_'.format(entry.task_id))
+        )
+        grades_filenames = [filename for filename in shard_filenames if u'_grades_' in filename]
+        errors_filenames = [filename for filename in shard_filenames if u'_errors_' in filename]
+
+        # Name the reports after the time the report was requested, as the
+        # unsharded task does. The rows are streamed from the shards to the
+        # reports one at a time.
+        start_date = entry.created or datetime.now(UTC)
+        with open_report_csv_writer('grade_report', course_id, start_date) as writer:
+            header_written = False
+            for filename in grades_filenames:
+                shard_rows = report_store.iter_rows(course_id, filename)
+                header = next(shard_rows, None)
+                if header is None:
+                    # the shard has no graded student
+                    continue
+                if not header_written:
+                    header_written = True
+                    writer.writerow(header)
+                writer.writerows(shard_rows)
+        if errors_filenames:
+            with open_report_csv_writer('grade_report_err', course_id, start_date) as writer:
+                writer.writerow(["id", "username", "error_msg"])
+                for filename in errors_filenames:
+                    writer.writerows(report_store.iter_rows(course_id, filename))
+
+        entry.task_state = SUCCESS
+        entry.save_now()
+        TASK_LOG.info(u'Task: %s, merged %s grade report shards', entry.task_id, len(grades_filenames))
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception(u'Task: %s, failed to merge the grade report shards', entry.task_id)
+        entry.task_output = InstructorTask.create_output_for_failure(exc, traceback.format_exc())
+        entry.task_state = FAILURE
+        entry.save_now()
+    finally:
+        for filename in shard_filenames:
+            try:
+                report_store.delete(course_id, filename)
+            except Exception:  # pylint: disable=broad-except
+                TASK_LOG.exception(u'Task: %s, failed to delete grade report shard %s', entry.task_id, filename)
+        # The task is done by now, which keeps later merges from running even
+        # once the lock is released.
+        cache.delete(lock_key)
 
 
 def _order_problems(blocks):
@@ -790,47 +1342,58 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
         )
 
     # Just generate the static fields for now.
-    rows = [list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))]
+    header = list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))
     error_rows = [list(header_row.values()) + ['error_msg']]
     current_step = {'step': 'Calculating Grades'}
+    chunk_size = (_task_input or {}).get('chunk_size', GRADE_REPORT_CHUNK_SIZE)
 
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
-        student_fields = [getattr(student, field_name) for field_name in header_row]
-        task_progress.attempted += 1
-
-        if 'percent' not in gradeset or 'raw_scores' not in gradeset:
-            # There was an error grading this student.
-            # Generally there will be a non-empty err_msg, but that is not always the case.
-            if not err_msg:
-                err_msg = u"Unknown error"
-            error_rows.append(student_fields + [err_msg])
-            task_progress.failed += 1
-            continue
-
-        final_grade = gradeset['percent']
-        # Only consider graded problems
-        problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
-        earned_possible_values = list()
-        for problem_id in problems:
-            try:
-                problem_score = problem_scores[problem_id]
-                earned_possible_values.append([problem_score.earned, problem_score.possible])
-            except KeyError:
-                # The student has not been graded on this problem.  For example,
-                # iterate_grades_for skips problems that students have never
-                # seen in order to speed up report generation.  It could also be
-                # the case that the student does not have access to it (e.g. A/B
-                # test or cohorted courseware).
-                earned_possible_values.append(['N/A', 'N/A'])
-        rows.append(student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values)))
-
-        task_progress.succeeded += 1
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
+    def _graded_rows():
+        """
+        Grade the students, yielding the rows of the ones that could be
+        graded and collecting the others in `error_rows`.
+        """
+        for student, gradeset, err_msg in iterate_grades_for(
+                course_id, enrolled_students, keep_raw_scores=True, chunk_size=chunk_size
+        ):
+            student_fields = [getattr(student, field_name) for field_name in header_row]
+            task_progress.attempted += 1
+
+            if 'percent' not in gradeset or 'raw_scores' not in gradeset:
+                # There was an error grading this student.
+                # Generally there will be a non-empty err_msg, but that is not always the case.
+                if not err_msg:
+                    err_msg = u"Unknown error"
+                error_rows.append(student_fields + [err_msg])
+                task_progress.failed += 1
+                continue
+
+            final_grade = gradeset['percent']
+            # Only consider graded problems
+            problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
+            earned_possible_values = list()
+            for problem_id in problems:
+                try:
+                    problem_score = problem_scores[problem_id]
+                    earned_possible_values.append([problem_score.earned, problem_score.possible])
+                except KeyError:
+                    # The student has not been graded on this problem.  For example,
+                    # iterate_grades_for skips problems that students have never
+                    # seen in order to speed up report generation.  It could also be
+                    # the case that the student does not have access to it (e.g. A/B
+                    # test or cohorted courseware).
+                    earned_possible_values.append(['N/A', 'N/A'])
 
-    # Perform the upload if any students have been successfully graded
-    if len(rows) > 1:
-        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
+            task_progress.succeeded += 1
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            yield student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values))
+
+    # Stream the rows into the report, but only upload it if any students
+    # have been successfully graded.
+    rows = _graded_rows()
+    first_row = next(rows, None)
+    if first_row is not None:
+        upload_csv_to_report_store(chain([header, first_row], rows), 'problem_grade_report', course_id, start_date)
     # If there are any error rows, write them out as well
     if len(error_rows) > 1:
         upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
@@ -892,8 +1455,7 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    # Loop over all our students and build our CSV lists in memory
-    rows = []
+    # Loop over all our students, streaming their rows into the report
     header = None
     current_step = {'step': 'Gathering Profile Information'}
     enrollment_report_provider = PaidCourseEnrollmentReportProvider()
@@ -907,84 +1469,84 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
         total_students
     )
 
-    for student in students_in_course:
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
-
-        # Now add a log entry after certain intervals to get a hint that task is in progress
-        student_counter += 1
-        if student_counter % 100 == 0:
-            TASK_LOG.info(
-                u'%s, Task type: %s, Current step: %s, gathering enrollment profile for students in progress: %s/%s',
-                task_info_string,
-                action_name,
-                current_step,
-                student_counter,
-                total_students
-            )
-
-        user_data = enrollment_report_provider.get_user_profile(student.id)
-        course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
-        payment_data = enrollment_report_provider.get_payment_info(student, course_id)
-
-        # display name map for the column headers
-        enrollment_report_headers = {
-            'User ID': _('User ID'),
-            'Username': _('Username'),
-            'Full Name': _('Full Name'),
-            'First Name': _('First Name'),
-            'Last Name': _('Last Name'),
-            'Company Name': _('Company Name'),
-            'Title': _('Title'),
-            'Language': _('Language'),
-            'Year of Birth': _('Year of Birth'),
-            'Gender': _('Gender'),
-            'Level of Education': _('Level of Education'),
-            'Mailing Address': _('Mailing Address'),
-            'Goals': _('Goals'),
-            'City': _('City'),
-            'Country': _('Country'),
-            'Enrollment Date': _('Enrollment Date'),
-            'Currently Enrolled': _('Currently Enrolled'),
-            'Enrollment Source': _('Enrollment Source'),
-            'Enrollment Role': _('Enrollment Role'),
-            'List Price': _('List Price'),
-            'Payment Amount': _('Payment Amount'),
-            'Coupon Codes Used': _('Coupon Codes Used'),
-            'Registration Code Used': _('Registration Code Used'),
-            'Payment Status': _('Payment Status'),
-            'Transaction Reference Number': _('Transaction Reference Number')
-        }
+    with open_report_csv_writer('enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS') as writer:
+        for student in students_in_course:
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
 
-        if not header:
-            header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
-            display_headers = []
-            for header_element in header:
-                # translate header into a localizable display string
-                display_headers.append(enrollment_report_headers.get(header_element, header_element))
-            rows.append(display_headers)
+            # Now add a log entry after certain intervals to get a hint that task is in progress
+            student_counter += 1
+            if student_counter % 100 == 0:
+                TASK_LOG.info(
+                    u'%s, Task type: %s, Current step: %s, '
+                    u'gathering enrollment profile for students in progress: %s/%s',
+                    task_info_string,
+                    action_name,
+                    current_step,
+                    student_counter,
+                    total_students
+                )
 
-        rows.append(user_data.values() + course_enrollment_data.values() + payment_data.values())
-        task_progress.succeeded += 1
+            user_data = enrollment_report_provider.get_user_profile(student.id)
+            course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
+            payment_data = enrollment_report_provider.get_payment_info(student, course_id)
+
+            # display name map for the column headers
+            enrollment_report_headers = {
+                'User ID': _('User ID'),
+                'Username': _('Username'),
+                'Full Name': _('Full Name'),
+                'First Name': _('First Name'),
+                'Last Name': _('Last Name'),
+                'Company Name': _('Company Name'),
+                'Title': _('Title'),
+                'Language': _('Language'),
+                'Year of Birth': _('Year of Birth'),
+                'Gender': _('Gender'),
+                'Level of Education': _('Level of Education'),
+                'Mailing Address': _('Mailing Address'),
+                'Goals': _('Goals'),
+                'City': _('City'),
+                'Country': _('Country'),
+                'Enrollment Date': _('Enrollment Date'),
+                'Currently Enrolled': _('Currently Enrolled'),
+                'Enrollment Source': _('Enrollment Source'),
+                'Enrollment Role': _('Enrollment Role'),
+                'List Price': _('List Price'),
+                'Payment Amount': _('Payment Amount'),
+                'Coupon Codes Used': _('Coupon Codes Used'),
+                'Registration Code Used': _('Registration Code Used'),
+                'Payment Status': _('Payment Status'),
+                'Transaction Reference Number': _('Transaction Reference Number')
+            }
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_students
-    )
+            if not header:
+                header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
+                display_headers = []
+                for header_element in header:
+                    # translate header into a localizable display string
+                    display_headers.append(enrollment_report_headers.get(header_element, header_element))
+                writer.writerow(display_headers)
+
+            writer.writerow(user_data.values() + course_enrollment_data.values() + payment_data.values())
+            task_progress.succeeded += 1
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+        TASK_LOG.info(
+            u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
+            task_info_string,
+            action_name,
+            current_step,
+            student_counter,
+            total_students
+        )
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
+        # By this point, every row has been written out, and the report is
+        # published as we leave this block.
+        current_step = {'step': 'Uploading CSVs'}
+        task_progress.update_task_state(extra_meta=current_step)
+        TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
     # One last update before we close out...
     TASK_LOG.info(u'%s, Task type: %s, Finalizing detailed enrollment task', task_info_string, action_name)
@@ -291,9 +291,9 @@ class TestReportMixin(object):
     Cleans up after tests that place files in the reports directory.
     """
     def tearDown(self):
-        reports_download_path = settings.GRADES_DOWNLOAD['ROOT_PATH']
-        if os.path.exists(reports_download_path):
-            shutil.rmtree(reports_download_path)
+        for reports_download_path in (settings.GRADES_DOWNLOAD['ROOT_PATH'], settings.GRADE_REPORT_SHARDS['ROOT_PATH']):
+            if os.path.exists(reports_download_path):
+                shutil.rmtree(reports_download_path)
 
     def verify_rows_in_csv(self, expected_rows, file_index=0, verify_order=True, ignore_other_columns=False):
         """
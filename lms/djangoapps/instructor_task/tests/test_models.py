@@ -20,11 +20,21 @@ class MockKey(object):
     def __init__(self, bucket):
         self.last_modified = datetime.now()
         self.bucket = bucket
+        self.contents = None
 
     def set_contents_from_string(self, contents, headers):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
+        self.contents = contents
         self.bucket.store_key(self)
 
+    def set_contents_from_file(self, fp, headers):  # pylint: disable=unused-argument
+        """ Expected method on a Key object. """
+        self.set_contents_from_string(fp.read(), headers)
+
+    def get_contents_to_file(self, fp):
+        """ Expected method on a Key object. """
+        fp.write(self.bucket.get_key(self.key).contents)
+
     def generate_url(self, expires_in):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
         return "http://fake-edx-s3.edx.org/"
@@ -39,6 +49,10 @@ class MockBucket(object):
         """ Not a Bucket method, created just to store the keys in the Bucket for testing purposes. """
         self.keys.append(key)
 
+    def get_key(self, key_name):
+        """ Expected method on a Bucket object. """
+        return next(key for key in reversed(self.keys) if key.key == key_name)
+
     def list(self, prefix):  # pylint: disable=unused-argument
         """ Expected method on a Bucket object. """
         return self.keys
@@ -84,6 +98,35 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_open_csv_writer(self):
+        """
+        Test that rows written with ReportStore.open_csv_writer() can be read
+        back once the writer is closed.
+        """
+        rows = [[u'id', u'name'], [1, u'ni\xf1o'], [2, u'student']]
+        report_store = self.create_report_store()
+        with report_store.open_csv_writer(self.course_id, 'report.csv') as writer:
+            writer.writerow(rows[0])
+            writer.writerows(rows[1:])
+
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+        self.assertEqual(
+            list(report_store.iter_rows(self.course_id, 'report.csv')),
+            [[unicode(item) for item in row] for row in rows]
+        )
+
+    def test_open_csv_writer_error(self):
+        """
+        Test that nothing is stored if writing the report fails.
+        """
+        report_store = self.create_report_store()
+        with self.assertRaises(ValueError):
+            with report_store.open_csv_writer(self.course_id, 'report.csv') as writer:
+                writer.writerow([u'id', u'name'])
+                raise ValueError
+
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     """
@@ -7,7 +7,7 @@ from mock import Mock, patch
 
 from student.models import CourseEnrollment
 
-from instructor_task.subtasks import queue_subtasks_for_query
+from instructor_task.subtasks import queue_subtasks_for_id_ranges, queue_subtasks_for_query
 from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase
 
@@ -80,3 +80,32 @@ class TestSubtasks(InstructorTaskCourseTestCase):
         self.assertEqual(len(mock_create_subtask_fcn_args[0][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[1][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[2][0][0]), 5)
+
+    def test_queue_subtasks_for_id_ranges(self):
+        """Test queue_subtasks_for_id_ranges() if the last subtask needs to accommodate > items_per_task items."""
+
+        instructor_task = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='bulk_course_email',
+        )
+        mock_create_subtask_fcn = Mock()
+        with patch('instructor_task.subtasks.initialize_subtask_info', Mock(return_value={})):
+            queue_subtasks_for_id_ranges(
+                entry=instructor_task,
+                action_name='action_name',
+                create_subtask_fcn=mock_create_subtask_fcn,
+                item_ids=iter([2, 3, 5, 7, 11, 13, 17, 19]),
+                items_per_task=3,
+                total_num_items=6,
+            )
+
+        # Check the range of items of each subtask
+        self.assertEqual(
+            [args[0][0] for args in mock_create_subtask_fcn.call_args_list],
+            [
+                {'first_id': 2, 'last_id': 5, 'num_items': 3},
+                {'first_id': 7, 'last_id': 19, 'num_items': 5},
+            ]
+        )
@@ -11,7 +11,10 @@ from uuid import uuid4
 from mock import Mock, MagicMock, patch
 
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
+from django.test.utils import override_settings
 
+from xblock.fields import Scope
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from opaque_keys.edx.locations import i4xEncoder
 
@@ -258,6 +261,44 @@ class TestRescoreInstructorTask(TestInstructorTasks):
         self.assertEquals(output.get('action_name'), 'rescored')
         self.assertGreater(output.get('duration_ms'), 0)
 
+    @patch.dict(settings.FEATURES, {'ENABLE_MODULE_STATE_UPDATE_SUBTASKS': True})
+    @override_settings(MODULE_STATE_UPDATE_MODULES_PER_TASK=3)
+    def test_rescoring_subtasks(self):
+        input_state = json.dumps({'done': True})
+        num_students = 10
+        self._create_students_with_state(num_students, input_state)
+        task_entry = self._create_input_entry()
+        mock_instance = Mock()
+        mock_instance.rescore_problem = Mock(return_value={'success': 'correct'})
+        with patch('instructor_task.tasks_helper.get_module_for_descriptor_internal') as mock_get_module:
+            mock_get_module.return_value = mock_instance
+            self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+        self.assertEquals(mock_instance.rescore_problem.call_count, num_students)
+        # check the progress accumulated by the subtasks
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEquals(entry.task_state, SUCCESS)
+        self.assertEquals(json.loads(entry.subtasks)['total'], 4)
+        output = json.loads(entry.task_output)
+        self.assertEquals(output.get('succeeded'), num_students)
+        self.assertEquals(output.get('total'), num_students)
+        self.assertEquals(output.get('action_name'), 'rescored')
+
+    def test_rescoring_uses_loaded_state(self):
+        # The state of the StudentModules isn't queried again for each student
+        input_state = json.dumps({'done': True, 'attempts': 3})
+        self._create_students_with_state(2, input_state)
+        task_entry = self._create_input_entry()
+        mock_instance = Mock()
+        mock_instance.rescore_problem = Mock(return_value={'success': 'correct'})
+        with patch('instructor_task.tasks_helper.get_module_for_descriptor_internal') as mock_get_module:
+            mock_get_module.return_value = mock_instance
+            with patch('courseware.model_data.FieldDataCache.cache_for_descriptor_descendents') as mock_cache:
+                self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+        self.assertFalse(mock_cache.called)
+        for call in mock_get_module.call_args_list:
+            field_data_cache = call[1]['field_data_cache']
+            self.assertEquals(len(field_data_cache.cache[Scope.user_state]), 1)
+
     def test_rescoring_bad_result(self):
         # Confirm that rescoring does not succeed if "success" key is not an expected value.
         input_state = json.dumps({'done': True})
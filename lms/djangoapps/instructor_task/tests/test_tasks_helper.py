@@ -7,10 +7,16 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
+import json
+from celery.states import SUCCESS, FAILURE
 from mock import Mock, patch
 import tempfile
 import unicodecsv
+from uuid import uuid4
+from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
 
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from certificates.tests.factories import GeneratedCertificateFactory, CertificateWhitelistFactory
@@ -31,10 +37,17 @@ from student.models import CourseEnrollment
 from verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore, PROGRESS
 from instructor_task.tasks_helper import (
-    cohort_students_and_upload, upload_grades_csv, upload_problem_grade_report, upload_students_csv
+    BulkStudentContext,
+    cohort_students_and_upload,
+    generate_grade_report_shard,
+    merge_grade_report_shards,
+    upload_grades_csv,
+    upload_problem_grade_report,
+    upload_students_csv,
 )
+from instructor_task.tests.factories import InstructorTaskFactory
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase, TestConditionalContent
 
 
@@ -80,6 +93,105 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
+    def _run_grade_report_subtasks(self):
+        """
+        Run a grade report split between subtasks, running each subtask as
+        soon as it is queued, and return the InstructorTask and the result.
+        """
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_type='grade_course',
+        )
+        shard_task = Mock()
+        shard_task.subtask.side_effect = lambda args, **kwargs: Mock(
+            apply_async=lambda: generate_grade_report_shard(*args)
+        )
+        result = upload_grades_csv(None, entry.id, self.course.id, None, 'graded', shard_task=shard_task)
+        return InstructorTask.objects.get(pk=entry.id), shard_task, result
+
+    @patch.dict(settings.FEATURES, {'ENABLE_GRADE_REPORT_SUBTASKS': True})
+    @override_settings(GRADE_REPORT_STUDENTS_PER_TASK=2)
+    @patch('instructor_task.tasks_helper._grade_report_shards_are_shared', Mock(return_value=True))
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_grade_report_subtasks(self, _mock_current_task):
+        """
+        Test that a grade report split between subtasks is the same as the
+        one generated by a single task.
+        """
+        for i in range(5):
+            self.create_student('student{0}'.format(i), 'student{0}@example.com'.format(i))
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+        upload_grades_csv(None, None, self.course.id, None, 'graded')
+        expected_rows = list(report_store.iter_rows(self.course.id, report_store.links_for(self.course.id)[0][0]))
+
+        entry, shard_task, result = self._run_grade_report_subtasks()
+        self.assertEqual(shard_task.subtask.call_count, 3)
+        self.assertDictContainsSubset({'total': 5}, result)
+        self.assertEqual(entry.task_state, SUCCESS)
+
+        report_csv_filename = report_store.links_for(self.course.id)[0][0]
+        self.assertEqual(list(report_store.iter_rows(self.course.id, report_csv_filename)), expected_rows)
+        self.assertEqual(ReportStore.from_config(config_name='GRADE_REPORT_SHARDS').links_for(self.course.id), [])
+
+    @patch.dict(settings.FEATURES, {'ENABLE_GRADE_REPORT_SUBTASKS': True})
+    @override_settings(GRADE_REPORT_STUDENTS_PER_TASK=2)
+    @patch('instructor_task.tasks_helper._grade_report_shards_are_shared', Mock(return_value=True))
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_grade_report_subtasks_merge_failure(self, _mock_current_task):
+        """
+        Test that a failed merge fails the task, and still cleans up the shards
+        and the merge lock.
+        """
+        for i in range(3):
+            self.create_student('student{0}'.format(i), 'student{0}@example.com'.format(i))
+        with patch('instructor_task.tasks_helper.open_report_csv_writer', side_effect=IOError('S3 is down')):
+            entry, _, _ = self._run_grade_report_subtasks()
+
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['message'], 'S3 is down')
+        self.assertEqual(ReportStore.from_config(config_name='GRADE_REPORT_SHARDS').links_for(self.course.id), [])
+        self.assertIsNone(cache.get(u'grade-report-merge-{}'.format(entry.task_id)))
+
+    @patch.dict(settings.FEATURES, {'ENABLE_GRADE_REPORT_SUBTASKS': True})
+    @override_settings(GRADE_REPORT_STUDENTS_PER_TASK=2)
+    @patch('instructor_task.tasks_helper._grade_report_shards_are_shared', Mock(return_value=True))
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_grade_report_merged_once(self, _mock_current_task):
+        """
+        Test that a merge which takes the lock after another one completed the
+        report leaves the report alone.
+        """
+        for i in range(3):
+            self.create_student('student{0}'.format(i), 'student{0}@example.com'.format(i))
+        entry, _, _ = self._run_grade_report_subtasks()
+        InstructorTask.objects.filter(pk=entry.id).update(task_state=PROGRESS)
+
+        def add_after_other_merge(*args):
+            """The other merge completes the report just before the lock is taken."""
+            InstructorTask.objects.filter(pk=entry.id).update(task_state=SUCCESS)
+            return True
+
+        with patch('instructor_task.tasks_helper.cache.add', side_effect=add_after_other_merge):
+            with patch('instructor_task.tasks_helper.open_report_csv_writer') as mock_writer:
+                merge_grade_report_shards(entry.id)
+        self.assertFalse(mock_writer.called)
+
+    @patch.dict(settings.FEATURES, {'ENABLE_GRADE_REPORT_SUBTASKS': True})
+    @override_settings(GRADE_REPORT_STUDENTS_PER_TASK=2)
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_grade_report_subtasks_need_shared_store(self, _mock_current_task):
+        """
+        Test that the report isn't split between subtasks when the shards
+        wouldn't be stored where every worker can read them.
+        """
+        for i in range(3):
+            self.create_student('student{0}'.format(i), 'student{0}@example.com'.format(i))
+        _, shard_task, result = self._run_grade_report_subtasks()
+        self.assertFalse(shard_task.subtask.called)
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3}, result)
+
     def _verify_cell_data_for_user(self, username, course_id, column_header, expected_cell_content):
         """
         Verify cell data in the grades CSV for a particular user.
@@ -1103,3 +1215,27 @@ class TestGradeReportEnrollmentAndCertificateInfo(TestReportMixin, InstructorTas
         )
 
         self._verify_csv_data(user.username, expected_output)
+
+    @ddt.data(
+        ('verified', 'approved', 'downloadable', 'verified'),
+        ('verified', 'must_retry', 'notpassing', 'honor'),
+        ('honor', 'approved', 'restricted', 'honor'),
+    )
+    @ddt.unpack
+    def test_bulk_student_context(self, user_enroll_mode, verification_status, certificate_status, certificate_mode):
+        """
+        Test that the columns loaded in bulk for a student are the same as the
+        ones looked up for that student alone.
+        """
+        user = self._create_user_data(
+            user_enroll_mode, True, True, False, verification_status, certificate_status, certificate_mode
+        )
+        bulk_context = BulkStudentContext(self.course.id, [user], False, [], set([user.id]))
+        single_context = BulkStudentContext(self.course.id, [], False, [], set([user.id]))
+
+        for context_method in ('cohort_names', 'group_names', 'enrollment_mode', 'verification_status'):
+            self.assertEqual(
+                getattr(bulk_context, context_method)(user),
+                getattr(single_context, context_method)(user)
+            )
+        self.assertEqual(bulk_context.certificate_info(user, 'Pass'), single_context.certificate_info(user, 'Pass'))
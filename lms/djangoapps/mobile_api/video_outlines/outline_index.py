@@ -0,0 +1,152 @@
+"""
+An index of the video outline of each course, kept in the django cache.
+
+Building the video outline of a course walks the course, binding a module for
+each block with children, and computes the path, urls and summary of each video
+on every request. The index holds the outline of a course for a list of video
+profiles, with what the access checks need of each video, so that only the
+checks which depend on the user and the time, and the absolute urls, are left to
+each request.
+
+The index of a course is keyed by the time its course structure was last
+updated, which happens on each publish of the course, in the CMS as well, so it
+is rebuilt on its first use after a publish. The encoded videos added to VAL
+without a publish are picked up when the index expires. Courses without a course
+structure, or with blocks whose children depend on the user (e.g. split_test or
+library_content blocks), aren't indexed.
+"""
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from edxval.api import get_video_info_for_course_and_profiles, ValInternalError
+
+from courseware.access import filter_accessible_index_entries
+from openedx.core.djangoapps.content.course_structures.models import CourseStructure
+from util.module_utils import restricted_group_access
+from xmodule.modulestore.mongo.base import BLOCK_TYPES_WITH_CHILDREN
+
+from .serializers import find_url_kwargs, path, reverse_urls, transcript_urls, video_summary_data
+
+# How long the index of a course is kept, which bounds how long new encoded videos aren't listed
+INDEX_TIMEOUT = 60 * 60
+
+
+class VideoOutlineEntry(namedtuple('VideoOutlineEntry', [
+        'path', 'url_kwargs', 'block_id', 'summary', 'start', 'days_early_for_beta', 'visible_to_staff_only',
+        'group_access',
+])):
+    """
+    A video of the outline of a course.
+
+    url_kwargs are the arguments of the unit and section urls of the video, and
+    summary is its video_summary_data.  The other fields are named like the
+    attributes of the video module, except group_access which is None if the
+    video isn't restricted to groups of users, else its merged_group_access
+    without the partitions it isn't restricted by.
+    """
+    __slots__ = ()
+
+
+def _cache_key(course_key, version, video_profiles):
+    """
+    Returns the django cache key of the index of the course `course_key` for the
+    course structure `version` and the `video_profiles`.
+    """
+    return u'mobile_api.video_outlines.{}.{}.{}'.format(
+        course_key, version.isoformat(), ','.join(video_profiles)
+    )
+
+
+def build_video_outline_index(course, video_profiles):
+    """
+    Returns the list of the VideoOutlineEntries of the videos of `course`, in
+    the order of the course, or None if the course has blocks whose children
+    depend on the user.
+    """
+    try:
+        course_videos = get_video_info_for_course_and_profiles(unicode(course.id), video_profiles)
+    except ValInternalError:  # pragma: nocover
+        course_videos = {}
+    local_cache = {'course_videos': course_videos}
+
+    def parent_or_video(usage_key):
+        """
+        Returns whether the usage_key's block_type is video or a parent type.
+        """
+        return usage_key.block_type == 'video' or usage_key.block_type in BLOCK_TYPES_WITH_CHILDREN
+
+    index = []
+    child_to_parent = {}
+    stack = [course]
+    while stack:
+        curr_block = stack.pop()
+
+        if curr_block.hide_from_toc:
+            # Like BlockOutline, don't traverse down the hidden blocks.
+            continue
+
+        if curr_block.location.block_type == 'video':
+            index.append(VideoOutlineEntry(
+                path=list(path(curr_block, child_to_parent, course)),
+                url_kwargs=find_url_kwargs(curr_block, child_to_parent),
+                block_id=curr_block.scope_ids.usage_id.block_id,
+                summary=video_summary_data(video_profiles, curr_block, local_cache),
+                start=curr_block.start,
+                days_early_for_beta=curr_block.days_early_for_beta,
+                visible_to_staff_only=curr_block.visible_to_staff_only,
+                group_access=restricted_group_access(curr_block),
+            ))
+
+        if curr_block.has_children:
+            if curr_block.has_dynamic_children():
+                return None
+            children = curr_block.get_children(parent_or_video)
+            for block in reversed(children):
+                stack.append(block)
+                child_to_parent[block] = curr_block
+    return index
+
+
+def get_video_outline_index(course, video_profiles):
+    """
+    Returns the list of the VideoOutlineEntries of `course` for the
+    `video_profiles`, from the cache if it's there, else from the modulestore,
+    or None if the course isn't indexed.
+    """
+    versions = list(CourseStructure.objects.filter(course_id=course.id).values_list('modified', flat=True)[:1])
+    if not versions:
+        return None
+
+    cache_key = _cache_key(course.id, versions[0], video_profiles)
+    cached = cache.get(cache_key)
+    if cached is None:
+        # The courses which aren't indexed are cached too
+        cached = {'index': build_video_outline_index(course, video_profiles)}
+        cache.set(cache_key, cached, INDEX_TIMEOUT)
+    return cached['index']
+
+
+def get_video_outline(course, request, video_profiles):
+    """
+    Returns the video outline of `course` for the user of `request`, like
+    BlockOutline serializes it, from the index of the course, or None if the
+    course isn't indexed.
+    """
+    index = get_video_outline_index(course, video_profiles)
+    if index is None:
+        return None
+
+    video_outline = []
+    for entry in filter_accessible_index_entries(request.user, course, index):
+        unit_url, section_url = reverse_urls(course.id, request, *entry.url_kwargs)
+        summary = dict(entry.summary)
+        summary["transcripts"] = transcript_urls(course.id, entry.block_id, summary["transcripts"], request)
+        video_outline.append({
+            "path": entry.path,
+            "named_path": [b["name"] for b in entry.path],
+            "unit_url": unit_url,
+            "section_url": section_url,
+            "summary": summary,
+        })
+    return video_outline
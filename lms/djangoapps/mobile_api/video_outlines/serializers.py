@@ -118,6 +118,20 @@ def find_urls(course_id, block, child_to_parent, request):
             unit_url (str): The url of a unit
             section_url (str): The url of a section
 
+    """
+    return reverse_urls(course_id, request, *find_url_kwargs(block, child_to_parent))
+
+
+def find_url_kwargs(block, child_to_parent):
+    """
+    Find the arguments of the section and unit urls of a block.
+
+    Returns:
+        chapter_id, section, position:
+            chapter_id (str): The block id of the chapter, or None
+            section (str): The url name of the section, or None
+            position (int): The position of the unit in the section, or None
+
     """
     block_path = []
     while block in child_to_parent:
@@ -138,6 +152,13 @@ def find_urls(course_id, block, child_to_parent, request):
                 break
             position += 1
 
+    return chapter_id, section.url_name if section is not None else None, position
+
+
+def reverse_urls(course_id, request, chapter_id, section, position):
+    """
+    Returns the unit url and the section url of the given chapter, section and position.
+    """
     kwargs = {'course_id': unicode(course_id)}
     if chapter_id is None:
         course_url = reverse("courseware", kwargs=kwargs, request=request)
@@ -148,7 +169,7 @@ def find_urls(course_id, block, child_to_parent, request):
         chapter_url = reverse("courseware_chapter", kwargs=kwargs, request=request)
         return chapter_url, chapter_url
 
-    kwargs['section'] = section.url_name
+    kwargs['section'] = section
     section_url = reverse("courseware_section", kwargs=kwargs, request=request)
     if position is None:
         return section_url, section_url
@@ -162,6 +183,18 @@ def video_summary(video_profiles, course_id, video_descriptor, request, local_ca
     """
     returns summary dict for the given video module
     """
+    summary = video_summary_data(video_profiles, video_descriptor, local_cache)
+    summary["transcripts"] = transcript_urls(
+        course_id, video_descriptor.scope_ids.usage_id.block_id, summary["transcripts"], request
+    )
+    return summary
+
+
+def video_summary_data(video_profiles, video_descriptor, local_cache):
+    """
+    returns the summary dict for the given video module, with the list of the
+    languages of its transcripts in place of their urls
+    """
     always_available_data = {
         "name": video_descriptor.display_name,
         "category": video_descriptor.category,
@@ -175,7 +208,7 @@ def video_summary(video_profiles, course_id, video_descriptor, request, local_ca
             "video_thumbnail_url": None,
             "duration": 0,
             "size": 0,
-            "transcripts": {},
+            "transcripts": [],
             "language": None,
         }
         ret.update(always_available_data)
@@ -209,27 +242,33 @@ def video_summary(video_profiles, course_id, video_descriptor, request, local_ca
     transcripts_info = video_descriptor.get_transcripts_info()
     transcript_langs = video_descriptor.available_translations(transcripts_info, verify_assets=False)
 
-    transcripts = {
-        lang: reverse(
-            'video-transcripts-detail',
-            kwargs={
-                'course_id': unicode(course_id),
-                'block_id': video_descriptor.scope_ids.usage_id.block_id,
-                'lang': lang
-            },
-            request=request,
-        )
-        for lang in transcript_langs
-    }
-
     ret = {
         "video_url": video_url,
         "video_thumbnail_url": None,
         "duration": duration,
         "size": size,
-        "transcripts": transcripts,
+        "transcripts": list(transcript_langs),
         "language": video_descriptor.get_default_transcript_language(transcripts_info),
         "encoded_videos": video_data.get('profiles')
     }
     ret.update(always_available_data)
     return ret
+
+
+def transcript_urls(course_id, block_id, transcript_langs, request):
+    """
+    Returns the dict of the urls of the transcripts of the video `block_id` in
+    the languages `transcript_langs`.
+    """
+    return {
+        lang: reverse(
+            'video-transcripts-detail',
+            kwargs={
+                'course_id': unicode(course_id),
+                'block_id': block_id,
+                'lang': lang
+            },
+            request=request,
+        )
+        for lang in transcript_langs
+    }
@@ -8,7 +8,10 @@ import itertools
 from uuid import uuid4
 from collections import namedtuple
 
+from django.conf import settings
+from django.core.cache import cache
 from edxval import api
+from mock import patch
 from mobile_api.models import MobileApiConfig
 from xmodule.modulestore.tests.factories import ItemFactory
 from xmodule.video_module import transcripts_utils
@@ -17,8 +20,10 @@ from xmodule.partitions.partitions import Group, UserPartition
 
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
+from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 
 from ..testutils import MobileAPITestCase, MobileAuthTestMixin, MobileCourseAccessTestMixin
+from .outline_index import get_video_outline_index
 
 
 class TestVideoAPITestCase(MobileAPITestCase):
@@ -862,6 +867,90 @@ class TestVideoSummaryList(
             )
 
 
+@patch.dict(settings.FEATURES, {'ENABLE_VIDEO_OUTLINE_INDEX': True})
+class TestVideoSummaryListIndex(TestVideoAPITestCase, TestVideoAPIMixin):
+    """
+    Tests for /api/mobile/v0.5/video_outlines/courses/{course_id}.. served from the video outline index
+    """
+    REVERSE_INFO = {'name': 'video-summary-list', 'params': ['course_id']}
+
+    def setUp(self):
+        super(TestVideoSummaryListIndex, self).setUp()
+        cache.clear()
+        self._create_video_with_subs()
+        ItemFactory.create(
+            parent=self.other_unit,
+            category="video",
+            display_name=u"test html5 video omega \u03a9",
+            html5_sources=[self.html5_video_url],
+        )
+        self.login_and_enroll()
+
+    def test_same_outline(self):
+        with patch.dict(settings.FEATURES, {'ENABLE_VIDEO_OUTLINE_INDEX': False}):
+            expected_outline = self.api_response().data
+        self.assertEqual(len(expected_outline), 2)
+
+        with patch('mobile_api.video_outlines.views.BlockOutline') as mock_block_outline:
+            self.assertEqual(self.api_response().data, expected_outline)
+        self.assertFalse(mock_block_outline.called)
+
+        # The index is only built once
+        with patch('mobile_api.video_outlines.outline_index.build_video_outline_index') as mock_build:
+            self.assertEqual(self.api_response().data, expected_outline)
+        self.assertFalse(mock_build.called)
+
+    def test_rebuilt_on_publish(self):
+        self.assertEqual(len(self.api_response().data), 2)
+        ItemFactory.create(
+            parent=self.nameless_unit,
+            category="video",
+            edx_video_id=self.edx_video_id,
+        )
+        self.assertEqual(len(self.api_response().data), 3)
+
+    def test_visible_to_staff_only(self):
+        ItemFactory.create(
+            parent=self.nameless_unit,
+            category="video",
+            edx_video_id=self.edx_video_id,
+            visible_to_staff_only=True,
+        )
+        self.assertEqual(len(self.api_response().data), 2)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(len(self.api_response().data), 3)
+
+    def test_with_group_access(self):
+        self._setup_course_partitions()
+        for group_ids in [[], [0, 1], [2]]:
+            ItemFactory.create(
+                parent=self.nameless_unit,
+                category="video",
+                edx_video_id=self.edx_video_id,
+                group_access={self.partition_id: group_ids},
+            )
+        # The user is in one of the groups 0 and 1 of the partition, group 2 doesn't exist
+        self.assertEqual(len(self.api_response().data), 4)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(len(self.api_response().data), 5)
+
+    def test_with_split_block(self):
+        self._setup_split_module("video")
+        course = modulestore().get_course(self.course.id, depth=None)
+        self.assertIsNone(get_video_outline_index(course, MobileApiConfig.get_video_profiles()))
+        self.assertEqual(len(self.api_response().data), 3)
+
+    def test_without_course_structure(self):
+        CourseStructure.objects.filter(course_id=self.course.id).delete()
+        with patch('mobile_api.video_outlines.outline_index.build_video_outline_index') as mock_build:
+            self.assertEqual(len(self.api_response().data), 2)
+        self.assertFalse(mock_build.called)
+
+
 class TestTranscriptsDetail(
     TestVideoAPITestCase, MobileAuthTestMixin, MobileCourseAccessTestMixin, TestVideoAPIMixin  # pylint: disable=bad-continuation
 ):
@@ -8,6 +8,7 @@ general XBlock representation in this rather specialized formatting.
 """
 from functools import partial
 
+from django.conf import settings
 from django.http import Http404, HttpResponse
 from mobile_api.models import MobileApiConfig
 
@@ -19,6 +20,7 @@ from xmodule.exceptions import NotFoundError
 from xmodule.modulestore.django import modulestore
 
 from ..utils import mobile_view, mobile_course_access
+from .outline_index import get_video_outline
 from .serializers import BlockOutline, video_summary
 
 
@@ -80,6 +82,10 @@ class VideoSummaryList(generics.ListAPIView):
     @mobile_course_access(depth=None)
     def list(self, request, course, *args, **kwargs):
         video_profiles = MobileApiConfig.get_video_profiles()
+        if settings.FEATURES.get('ENABLE_VIDEO_OUTLINE_INDEX'):
+            video_outline = get_video_outline(course, request, video_profiles)
+            if video_outline is not None:
+                return Response(video_outline)
         video_outline = list(
             BlockOutline(
                 course.id,
@@ -178,6 +178,18 @@ if 'loc_cache' not in CACHES:
         'LOCATION': 'edx_location_mem_cache',
     }
 
+COURSE_STRUCTURE_CACHE_LOCAL_SIZE = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_CACHE_LOCAL_SIZE', COURSE_STRUCTURE_CACHE_LOCAL_SIZE
+)
+STATIC_CONTENT_DISK_CACHE_DIR = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE_DIR', STATIC_CONTENT_DISK_CACHE_DIR)
+STATIC_CONTENT_DISK_CACHE_SIZE = ENV_TOKENS.get('STATIC_CONTENT_DISK_CACHE_SIZE', STATIC_CONTENT_DISK_CACHE_SIZE)
+ACCESS_DECISION_CACHE_TIMEOUT = ENV_TOKENS.get('ACCESS_DECISION_CACHE_TIMEOUT', ACCESS_DECISION_CACHE_TIMEOUT)
+COMMENTS_SERVICE_POOL_SIZE = ENV_TOKENS.get('COMMENTS_SERVICE_POOL_SIZE', COMMENTS_SERVICE_POOL_SIZE)
+COMMENTS_SERVICE_TIMEOUT = ENV_TOKENS.get('COMMENTS_SERVICE_TIMEOUT', COMMENTS_SERVICE_TIMEOUT)
+COMMENTS_SERVICE_TIMEOUTS = ENV_TOKENS.get('COMMENTS_SERVICE_TIMEOUTS', COMMENTS_SERVICE_TIMEOUTS)
+COMMENTS_SERVICE_RETRIES = ENV_TOKENS.get('COMMENTS_SERVICE_RETRIES', COMMENTS_SERVICE_RETRIES)
+COMMENTS_SERVICE_FETCH_THREADS = ENV_TOKENS.get('COMMENTS_SERVICE_FETCH_THREADS', COMMENTS_SERVICE_FETCH_THREADS)
+
 # Email overrides
 DEFAULT_FROM_EMAIL = ENV_TOKENS.get('DEFAULT_FROM_EMAIL', DEFAULT_FROM_EMAIL)
 DEFAULT_FEEDBACK_EMAIL = ENV_TOKENS.get('DEFAULT_FEEDBACK_EMAIL', DEFAULT_FEEDBACK_EMAIL)
@@ -206,6 +218,11 @@ BULK_EMAIL_MAX_RETRIES = ENV_TOKENS.get('BULK_EMAIL_MAX_RETRIES', BULK_EMAIL_MAX
 BULK_EMAIL_INFINITE_RETRY_CAP = ENV_TOKENS.get('BULK_EMAIL_INFINITE_RETRY_CAP', BULK_EMAIL_INFINITE_RETRY_CAP)
 BULK_EMAIL_LOG_SENT_EMAILS = ENV_TOKENS.get('BULK_EMAIL_LOG_SENT_EMAILS', BULK_EMAIL_LOG_SENT_EMAILS)
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = ENV_TOKENS.get('BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS', BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+BULK_EMAIL_CONNECTIONS_PER_TASK = ENV_TOKENS.get('BULK_EMAIL_CONNECTIONS_PER_TASK', BULK_EMAIL_CONNECTIONS_PER_TASK)
+BULK_EMAIL_MAX_SENDS_PER_SECOND = ENV_TOKENS.get('BULK_EMAIL_MAX_SENDS_PER_SECOND', BULK_EMAIL_MAX_SENDS_PER_SECOND)
+BULK_EMAIL_QUEUE_RECIPIENT_RANGES = ENV_TOKENS.get(
+    'BULK_EMAIL_QUEUE_RECIPIENT_RANGES', BULK_EMAIL_QUEUE_RECIPIENT_RANGES
+)
 # We want Bulk Email running on the high-priority queue, so we define the
 # routing key that points to it. At the moment, the name is the same.
 # We have to reset the value here, since we have changed the value of the queue name.
@@ -275,6 +292,7 @@ for name, value in ENV_TOKENS.get("CODE_JAIL", {}).items():
         CODE_JAIL[name] = value
 
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
+SAFE_EXEC_LOCAL_CACHE_SIZE = ENV_TOKENS.get('SAFE_EXEC_LOCAL_CACHE_SIZE', SAFE_EXEC_LOCAL_CACHE_SIZE)
 
 ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 
@@ -484,6 +502,11 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADE_REPORT_SHARDS = ENV_TOKENS.get("GRADE_REPORT_SHARDS", GRADE_REPORT_SHARDS)
+GRADE_REPORT_STUDENTS_PER_TASK = ENV_TOKENS.get("GRADE_REPORT_STUDENTS_PER_TASK", GRADE_REPORT_STUDENTS_PER_TASK)
+MODULE_STATE_UPDATE_MODULES_PER_TASK = ENV_TOKENS.get(
+    "MODULE_STATE_UPDATE_MODULES_PER_TASK", MODULE_STATE_UPDATE_MODULES_PER_TASK
+)
 
 # financial reports
 FINANCIAL_REPORTS = ENV_TOKENS.get("FINANCIAL_REPORTS", FINANCIAL_REPORTS)
@@ -625,3 +648,6 @@ else:
 # EdxNotes config
 
 EDXNOTES_INTERFACE = ENV_TOKENS.get('EDXNOTES_INTERFACE', EDXNOTES_INTERFACE)
+
+MODULESTORE_QUERY_BUDGET = ENV_TOKENS.get('MODULESTORE_QUERY_BUDGET', MODULESTORE_QUERY_BUDGET)
+MODULESTORE_QUERY_RECORD_SIZES = ENV_TOKENS.get('MODULESTORE_QUERY_RECORD_SIZES', MODULESTORE_QUERY_RECORD_SIZES)
@@ -399,6 +399,47 @@ FEATURES = {
     # How many seconds to show the bumper again, default is 7 days:
     'SHOW_BUMPER_PERIODICITY': 7 * 24 * 3600,
 
+    # Persist per-subsection scores so that grading a student only recomputes
+    # the subsections whose scores have changed since they were last graded.
+    'ENABLE_PERSISTENT_SUBSECTION_GRADES': False,
+
+    # Split the grade reports of large courses between several celery
+    # subtasks, see GRADE_REPORT_STUDENTS_PER_TASK.
+    'ENABLE_GRADE_REPORT_SUBTASKS': False,
+
+    # Report the Mongo operations made by the modulestores and the contentstore
+    # while handling each request to datadog, see MODULESTORE_QUERY_BUDGET.
+    'ENABLE_MODULESTORE_INSTRUMENTATION': False,
+
+    # List the courses on the student dashboard and in the course catalog from
+    # their summaries (kept up to date on publish) instead of loading them from the
+    # modulestore. Run the generate_course_summaries command before enabling.
+    'ENABLE_COURSE_SUMMARIES': False,
+
+    # Split the rescoring of problems answered by many students between several
+    # celery subtasks, see MODULE_STATE_UPDATE_MODULES_PER_TASK.
+    'ENABLE_MODULE_STATE_UPDATE_SUBTASKS': False,
+
+    # Serve the distributions of the Metrics tab (CLASS_DASHBOARD) from tables
+    # refreshed incrementally, instead of aggregating all the StudentModules of the
+    # course on each request. Run the refresh_class_dashboard_distributions command
+    # before enabling.
+    'ENABLE_CLASS_DASHBOARD_AGGREGATES': False,
+
+    # Memoize the decisions of courseware.access.has_access for the duration of
+    # each request, and across requests for ACCESS_DECISION_CACHE_TIMEOUT seconds.
+    'ENABLE_ACCESS_DECISION_CACHE': False,
+
+    # Build the forum category maps from an index of the discussion modules of
+    # each course kept in the cache and dropped on publish, instead of loading the
+    # modules from the modulestore on each request.
+    'ENABLE_DISCUSSION_INDEX': False,
+
+    # Serve the mobile video outlines from an index of the videos of each course
+    # kept in the cache and rebuilt after each publish, instead of walking the
+    # course on each request. Courses without a course structure are not indexed.
+    'ENABLE_VIDEO_OUTLINE_INDEX': False,
+
 }
 
 # Ignore static asset files on import which match this pattern
@@ -726,6 +767,9 @@ MODULESTORE = {
                         'default_class': 'xmodule.hidden_module.HiddenDescriptor',
                         'fs_root': DATA_DIR,
                         'render_template': 'edxmako.shortcuts.render_to_string',
+                        # Whether lazily loading the definition of a block loads the
+                        # definitions of all its siblings in the same query
+                        'prefetch_sibling_definitions': False,
                     }
                 },
                 {
@@ -736,6 +780,9 @@ MODULESTORE = {
                         'default_class': 'xmodule.hidden_module.HiddenDescriptor',
                         'fs_root': DATA_DIR,
                         'render_template': 'edxmako.shortcuts.render_to_string',
+                        # Whether updating an item only patches the part of the cached
+                        # metadata inheritance tree below it
+                        'incremental_inheritance_updates': False,
                     }
                 },
                 {
@@ -751,6 +798,41 @@ MODULESTORE = {
     }
 }
 
+# Requests making more Mongo operations than this are logged, when the
+# ENABLE_MODULESTORE_INSTRUMENTATION feature is on. None disables the logging.
+MODULESTORE_QUERY_BUDGET = None
+
+# Also measure the size of the documents returned by the Mongo operations, which
+# costs a BSON encoding of each document.
+MODULESTORE_QUERY_RECORD_SIZES = False
+
+# Number of split structures kept in each process's in-memory LRU, in front of the
+# 'course_structure_cache' django cache. 0 disables the in-process tier.
+COURSE_STRUCTURE_CACHE_LOCAL_SIZE = 64
+
+# Directory of the on-disk LRU of the assets too large for the django cache, served
+# by the StaticContentServer. None disables the disk cache.
+STATIC_CONTENT_DISK_CACHE_DIR = None
+# Number of bytes of assets kept in the disk cache
+STATIC_CONTENT_DISK_CACHE_SIZE = 1024 * 1024 * 1024
+
+# Number of seconds the decisions of courseware.access.has_access are cached across
+# requests, when the ENABLE_ACCESS_DECISION_CACHE feature is on. Saving users, their
+# course roles or their enrollments invalidates their decisions. 0 disables it.
+ACCESS_DECISION_CACHE_TIMEOUT = 0
+
+# Number of keep-alive connections to the comments service kept by each process.
+# 0 opens a new connection for each request.
+COMMENTS_SERVICE_POOL_SIZE = 0
+# Number of seconds requests to the comments service wait for a response, by default
+# and by action, e.g. {'get_user_active_threads': 10}
+COMMENTS_SERVICE_TIMEOUT = 5
+COMMENTS_SERVICE_TIMEOUTS = {}
+# Number of times GET requests to the comments service are retried after connection errors
+COMMENTS_SERVICE_RETRIES = 0
+# Number of threads the forum views fetch independent comments service data with
+COMMENTS_SERVICE_FETCH_THREADS = 1
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -764,6 +846,17 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # How many persistent sandbox workers each process may keep to execute
+    # jailed code, instead of starting a sandboxed Python per execution.
+    # 0 disables the pool. A worker runs the code of many students under the
+    # same sandbox user, so code escaping its per-execution child could affect
+    # later executions until the worker is replaced (after any failing
+    # execution, or pool_max_executions): it isolates executions less than a
+    # fresh process per execution does.
+    'pool_size': 0,
+    # How many executions a worker runs before it is replaced.
+    'pool_max_executions': 100,
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -776,6 +869,10 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# How many results of jailed code each process keeps in memory, in front of
+# the shared cache.  0 disables the in-process cache.
+SAFE_EXEC_LOCAL_CACHE_SIZE = 0
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -1116,6 +1213,7 @@ TEMPLATE_LOADERS = (
 
 MIDDLEWARE_CLASSES = (
     'request_cache.middleware.RequestCache',
+    'monitoring.middleware.ModulestoreQueryMiddleware',
     'microsite_configuration.middleware.MicrositeMiddleware',
     'django_comment_client.middleware.AjaxExceptionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -1669,6 +1767,17 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of SMTP connections each bulk email subtask sends messages over at once.
+BULK_EMAIL_CONNECTIONS_PER_TASK = 1
+
+# Maximum number of bulk email messages sent per second by all the workers, which
+# must share the default cache for it to be enforced across them.  0 disables it.
+BULK_EMAIL_MAX_SENDS_PER_SECOND = 0
+
+# Whether bulk email subtasks are queued with the range of user ids of their recipients, which
+# they fetch themselves, rather than with the list of their recipients.
+BULK_EMAIL_QUEUE_RECIPIENT_RANGES = False
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -1838,6 +1947,7 @@ INSTALLED_APPS = (
     'lms.djangoapps.lms_xblock',
 
     'openedx.core.djangoapps.content.course_structures',
+    'openedx.core.djangoapps.content.course_summaries',
     'course_structure_api',
 
     # Mailchimp Syncing
@@ -2033,6 +2143,22 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# Where the partial CSVs of grade reports split between subtasks are stored
+# until they are merged into the final report.
+GRADE_REPORT_SHARDS = {
+    'STORAGE_TYPE': 'localfs',
+    'BUCKET': 'edx-grades',
+    'ROOT_PATH': '/tmp/edx-s3/grade_report_shards',
+}
+
+# Number of students graded by each grade report subtask, when the
+# ENABLE_GRADE_REPORT_SUBTASKS feature is on.
+GRADE_REPORT_STUDENTS_PER_TASK = 1000
+
+# Number of StudentModules rescored by each rescoring subtask, when the
+# ENABLE_MODULE_STATE_UPDATE_SUBTASKS feature is on.
+MODULE_STATE_UPDATE_MODULES_PER_TASK = 1000
+
 FINANCIAL_REPORTS = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-financial-reports',
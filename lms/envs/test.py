@@ -176,6 +176,9 @@ DATABASES = {
 
 }
 
+# Keep mongo call counts deterministic across tests.
+COURSE_STRUCTURE_CACHE_LOCAL_SIZE = 0
+
 CACHES = {
     # This is the cache used for most things.
     # In staging/prod envs, the sessions also live here.
@@ -207,6 +210,9 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     },
+    'course_structure_cache': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
 
 }
 
@@ -0,0 +1,119 @@
+"""
+Tests for the requests sent to the comments service
+"""
+import threading
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import Mock, patch
+import requests
+
+from lms.lib.comment_client import utils
+
+
+def _response(data):
+    """
+    Returns a mock of the successful response of the comments service with `data`
+    """
+    return Mock(status_code=200, json=Mock(return_value=data))
+
+
+class PerformRequestTestCase(TestCase):
+    """
+    Tests of the pooling, timeouts and retries of perform_request
+    """
+    URL = 'http://localhost:4567/api/v1/threads'
+
+    @patch('lms.lib.comment_client.utils.requests.request')
+    def test_unpooled_by_default(self, mock_request):
+        mock_request.return_value = _response({'id': 1})
+        self.assertEqual(utils.perform_request('get', self.URL), {'id': 1})
+        self.assertEqual(mock_request.call_args[1]['timeout'], 5)
+
+    @override_settings(COMMENTS_SERVICE_POOL_SIZE=4)
+    @patch('lms.lib.comment_client.utils.requests.request')
+    def test_pooled_session(self, mock_request):
+        with patch('requests.Session.request', return_value=_response({'id': 1})) as mock_session_request:
+            self.assertEqual(utils.perform_request('get', self.URL), {'id': 1})
+            utils.perform_request('get', self.URL)
+        self.assertFalse(mock_request.called)
+        self.assertEqual(mock_session_request.call_count, 2)
+        # The session is reused by the later requests of the process
+        self.assertIs(utils._get_session(4), utils._get_session(4))  # pylint: disable=protected-access
+
+    @override_settings(COMMENTS_SERVICE_TIMEOUT=3, COMMENTS_SERVICE_TIMEOUTS={'get_user_active_threads': 10})
+    @patch('lms.lib.comment_client.utils.requests.request')
+    def test_timeouts(self, mock_request):
+        mock_request.return_value = _response({})
+        utils.perform_request('get', self.URL, metric_action='get_user_active_threads')
+        self.assertEqual(mock_request.call_args[1]['timeout'], 10)
+        utils.perform_request('get', self.URL, metric_action='thread.get')
+        self.assertEqual(mock_request.call_args[1]['timeout'], 3)
+
+    @override_settings(COMMENTS_SERVICE_RETRIES=2)
+    @patch('lms.lib.comment_client.utils.requests.request')
+    def test_get_retried(self, mock_request):
+        mock_request.side_effect = [requests.exceptions.ConnectionError(), _response({'id': 1})]
+        self.assertEqual(utils.perform_request('get', self.URL), {'id': 1})
+        self.assertEqual(mock_request.call_count, 2)
+
+        mock_request.reset_mock()
+        mock_request.side_effect = requests.exceptions.ConnectionError()
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            utils.perform_request('get', self.URL)
+        self.assertEqual(mock_request.call_count, 3)
+
+    @override_settings(COMMENTS_SERVICE_RETRIES=2)
+    @patch('lms.lib.comment_client.utils.requests.request')
+    def test_post_not_retried(self, mock_request):
+        mock_request.side_effect = requests.exceptions.ConnectionError()
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            utils.perform_request('post', self.URL, {'body': 'body'})
+        self.assertEqual(mock_request.call_count, 1)
+
+
+class FetchConcurrentlyTestCase(TestCase):
+    """
+    Tests of fetch_concurrently
+    """
+    def test_serial_by_default(self):
+        calls = []
+        results = utils.fetch_concurrently(
+            lambda: calls.append(threading.current_thread()) or 1,
+            lambda: calls.append(threading.current_thread()) or 2,
+        )
+        self.assertEqual(results, [1, 2])
+        self.assertEqual(calls, [threading.current_thread()] * 2)
+
+    @override_settings(COMMENTS_SERVICE_FETCH_THREADS=3)
+    def test_concurrent(self):
+        # The functions wait for each other, so they only all return in time if run concurrently
+        started = []
+        all_started = threading.Event()
+
+        def fetch(value):
+            """
+            Returns a function returning `value` if the 3 functions are called at once.
+            """
+            def function():
+                """
+                Waits for the other functions to start.
+                """
+                started.append(value)
+                if len(started) == 3:
+                    all_started.set()
+                return value if all_started.wait(5) else None
+            return function
+
+        self.assertEqual(utils.fetch_concurrently(fetch(1), fetch(2), fetch(3)), [1, 2, 3])
+
+    @override_settings(COMMENTS_SERVICE_FETCH_THREADS=2)
+    def test_exception_raised(self):
+        def fail():
+            """
+            Fails like a missing thread.
+            """
+            raise utils.CommentClientRequestError('Not found', 404)
+
+        with self.assertRaises(utils.CommentClientRequestError):
+            utils.fetch_concurrently(lambda: 1, fail)
@@ -1,14 +1,24 @@
 from contextlib import contextmanager
 import dogstats_wrapper as dog_stats_api
+import itertools
 import logging
+import os
 import requests
+from requests.adapters import HTTPAdapter
+import sys
+import threading
 from django.conf import settings
 from time import time
 from uuid import uuid4
+from django.utils import translation
 from django.utils.translation import get_language
 
 log = logging.getLogger(__name__)
 
+_session_lock = threading.Lock()
+_session = None
+_session_pid = None
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -50,6 +60,82 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+def _get_session(pool_size):
+    """
+    Returns the requests.Session shared by the threads of the process, which
+    keeps up to `pool_size` connections to the comments service alive.
+    """
+    global _session, _session_pid  # pylint: disable=global-statement
+    # Connections aren't shared with the processes forked from this one
+    if _session_pid != os.getpid():
+        with _session_lock:
+            if _session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+                _session_pid = os.getpid()
+    return _session
+
+
+def _send_request(method, url, **kwargs):
+    """
+    Sends the request over a pooled keep-alive connection if
+    COMMENTS_SERVICE_POOL_SIZE is set, or else over a new connection.
+    """
+    pool_size = getattr(settings, 'COMMENTS_SERVICE_POOL_SIZE', 0)
+    if pool_size:
+        return _get_session(pool_size).request(method, url, **kwargs)
+    return requests.request(method, url, **kwargs)
+
+
+def fetch_concurrently(*functions):
+    """
+    Calls the `functions`, which fetch data from the comments service, on up
+    to COMMENTS_SERVICE_FETCH_THREADS threads, and returns their results in
+    order. The first exception raised by the functions is re-raised.
+
+    The functions must not use the database, as the connections opened by
+    other threads are never closed.
+    """
+    thread_count = min(getattr(settings, 'COMMENTS_SERVICE_FETCH_THREADS', 1), len(functions))
+    if thread_count <= 1:
+        return [function() for function in functions]
+
+    language = get_language()
+    indexes = itertools.count()
+    indexes_lock = threading.Lock()
+    results = [None] * len(functions)
+
+    def call_functions():
+        """
+        Calls the functions not called yet, until there are none left.
+        """
+        with translation.override(language):
+            while True:
+                with indexes_lock:
+                    index = next(indexes)
+                if index >= len(functions):
+                    return
+                try:
+                    results[index] = (True, functions[index]())
+                except Exception:  # pylint: disable=broad-except
+                    results[index] = (False, sys.exc_info())
+
+    threads = [threading.Thread(target=call_functions) for __ in xrange(thread_count - 1)]
+    for thread in threads:
+        thread.start()
+    call_functions()
+    for thread in threads:
+        thread.join()
+
+    for succeeded, result in results:
+        if not succeeded:
+            raise result[0], result[1], result[2]
+    return [result for __, result in results]
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
                     metric_action=None, metric_tags=None, paged_results=False):
 
@@ -75,15 +161,28 @@ def perform_request(method, url, data_or_params=None, raw=False,
     else:
         data = None
         params = merge_dict(data_or_params, request_id_dict)
+    timeout = getattr(settings, 'COMMENTS_SERVICE_TIMEOUTS', {}).get(
+        metric_action, getattr(settings, 'COMMENTS_SERVICE_TIMEOUT', 5)
+    )
+    # Only the requests which can be repeated safely are retried
+    retries = getattr(settings, 'COMMENTS_SERVICE_RETRIES', 0) if method == 'get' else 0
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
-            method,
-            url,
-            data=data,
-            params=params,
-            headers=headers,
-            timeout=5
-        )
+        for attempt in itertools.count():
+            try:
+                response = _send_request(
+                    method,
+                    url,
+                    data=data,
+                    params=params,
+                    headers=headers,
+                    timeout=timeout
+                )
+                break
+            except requests.exceptions.ConnectionError:
+                if attempt >= retries:
+                    raise
+                log.warning(u"Retrying request %s to the comments service after a connection error", request_id)
+                dog_stats_api.increment('comment_client.request.retry', tags=metric_tags)
 
     metric_tags.append(u'status_code:{}'.format(response.status_code))
     if response.status_code > 200:
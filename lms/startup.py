@@ -38,12 +38,30 @@ def run():
     if settings.FEATURES.get('ENABLE_THIRD_PARTY_AUTH', False):
         enable_third_party_auth()
 
+    configure_safe_exec()
+
     # Initialize Segment.io analytics module. Flushes first time a message is received and
     # every 50 messages thereafter, or if 10 seconds have passed since last flush
     if settings.FEATURES.get('SEGMENT_IO_LMS') and hasattr(settings, 'SEGMENT_IO_LMS_KEY'):
         analytics.init(settings.SEGMENT_IO_LMS_KEY, flush_at=50)
 
 
+def configure_safe_exec():
+    """
+    Configure the pool of sandbox workers executing the jailed code, and the
+    in-process cache of their results. The workers are started on demand, so
+    each process forked by the web server has its own.
+    """
+    from capa.safe_exec import pool
+    from capa.safe_exec.safe_exec import configure_local_cache
+
+    pool.configure(
+        settings.CODE_JAIL.get('pool_size', 0),
+        settings.CODE_JAIL.get('pool_max_executions', 100),
+    )
+    configure_local_cache(settings.SAFE_EXEC_LOCAL_CACHE_SIZE)
+
+
 def add_mimetypes():
     """
     Add extra mimetypes. Used in xblock_resource.
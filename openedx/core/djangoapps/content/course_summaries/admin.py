@@ -0,0 +1,12 @@
+from ratelimitbackend import admin
+
+from .models import CourseSummary
+
+
+class CourseSummaryAdmin(admin.ModelAdmin):
+    search_fields = ('course_id',)
+    list_display = ('course_id', 'display_name', 'start', 'end', 'modified')
+    ordering = ('course_id', '-modified')
+
+
+admin.site.register(CourseSummary, CourseSummaryAdmin)
@@ -0,0 +1,48 @@
+import logging
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore.django import modulestore
+
+from openedx.core.djangoapps.content.course_summaries.tasks import update_course_summary
+
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Fills the course summary table, e.g. before enabling FEATURES['ENABLE_COURSE_SUMMARIES'].
+    """
+    args = '<course_id course_id ...>'
+    help = 'Generates and stores the summary of one or more courses.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--all',
+                    action='store_true',
+                    default=False,
+                    help='Generate summaries for all courses.'),
+    )
+
+    def handle(self, *args, **options):
+
+        if options['all']:
+            course_keys = [course.id for course in modulestore().get_courses()]
+        else:
+            course_keys = [CourseKey.from_string(arg) for arg in args]
+
+        if not course_keys:
+            log.fatal('No courses specified.')
+            return
+
+        log.info('Generating course summaries for %d courses.', len(course_keys))
+
+        for course_key in course_keys:
+            try:
+                update_course_summary.apply([unicode(course_key)])
+            except Exception as ex:  # pylint: disable=broad-except
+                log.exception('An error occurred while generating the summary of %s: %s',
+                              unicode(course_key), ex.message)
+
+        log.info('Finished generating course summaries.')
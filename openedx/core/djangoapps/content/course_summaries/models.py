@@ -0,0 +1,315 @@
+"""
+A denormalized copy of the course settings read by the student dashboard and
+the course catalog, so that listing courses doesn't require loading each course
+from the modulestore.
+"""
+import json
+import logging
+from datetime import datetime
+
+import dateutil.parser
+from django.db import models
+from django.utils.timezone import UTC
+from django.utils.translation import ugettext as _
+from math import exp
+from model_utils.models import TimeStampedModel
+
+from util.date_utils import strftime_localized
+from xmodule.course_module import CourseDescriptor, DEFAULT_START_DATE
+from xmodule.fields import Date
+from xmodule.modulestore.django import modulestore
+from xmodule.split_test_module import get_split_user_partitions
+from xmodule_django.models import CourseKeyField, UsageKeyField
+
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class CourseSummary(TimeStampedModel):
+    """
+    The settings of a course needed to list it on the dashboard or in the catalog,
+    and to check whether a user may see or load it.
+
+    A summary stands in for its CourseDescriptor in those places: it provides the
+    attributes and methods of the descriptor they use.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True, unique=True, verbose_name='Course ID')
+    location = UsageKeyField(max_length=255)
+    org = models.CharField(max_length=255, db_index=True)
+
+    display_name = models.TextField(null=True)
+    display_coursenumber = models.TextField(null=True)
+    display_organization = models.TextField(null=True)
+    course_image_url = models.TextField(blank=True)
+    social_sharing_url = models.TextField(null=True)
+    end_of_course_survey_url = models.TextField(null=True)
+
+    start = models.DateTimeField(null=True)
+    end = models.DateTimeField(null=True)
+    advertised_start = models.TextField(null=True)
+    announcement = models.DateTimeField(null=True)
+    is_new = models.NullBooleanField()
+    days_early_for_beta = models.FloatField(null=True)
+
+    enrollment_start = models.DateTimeField(null=True)
+    enrollment_end = models.DateTimeField(null=True)
+    enrollment_domain = models.TextField(null=True)
+    invitation_only = models.BooleanField(default=False)
+    ispublic = models.NullBooleanField()
+    catalog_visibility = models.TextField(null=True)
+    visible_to_staff_only = models.BooleanField(default=False)
+    mobile_available = models.BooleanField(default=False)
+    pre_requisite_courses_json = models.TextField(default='[]')
+
+    # Whether the course itself restricts access to some groups of users; the
+    # access checks load the course when it does.
+    has_group_access = models.BooleanField(default=False)
+
+    certificates_display_behavior = models.TextField(null=True)
+    certificates_show_before_end = models.BooleanField(default=False)
+    cert_name_short = models.TextField(null=True)
+    cert_name_long = models.TextField(null=True)
+    lowest_passing_grade = models.FloatField(null=True)
+    active_web_certificates_json = models.TextField(default='[]')
+
+    # the course has no group access restrictions (see has_group_access), so the
+    # partitions are never needed for the access checks
+    user_partitions = []
+    merged_group_access = {}
+    _class_tags = frozenset()
+
+    def __unicode__(self):
+        return unicode(self.course_id)
+
+    @property
+    def id(self):  # pylint: disable=invalid-name
+        """The course_id of the course, like CourseDescriptor.id"""
+        return self.course_id
+
+    @property
+    def number(self):
+        return self.location.course
+
+    @property
+    def display_name_with_default(self):
+        """
+        Return the display name, or the url name of the course if it has none.
+        """
+        name = self.display_name
+        if name is None:
+            name = self.location.name.replace('_', ' ')
+        return name.replace('<', '&lt;').replace('>', '&gt;')
+
+    @property
+    def display_number_with_default(self):
+        return self.display_coursenumber or self.number
+
+    @property
+    def display_org_with_default(self):
+        return self.display_organization or self.org
+
+    @property
+    def pre_requisite_courses(self):
+        return json.loads(self.pre_requisite_courses_json)
+
+    @property
+    def certificates(self):
+        """
+        The active certificate configurations of the course, in the format of
+        CourseDescriptor.certificates.
+        """
+        return {'certificates': json.loads(self.active_web_certificates_json)}
+
+    def has_ended(self):
+        """
+        Returns True if the current time is after the specified course end date.
+        """
+        if self.end is None:
+            return False
+        return datetime.now(UTC()) > self.end
+
+    def has_started(self):
+        """
+        Returns True if the current time is after the course start date, or if
+        the course has no start date.
+        """
+        if self.start is None:
+            return True
+        return datetime.now(UTC()) > self.start
+
+    def may_certify(self):
+        """
+        Return True if it is acceptable to show the student a certificate download link
+        """
+        show_early = (
+            self.certificates_display_behavior in ('early_with_info', 'early_no_info') or
+            self.certificates_show_before_end
+        )
+        return show_early or self.has_ended()
+
+    @property
+    def start_date_is_still_default(self):
+        return self.advertised_start is None and self.start == DEFAULT_START_DATE
+
+    def start_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the text of the advertised start date of the course, or of its start date.
+        """
+        if isinstance(self.advertised_start, basestring):
+            try:
+                start = Date().from_json(self.advertised_start)
+            except ValueError:
+                start = None
+            if start is None:
+                return self.advertised_start.title()
+        elif self.start_date_is_still_default:
+            # Translators: TBD stands for 'To Be Determined' and is used when a course
+            # does not yet have an announced start date.
+            return _('TBD')
+        else:
+            start = self.start
+
+        text = strftime_localized(start, format_string)
+        return text + u" UTC" if format_string == "DATE_TIME" else text
+
+    def end_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the text of the end date of the course, or '' if it has none.
+        """
+        if self.end is None:
+            return ''
+        text = strftime_localized(self.end, format_string)
+        return text if format_string == "SHORT_DATE" else text + u" UTC"
+
+    @property
+    def is_newish(self):
+        """
+        Returns whether the course is flagged as new, like CourseDescriptor.is_newish.
+        """
+        if self.is_new is not None:
+            return self.is_new
+        announcement, start, now = self._sorting_dates()
+        if announcement and (now - announcement).days < 30:
+            return True
+        return (now - start).days < 1
+
+    @property
+    def sorting_score(self):
+        """
+        Returns the "newness" score of the course, like CourseDescriptor.sorting_score.
+        """
+        announcement, start, now = self._sorting_dates()
+        scale = 300.0  # about a year
+        if announcement:
+            return -exp(-(now - announcement).days / scale)
+        return exp((now - start).days / scale)
+
+    def _sorting_dates(self):
+        # utility function to get the datetime objects used by is_newish and sorting_score
+        try:
+            start = dateutil.parser.parse(self.advertised_start)
+            if start.tzinfo is None:
+                start = start.replace(tzinfo=UTC())
+        except (ValueError, AttributeError):
+            start = self.start
+        return self.announcement, start, datetime.now(UTC())
+
+    @classmethod
+    def update_from_course(cls, course):
+        """
+        Creates or updates the summary of the CourseDescriptor `course`, and returns it.
+        """
+        # Import here to avoid a circular import.
+        from courseware.courses import course_image_url
+
+        is_new = course.is_new
+        if isinstance(is_new, basestring):
+            is_new = is_new.lower() in ['true', 'yes', 'y']
+
+        fields = {
+            'location': course.location,
+            'org': course.location.org,
+            'display_name': course.display_name,
+            'display_coursenumber': course.display_coursenumber,
+            'display_organization': course.display_organization,
+            'course_image_url': course_image_url(course),
+            'social_sharing_url': course.social_sharing_url,
+            'end_of_course_survey_url': course.end_of_course_survey_url,
+            'start': course.start,
+            'end': course.end,
+            'advertised_start': course.advertised_start,
+            'announcement': course.announcement,
+            'is_new': None if is_new is None else bool(is_new),
+            'days_early_for_beta': course.days_early_for_beta,
+            'enrollment_start': course.enrollment_start,
+            'enrollment_end': course.enrollment_end,
+            'enrollment_domain': course.enrollment_domain,
+            'invitation_only': course.invitation_only,
+            'ispublic': getattr(course, 'ispublic', None),
+            'catalog_visibility': course.catalog_visibility,
+            'visible_to_staff_only': course.visible_to_staff_only,
+            'mobile_available': course.mobile_available,
+            'pre_requisite_courses_json': json.dumps(course.pre_requisite_courses),
+            'has_group_access': _has_group_access_restrictions(course),
+            'certificates_display_behavior': course.certificates_display_behavior,
+            'certificates_show_before_end': course.certificates_show_before_end,
+            'cert_name_short': course.cert_name_short,
+            'cert_name_long': course.cert_name_long,
+            'lowest_passing_grade': course.lowest_passing_grade,
+            'active_web_certificates_json': json.dumps([
+                config for config in course.certificates.get('certificates', []) if config.get('is_active')
+            ]),
+        }
+
+        summary, created = cls.objects.get_or_create(course_id=course.id, defaults=fields)
+        if not created:
+            for name, value in fields.iteritems():
+                setattr(summary, name, value)
+            summary.save()
+        return summary
+
+    @classmethod
+    def update_from_modulestore(cls, course_key):
+        """
+        Creates or updates the summary of the course `course_key` from the
+        modulestore, and returns it. Deletes the summary, and returns None, if the
+        course doesn't exist or fails to load.
+        """
+        course = modulestore().get_course(course_key, depth=0)
+        if not isinstance(course, CourseDescriptor):
+            cls.objects.filter(course_id=course_key).delete()
+            return None
+        return cls.update_from_course(course)
+
+    @classmethod
+    def get_summaries(cls, course_keys):
+        """
+        Returns a dict mapping each of `course_keys` to the summary of the course.
+
+        Summaries missing from the table (e.g. of courses which haven't been
+        published since it was created) are made from the modulestore; courses
+        which don't exist or fail to load are left out.
+        """
+        summaries = {summary.course_id: summary for summary in cls.objects.filter(course_id__in=course_keys)}
+        for course_key in course_keys:
+            if course_key not in summaries:
+                summary = cls.update_from_modulestore(course_key)
+                if summary is not None:
+                    summaries[course_key] = summary
+        return summaries
+
+
+def _has_group_access_restrictions(course):
+    """
+    Returns whether access to `course` is restricted by its group_access setting
+    to some groups of users.
+    """
+    if len(course.user_partitions) == len(get_split_user_partitions(course.user_partitions)):
+        # only split_test partitions, which the access checks ignore
+        return False
+    return any(group_ids is not None for group_ids in course.merged_group_access.values())
+
+
+# Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
+# at the end of this file to avoid circular dependencies.
+import signals  # pylint: disable=unused-import
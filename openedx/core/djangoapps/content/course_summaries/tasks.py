@@ -0,0 +1,28 @@
+import logging
+
+from celery.task import task
+from opaque_keys.edx.keys import CourseKey
+
+
+log = logging.getLogger('edx.celery.task')
+
+
+@task(name=u'openedx.core.djangoapps.content.course_summaries.tasks.update_course_summary')
+def update_course_summary(course_key):
+    """
+    Updates the summary of the specified course (in the database) from the modulestore.
+    """
+    # Import here to avoid circular import.
+    from .models import CourseSummary
+
+    # Callers pass the course key as a Unicode string, as CourseLocators aren't JSON-serializable.
+    if not isinstance(course_key, basestring):
+        raise ValueError('course_key must be a string. {} is not acceptable.'.format(type(course_key)))
+
+    course_key = CourseKey.from_string(course_key)
+
+    try:
+        CourseSummary.update_from_modulestore(course_key)
+    except Exception as ex:
+        log.exception('An error occurred while updating the summary of course %s: %s', course_key, ex.message)
+        raise
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+from django.test.client import RequestFactory
+from django.utils.timezone import UTC
+from mock import patch
+
+from courseware.courses import get_course_about_section
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from student.tests.factories import UserFactory
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+from openedx.core.djangoapps.content.course_summaries.models import CourseSummary
+from openedx.core.djangoapps.content.course_summaries.signals import (
+    listen_for_course_delete, listen_for_course_publish
+)
+from openedx.core.djangoapps.content.course_summaries.tasks import update_course_summary
+
+
+class CourseSummaryTests(ModuleStoreTestCase):
+    def setUp(self, **kwargs):
+        super(CourseSummaryTests, self).setUp()
+        self.course = CourseFactory.create(
+            display_name='Test Course',
+            start=datetime(2014, 1, 1, tzinfo=UTC()),
+            end=datetime.now(UTC()) + timedelta(days=30),
+            certificates_display_behavior='early_no_info',
+        )
+        CourseSummary.objects.all().delete()
+
+    def test_update_from_course(self):
+        summary = CourseSummary.update_from_course(self.course)
+        self.assertEqual(summary.id, self.course.id)
+        self.assertEqual(summary.location, self.course.location)
+        self.assertEqual(summary.org, self.course.org)
+        self.assertEqual(summary.start, self.course.start)
+        self.assertEqual(summary.end, self.course.end)
+
+        # The summary stands in for the course
+        for attr in ('number', 'display_name_with_default', 'display_number_with_default',
+                     'display_org_with_default', 'start_date_is_still_default', 'pre_requisite_courses',
+                     'sorting_score', 'is_newish', 'lowest_passing_grade', 'social_sharing_url',
+                     'cert_name_short', 'cert_name_long'):
+            self.assertEqual(getattr(summary, attr), getattr(self.course, attr), attr)
+        for method in ('has_started', 'has_ended', 'may_certify', 'start_datetime_text', 'end_datetime_text'):
+            self.assertEqual(getattr(summary, method)(), getattr(self.course, method)(), method)
+
+        # Updating doesn't create another summary
+        self.course.display_name = 'Renamed'
+        CourseSummary.update_from_course(self.course)
+        self.assertEqual(CourseSummary.objects.get(course_id=self.course.id).display_name, 'Renamed')
+        self.assertEqual(CourseSummary.objects.count(), 1)
+
+    def test_start_datetime_text(self):
+        summary = CourseSummary.update_from_course(self.course)
+        self.assertEqual(summary.start_datetime_text('DATE_TIME'), self.course.start_datetime_text('DATE_TIME'))
+        self.assertEqual(summary.end_datetime_text(), self.course.end_datetime_text())
+
+        summary.advertised_start = 'Spring'
+        self.assertEqual(summary.start_datetime_text(), 'Spring')
+
+    def test_update_course_summary(self):
+        # Method requires string input
+        self.assertRaises(ValueError, update_course_summary, self.course.id)
+
+        update_course_summary(unicode(self.course.id))
+        self.assertEqual(CourseSummary.objects.get(course_id=self.course.id).display_name, 'Test Course')
+
+    def test_publish_updates_summary(self):
+        CourseSummary.update_from_course(self.course)
+        self.course.display_name = 'Published'
+        self.store.update_item(self.course, ModuleStoreEnum.UserID.test)
+
+        listen_for_course_publish(None, self.course.id)
+        self.assertEqual(CourseSummary.objects.get(course_id=self.course.id).display_name, 'Published')
+
+    def test_about_sections(self):
+        summary = CourseSummary.update_from_course(self.course)
+        request = RequestFactory().get('/')
+        request.user = UserFactory.create()
+        request.session = {}
+        with patch('courseware.courses.get_request_for_thread', return_value=request):
+            for section_key in ('title', 'university', 'number', 'short_description', 'overview'):
+                self.assertEqual(
+                    get_course_about_section(summary, section_key),
+                    get_course_about_section(self.course, section_key),
+                    section_key
+                )
+
+    def test_has_started_without_start(self):
+        summary = CourseSummary.update_from_course(self.course)
+        summary.start = None
+        self.assertTrue(summary.has_started())
+
+    def test_delete_removes_summary(self):
+        CourseSummary.update_from_course(self.course)
+        self.store.delete_course(self.course.id, ModuleStoreEnum.UserID.test)
+
+        listen_for_course_delete(None, self.course.id)
+        self.assertFalse(CourseSummary.objects.filter(course_id=self.course.id).exists())
+
+    def test_get_summaries(self):
+        missing_course_key = SlashSeparatedCourseKey('edX', 'missing', '2015')
+        CourseSummary.update_from_course(self.course)
+        other_course = CourseFactory.create()
+
+        # The summary of other_course is made on demand, and the missing course is left out
+        summaries = CourseSummary.get_summaries([self.course.id, other_course.id, missing_course_key])
+        self.assertEqual(set(summaries), {self.course.id, other_course.id})
+        self.assertTrue(CourseSummary.objects.filter(course_id=other_course.id).exists())
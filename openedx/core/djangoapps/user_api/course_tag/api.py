@@ -39,6 +39,29 @@ def get_course_tag(user, course_id, key):
         return None
 
 
+def get_course_tags_for_users(user_ids, course_id, keys):
+    """
+    Gets the values of the course tags for the specified keys of several users
+    in the specified course_id, in a single query.
+
+    Args:
+        user_ids: ids of the User objects
+        course_id: course identifier (string)
+        keys: list of arbitrary (<=255 char string) keys
+
+    Returns:
+        dict mapping `(user_id, key)` to the string value, for the tags that
+        have a value saved
+    """
+    records = UserCourseTag.objects.filter(
+        user__id__in=user_ids,
+        course_id=course_id,
+        key__in=keys
+    ).values_list('user_id', 'key', 'value')
+
+    return {(user_id, key): value for user_id, key, value in records}
+
+
 def set_course_tag(user, course_id, key, value):
     """
     Sets the value of the user's course tag for the specified key in the specified